@@ -7,21 +7,31 @@ handling of href paths and HTTP 202 status codes. This module provides a
 customizable client that makes it easier to work with the API in a safe and
 concise manner.
 """
+import atexit
 import copy
+import threading
 import warnings
-from time import sleep
-from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import parse_qsl, urlencode, urljoin, urlparse, urlsplit, urlunsplit
 
 import requests
 from packaging.version import Version
+from requests.adapters import HTTPAdapter
 
-from pulp_smash import exceptions
+from pulp_smash import exceptions, polling
 from pulp_smash.log import logger
 
 _SENTINEL = object()
 _TASK_END_STATES = ("canceled", "error", "finished", "skipped", "timed out")
 _P3_TASK_END_STATES = ("canceled", "completed", "failed", "skipped")
 
+# A mapping between base URLs and ``requests.Session`` objects. Used by
+# `_get_session`. Every API client talking to the same host shares one session,
+# and thus one pool of keep-alive connections. Guarded by `_SESSIONS_LOCK`.
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
 
 def check_pulp3_restriction(client):
     """Check if running system is running on Pulp3 otherwise raise error."""
@@ -86,18 +96,122 @@ def _check_tasks(cfg, tasks, task_errors):
                 raise exceptions.TaskReportError(msg, task)
 
 
+def _decode_json(response):
+    """Return the JSON-decoded body of ``response``.
+
+    Handlers frequently call one another, and each may need the decoded body.
+    The body is decoded once, and the result is memoized on the response.
+    """
+    try:
+        return vars(response)["_pulp_smash_json"]
+    except KeyError:
+        body = vars(response)["_pulp_smash_json"] = response.json()
+        return body
+
+
 def _handle_202(cfg, response, pulp_host):
-    """Check for an HTTP 202 response and handle it appropriately."""
-    if response.status_code == 202:  # "Accepted"
-        _check_http_202_content_type(response)
-        call_report = response.json()
-        tasks = tuple(poll_spawned_tasks(cfg, call_report, pulp_host))
-        logger.debug("Task call report: %s", call_report)
-        if cfg.pulp_version < Version("3"):
-            _check_call_report(call_report)
-            _check_tasks(cfg, tasks, ("error", "exception", "traceback"))
-        else:
-            _check_tasks(cfg, tasks, ("error",))
+    """Check for an HTTP 202 response and handle it appropriately.
+
+    Wait for each spawned task to complete, and check each completed task.
+    Tasks are polled at most once per response, no matter how many handlers
+    process that response.
+
+    :returns: A tuple of the final states of the spawned tasks. Empty if
+        ``response`` doesn't have an HTTP 202 status code.
+    """
+    if response.status_code != 202:  # "Accepted"
+        return ()
+    try:
+        return vars(response)["_pulp_smash_tasks"]
+    except KeyError:
+        pass
+    _check_http_202_content_type(response)
+    call_report = _decode_json(response)
+    tasks = vars(response)["_pulp_smash_tasks"] = tuple(
+        poll_spawned_tasks(cfg, call_report, pulp_host)
+    )
+    _check_spawned_tasks(cfg, call_report, tasks)
+    return tasks
+
+
+def _check_spawned_tasks(cfg, call_report, tasks):
+    """Inspect a call report and the final states of the tasks it spawned."""
+    logger.debug("Task call report: %s", call_report)
+    if cfg.pulp_version < Version("3"):
+        _check_call_report(call_report)
+        _check_tasks(cfg, tasks, ("error", "exception", "traceback"))
+    else:
+        _check_tasks(cfg, tasks, ("error",))
+
+
+def _get_session(cfg, pulp_host):
+    """Return the pooled ``requests.Session`` for ``pulp_host``.
+
+    The session is created the first time a host is seen, and its connection
+    pool keeps at most ``cfg.pool_size`` connections per host alive. Requests
+    made while the pool is exhausted, such as while streamed responses are left
+    unread, open extra connections, which are closed once they're released.
+    """
+    base_url = cfg.get_request_context(pulp_host).base_url
+    with _SESSIONS_LOCK:
+        try:
+            return _SESSIONS[base_url]
+        except KeyError:
+            pass
+        session = requests.Session()
+        # A pooled session must not carry cookies from one request to the
+        # next, just like the throwaway sessions made by ``requests.request``.
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_maxsize=cfg.pool_size, pool_block=False)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _SESSIONS[base_url] = session
+        logger.debug("New session for %s with pool size %s", base_url, cfg.pool_size)
+        return session
+
+
+def close_sessions():
+    """Close every pooled session, and the connections held by each.
+
+    Clients created afterwards transparently open new sessions. This function
+    is called automatically when the interpreter exits.
+    """
+    with _SESSIONS_LOCK:
+        sessions = tuple(_SESSIONS.values())
+        _SESSIONS.clear()
+    for session in sessions:
+        session.close()
+
+
+atexit.register(close_sessions)
+
+
+def get_session_stats():
+    """Return connection reuse counters for each pooled session.
+
+    :returns: A dict mapping base URLs to dicts with the keys ``requests``,
+        ``connections`` and ``reused``. ``requests`` is the number of requests
+        made through the session, ``connections`` is the number of connections
+        opened to make them, and ``reused`` is the difference of the two.
+    """
+    with _SESSIONS_LOCK:
+        sessions = tuple(_SESSIONS.items())
+    stats = {}
+    for base_url, session in sessions:
+        num_requests = num_connections = 0
+        for adapter in {id(adapter): adapter for adapter in session.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    num_requests += pool.num_requests
+                    num_connections += pool.num_connections
+        stats[base_url] = {
+            "requests": num_requests,
+            "connections": num_connections,
+            "reused": num_requests - num_connections,
+        }
+    return stats
 
 
 def _walk_pages(cfg, page, pulp_host):
@@ -111,6 +225,40 @@ def _walk_pages(cfg, page, pulp_host):
             break
 
 
+def _walk_pages_parallel(cfg, page, pulp_host, workers):
+    """Like ``_walk_pages``, but fetch the remaining pages concurrently.
+
+    The offsets of the remaining pages are worked out from the ``count`` of
+    the first page and from the ``limit`` and ``offset`` in its ``next`` link.
+    Up to ``workers`` pages are fetched at once, and results are yielded in
+    page order. If the ``next`` link has no offset, as is the case with
+    cursor-based pagination, fall back to following ``next`` links.
+    """
+    yield page["results"]
+    if not page["next"]:
+        return
+    next_url = urlsplit(page["next"])
+    # Other params, such as filters, may be blank or repeated. Keep them as-is.
+    pairs = parse_qsl(next_url.query, keep_blank_values=True)
+    query = dict(pairs)
+    if "limit" not in query or "offset" not in query:
+        next_page = Client(cfg, json_handler, pulp_host=pulp_host).get(page["next"])
+        yield from _walk_pages(cfg, next_page, pulp_host)
+        return
+    urls = [
+        urlunsplit(
+            next_url._replace(
+                query=urlencode([(key, offset if key == "offset" else val) for key, val in pairs])
+            )
+        )
+        for offset in range(int(query["offset"]), page["count"], int(query["limit"]))
+    ]
+    client = Client(cfg, json_handler, pulp_host=pulp_host)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for next_page in executor.map(client.get, urls):
+            yield next_page["results"]
+
+
 def echo_handler(client, response):
     """Immediately return ``response``."""
     logger.debug("response status: %s", response.status_code)
@@ -162,10 +310,10 @@ def json_handler(client, response):
     if response.status_code == 204:
         return response
     _handle_202(client._cfg, response, client.pulp_host)
-    return response.json()
+    return _decode_json(response)
 
 
-def page_handler(client, response):
+def page_handler(client, response, *, workers=None):
     """Call :meth:`json_handler`, optionally collect results, and return.
 
     Do the following:
@@ -177,6 +325,9 @@ def page_handler(client, response):
        results, and collect them into a single list. Otherwise, do nothing.
        Return either the list of results or the single decoded response.
 
+    :param workers: If given, fetch up to this many of the remaining pages
+        concurrently, instead of following ``next`` links one after another.
+        See :func:`parallel_page_handler`.
     :raises: ``ValueError`` if the target Pulp application under test is older
         than version 3 or at least version 4.
 
@@ -189,13 +340,104 @@ def page_handler(client, response):
     if "results" not in maybe_page:
         return maybe_page  # Content isn't a page.
 
+    if workers:
+        pages = _walk_pages_parallel(client._cfg, maybe_page, client.pulp_host, workers)
+    else:
+        pages = _walk_pages(client._cfg, maybe_page, client.pulp_host)
     collected_results = []
-    for result in _walk_pages(client._cfg, maybe_page, client.pulp_host):
+    for result in pages:
         collected_results.extend(result)
     logger.debug("paginated %s result pages", len(collected_results))
     return collected_results
 
 
+def parallel_page_handler(client, response):
+    """Like :meth:`page_handler`, but fetch pages concurrently.
+
+    After the first page is read, the remaining pages are fetched by up to
+    ``cfg.pool_size`` threads at once, through the client's shared session.
+    Results are returned in the same order as with :meth:`page_handler`.
+    """
+    return page_handler(client, response, workers=client._cfg.pool_size)
+
+
+class PageIterator:
+    """An iterable over the results of a paginated response.
+
+    Pages are fetched lazily, as the results are iterated over, so that only
+    one page of results is held in memory at a time. Each iteration starts
+    over from the first page, which is kept in memory.
+
+    :param client: A :class:`Client`. The pages are fetched from the same host.
+    :param page: A dict. The JSON-decoded body of the first page.
+    """
+
+    def __init__(self, client, page):
+        """Initialize this object with needed instance attributes."""
+        self._client = client
+        self._page = page
+
+    @property
+    def count(self):
+        """Return the total number of results, as reported by the first page."""
+        return self._page["count"]
+
+    def __iter__(self):
+        """Yield each result, fetching each page as it's needed."""
+        for results in _walk_pages(self._client._cfg, self._page, self._client.pulp_host):
+            yield from results
+
+
+def page_iter_handler(client, response):
+    """Like :meth:`page_handler`, but return the results lazily.
+
+    Do the following:
+
+    1. If ``response`` has an HTTP No Content (204) `status code`_, return
+       ``response``.
+    2. Call :meth:`json_handler`.
+    3. If the response appears to be paginated, return a :class:`PageIterator`
+       over the results. Otherwise, return the single decoded response.
+
+    :raises: ``ValueError`` if the target Pulp application under test is older
+        than version 3 or at least version 4.
+
+    .. _status code: https://en.wikipedia.org/wiki/List_of_HTTP_status_codes
+    """
+    check_pulp3_restriction(client)
+    maybe_page = json_handler(client, response)
+    if not isinstance(maybe_page, dict):
+        return maybe_page  # HTTP 204 No Content
+    if "results" not in maybe_page:
+        return maybe_page  # Content isn't a page.
+    return PageIterator(client, maybe_page)
+
+
+def iter_pages(client, url, limit=None, params=None):
+    """Lazily iterate over the results of a paginated listing.
+
+    For example, to write a repository version's content to a file, one page
+    at a time:
+
+    >>> results = iter_pages(client, content_href, limit=1000)
+    >>> print("Writing {} units".format(results.count))
+    >>> for result in results:
+    ...     handle.write(json.dumps(result) + "\\n")
+
+    :param client: A :class:`Client`.
+    :param url: The URL of the listing.
+    :param limit: The number of results per page. If ``None``, Pulp's default
+        page size is used.
+    :param params: A dict of other parameters to send in the query string.
+    :returns: A :class:`PageIterator`. The first page has already been
+        fetched, so that ``count`` is known.
+    """
+    params = dict(params or {})
+    if limit is not None:
+        params["limit"] = limit
+    return client.using_handler(page_iter_handler).get(url, params=params)
+
+
 def task_handler(client, response):
     """Wait for tasks to complete and then collect resources.
 
@@ -203,7 +445,9 @@ def task_handler(client, response):
 
     1. Call :meth:`json_handler` to handle 202 and get call_report.
     2. Raise error if response is not a task.
-    3. Re-read the task by its _href to get the final state and metadata.
+    3. Take the task's final state and metadata from the polling done by
+       :meth:`json_handler`, or re-read the task by its href if it wasn't
+       polled.
     4. Return the task's created or updated resource or task final state.
 
     :raises: ``ValueError`` if the target Pulp application under test is older
@@ -240,8 +484,12 @@ def task_handler(client, response):
             "Response does not contains a task call_report: {}".format(response_dict)
         )
 
-    # Get the final state of the done task
-    done_task = client.using_handler(json_handler).get(response_dict["task"])
+    # Get the final state of the done task. It is normally already known.
+    for done_task in _handle_202(client._cfg, response, client.pulp_host):
+        if done_task.get("pulp_href") == response_dict["task"]:
+            break
+    else:
+        done_task = client.using_handler(json_handler).get(response_dict["task"])
 
     if response.request.method == "POST":
         # Task might have created new resources
@@ -279,6 +527,9 @@ def smart_handler(client, response):
     3. Return the response if it is not application/json type.
     4. Pass response through task_handler if is JSON 202 with 'task'.
     5. Pass response through page_handler if is JSON but not 202 with 'task'.
+
+    The response body is decoded once and each spawned task is polled once,
+    even though several handlers process the response.
     """
     # safe_handler Will raise_for_Status, handle 202 and pool tasks
     response = safe_handler(client, response)
@@ -295,7 +546,7 @@ def smart_handler(client, response):
         return response
 
     # We got JSON is that a task call report?
-    if response.status_code == 202 and "task" in response.json():
+    if response.status_code == 202 and "task" in _decode_json(response):
         logger.debug("Response is a task")
         return task_handler(client, response)
 
@@ -314,6 +565,11 @@ class Client:
     `Requests`_ functions lies in its configurable request and response
     handling mechanisms.
 
+    Requests are sent through a ``requests.Session``, available as the
+    ``session`` attribute. Every client that targets the same host shares the
+    same session, so connections are kept alive and reused across clients. See
+    :func:`close_sessions` and :func:`get_session_stats`.
+
     This class is flexible enough that it should be usable with any API, but
     certain defaults have been set to work well with `Pulp`_.
 
@@ -355,6 +611,8 @@ class Client:
     * :func:`pulp_smash.api.safe_handler`
     * :func:`pulp_smash.api.json_handler`
     * :func:`pulp_smash.api.page_handler`
+    * :func:`pulp_smash.api.parallel_page_handler`
+    * :func:`pulp_smash.api.page_iter_handler`
     * :func:`pulp_smash.api.task_handler`
     * :func:`pulp_smash.api.smart_handler`
 
@@ -514,10 +772,11 @@ class Client:
         self._cfg = cfg
         self.response_handler = response_handler or smart_handler
         self.pulp_host = pulp_host or self._cfg.get_hosts("api")[0]
-        self.request_kwargs = self._cfg.get_requests_kwargs(self.pulp_host)
-        self.request_kwargs["url"] = self._cfg.get_base_url(self.pulp_host)
+        self._context = self._cfg.get_request_context(self.pulp_host)
+        self.request_kwargs = dict(self._context.requests_kwargs, url=self._context.base_url)
         if request_kwargs:
             self.request_kwargs.update(request_kwargs)
+        self.session = _get_session(self._cfg, self.pulp_host)
         self._using_handler_cache = {}
         logger.debug("New %s", self)
 
@@ -605,14 +864,28 @@ class Client:
         """
         # The `self.request_kwargs` dict should *always* have a "url" argument.
         # This is enforced by `self.__init__`. This allows us to call the
-        # `requests.request` function and satisfy its signature:
+        # `requests.Session.request` method and satisfy its signature:
         #
         #     request(method, url, **kwargs)
         #
-        intended_host = self.pulp_host.hostname
+        request_kwargs = self._merge_request_kwargs(url, kwargs)
+        logger.debug("Making a %s request with %s", method, request_kwargs)
+        response = self.response_handler(self, self.session.request(method, **request_kwargs))
+        logger.debug("Finished %s request with response: %s", method, response)
+        return response
+
+    def _merge_request_kwargs(self, url, kwargs):
+        """Merge ``url`` and ``kwargs`` into a copy of ``self.request_kwargs``.
+
+        Warn if the resulting URL points to a host other than ``pulp_host``.
+        """
         request_kwargs = self.request_kwargs.copy()
         request_kwargs["url"] = urljoin(request_kwargs["url"], url)
         request_kwargs.update(kwargs)
+        # Most URLs are relative to the base URL, and needn't be parsed.
+        if request_kwargs["url"].startswith(self._context.base_url + "/"):
+            return request_kwargs
+        intended_host = self.pulp_host.hostname
         actual_host = urlparse(request_kwargs["url"]).hostname
         if intended_host != actual_host:
             warnings.warn(
@@ -625,10 +898,7 @@ class Client:
                 ),
                 RuntimeWarning,
             )
-        logger.debug("Making a %s request with %s", method, request_kwargs)
-        response = self.response_handler(self, requests.request(method, **request_kwargs))
-        logger.debug("Finished %s request with response: %s", method, response)
-        return response
+        return request_kwargs
 
 
 def poll_spawned_tasks(cfg, call_report, pulp_host=None):
@@ -674,44 +944,35 @@ def poll_task(cfg, href, pulp_host=None):
     response is received indicating that the task is complete, yield that
     response body and recursively poll each child task.
 
+    The time between polls is decided by the polling strategy declared in the
+    settings file. See :mod:`pulp_smash.polling`.
+
     :param cfg: A :class:`pulp_smash.config.PulpSmashConfig` object.
     :param href: The path to a task you'd like to monitor recursively.
     :param pulp_host: The host to poll. If ``None``, a host will automatically
         be selected by :class:`Client`.
     :returns: An generator yielding response bodies.
-    :raises pulp_smash.exceptions.TaskTimedOutError: If a task takes too
-        long to complete.
+    :raises pulp_smash.exceptions.TaskTimedOutError: If a task is ongoing
+        after ``cfg.timeout`` seconds.
     """
-    # Read the timeout in seconds from the cfg, and divide by the sleep_time
-    # to see how many times we query Pulp.
-    # An example: Assuming timeout = 1800s, and sleep_time = 0.3s
-    # 1800s/0.3s = 6000
-
-    sleep_time = _get_sleep_time(cfg)
-    poll_limit = int(cfg.timeout / sleep_time)
-    poll_counter = 0
+    if cfg.pulp_version < Version("3"):
+        task_end_states = _TASK_END_STATES
+    else:
+        task_end_states = _P3_TASK_END_STATES
     json_client = Client(cfg, json_handler, pulp_host=pulp_host)
-    logger.debug("Polling task %s with poll_limit %s", href, poll_limit)
-    while True:
-        task = json_client.get(href)
-        if cfg.pulp_version < Version("3"):
-            task_end_states = _TASK_END_STATES
-        else:
-            task_end_states = _P3_TASK_END_STATES
-        if task["state"] in task_end_states:
-            # This task has completed. Yield its final state, then recursively
-            # iterate through children and yield their final states.
-            yield task
-            if "spawned_tasks" in task:
-                for spawned_task in task["spawned_tasks"]:
-                    key = "_href" if cfg.pulp_version < Version("3") else "pulp_href"
-                    for descendant_tsk in poll_task(cfg, spawned_task[key], pulp_host):
-                        yield descendant_tsk
-            break
-        poll_counter += 1
-        if poll_counter > poll_limit:
-            raise exceptions.TaskTimedOutError(
-                "Task {} is ongoing after {} polls.".format(href, poll_limit)
-            )
-        logger.debug("Polling %s progress %s/%s", href, poll_counter, poll_limit)
-        sleep(sleep_time)
+    logger.debug("Polling task %s with timeout %ss", href, cfg.timeout)
+    task = polling.poll_until(
+        lambda: json_client.get(href),
+        lambda task: task["state"] in task_end_states,
+        cfg.timeout,
+        polling.get_strategy(cfg),
+        "Task {}".format(href),
+    )
+    # This task has completed. Yield its final state, then recursively
+    # iterate through children and yield their final states.
+    yield task
+    if "spawned_tasks" in task:
+        for spawned_task in task["spawned_tasks"]:
+            key = "_href" if cfg.pulp_version < Version("3") else "pulp_href"
+            for descendant_tsk in poll_task(cfg, spawned_task[key], pulp_host):
+                yield descendant_tsk
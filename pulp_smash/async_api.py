@@ -0,0 +1,420 @@
+# coding=utf-8
+"""An asyncio counterpart to :mod:`pulp_smash.api`.
+
+:class:`AsyncClient` behaves like :class:`pulp_smash.api.Client`, except that
+its request methods are coroutines. This makes it possible to drive many
+concurrent requests against a Pulp application from a single thread:
+
+>>> import asyncio
+>>> from pulp_smash import async_api, config
+>>> async def main(hrefs):
+...     client = async_api.AsyncClient(config.get_config())
+...     try:
+...         return await asyncio.gather(*(client.get(href) for href in hrefs))
+...     finally:
+...         await async_api.close_sessions()
+>>> repos = asyncio.run(main(repo_hrefs))
+
+Responses are read in full and converted to ``requests.Response`` objects
+before being handed to a response handler, so handlers may inspect them
+exactly as they would inspect responses returned by
+:class:`pulp_smash.api.Client`. This module provides a coroutine counterpart
+to each of the response handlers in :mod:`pulp_smash.api`.
+"""
+import asyncio
+import base64
+import functools
+import os
+import ssl
+import weakref
+
+import aiohttp
+import requests
+from packaging.version import Version
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from pulp_smash import api, exceptions, polling
+from pulp_smash.log import logger
+
+# This module reuses the private helpers of its synchronous counterpart.
+# pylint:disable=protected-access
+
+# A mapping between event loops and mappings between base URLs and
+# ``aiohttp.ClientSession`` objects. Used by ``_get_session``. aiohttp sessions
+# may only be used by the event loop they were created in.
+_SESSIONS = weakref.WeakKeyDictionary()
+
+
+def _get_session(cfg, pulp_host):
+    """Return the ``aiohttp.ClientSession`` used to talk to ``pulp_host``.
+
+    Every :class:`AsyncClient` running in the same event loop and targeting the
+    same base URL shares a session, and thus a connector. The connector holds
+    at most ``cfg.pool_size`` connections. Requests beyond that wait for a
+    connection to be released.
+    """
+    sessions = _SESSIONS.setdefault(asyncio.get_running_loop(), {})
+    base_url = cfg.get_base_url(pulp_host)
+    try:
+        return sessions[base_url]
+    except KeyError:
+        session = sessions[base_url] = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=cfg.pool_size),
+            cookie_jar=aiohttp.DummyCookieJar(),
+        )
+        logger.debug("New async session for %s with pool size %s", base_url, cfg.pool_size)
+        return session
+
+
+async def close_sessions():
+    """Close the sessions used by the running event loop.
+
+    Call this before the event loop is closed. For example, at the end of the
+    coroutine passed to ``asyncio.run``.
+    """
+    for session in _SESSIONS.pop(asyncio.get_running_loop(), {}).values():
+        await session.close()
+
+
+@functools.lru_cache()
+def _get_ssl_context(verify, cert):
+    """Return an SSL context for the Requests-style ``verify`` and ``cert``.
+
+    :param verify: Either a boolean, or the path to a CA bundle used to verify
+        certificates.
+    :param cert: Either ``None``, the path to a file holding a client
+        certificate and its key, or a tuple of paths to both.
+    """
+    if isinstance(verify, str):
+        context = ssl.create_default_context(cafile=verify)
+    else:
+        context = ssl.create_default_context()
+        if not verify:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+    if isinstance(cert, str):
+        context.load_cert_chain(cert)
+    elif cert:
+        context.load_cert_chain(*cert)
+    return context
+
+
+def _to_form_data(files, data):
+    """Translate Requests-style ``files`` and ``data`` to ``aiohttp.FormData``.
+
+    Each file may be a bytes-like object or a file object, or a tuple of a file
+    name, one of those objects and, optionally, a content type.
+    """
+    if data is not None and not isinstance(data, dict):
+        raise TypeError("When files are uploaded, data must be a dict, not {!r}".format(data))
+    form_data = aiohttp.FormData()
+    for name, value in (data or {}).items():
+        form_data.add_field(name, str(value))
+    for name, value in files.items() if isinstance(files, dict) else files:
+        if isinstance(value, (list, tuple)):
+            if len(value) > 3:
+                raise TypeError(
+                    "Per-file headers aren't supported by AsyncClient. Got: {!r}".format(value)
+                )
+            filename, content, content_type = (tuple(value) + (None,))[:3]
+        else:
+            content, content_type = value, None
+            filename = os.path.basename(getattr(value, "name", None) or name)
+        form_data.add_field(name, content, filename=filename, content_type=content_type)
+    return form_data
+
+
+def _to_aiohttp_kwargs(request_kwargs):
+    """Translate Requests-style keyword arguments to aiohttp-style ones.
+
+    The ``auth``, ``verify``, ``cert``, ``files`` and ``timeout`` arguments
+    are translated. Others, such as ``params``, ``json``, ``data`` and
+    ``headers``, are passed through unchanged.
+    """
+    kwargs = request_kwargs.copy()
+    auth = kwargs.pop("auth", None)
+    if isinstance(auth, (list, tuple)):
+        credentials = base64.b64encode("{}:{}".format(*auth).encode("latin1")).decode("ascii")
+        kwargs["headers"] = dict(kwargs.get("headers") or {})
+        kwargs["headers"].setdefault("Authorization", "Basic " + credentials)
+    elif auth is not None:
+        kwargs["auth"] = auth
+    verify = kwargs.pop("verify", True)
+    cert = kwargs.pop("cert", None)
+    if isinstance(cert, list):
+        cert = tuple(cert)
+    if cert:
+        kwargs["ssl"] = _get_ssl_context(verify, cert)
+    elif verify is False:
+        kwargs["ssl"] = False
+    elif isinstance(verify, str):
+        kwargs["ssl"] = _get_ssl_context(verify, None)
+    files = kwargs.pop("files", None)
+    if files:
+        kwargs["data"] = _to_form_data(files, kwargs.get("data"))
+    timeout = kwargs.pop("timeout", None)
+    if isinstance(timeout, (int, float)):
+        kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
+    elif timeout is not None:
+        kwargs["timeout"] = timeout
+    return kwargs
+
+
+def _to_requests_response(method, aio_response, content):
+    """Build a ``requests.Response`` out of an ``aiohttp.ClientResponse``.
+
+    :param method: The HTTP method of the request.
+    :param aio_response: The ``aiohttp.ClientResponse``.
+    :param content: The ``bytes`` read from ``aio_response``.
+    """
+    response = requests.Response()
+    response.status_code = aio_response.status
+    response.reason = aio_response.reason
+    response.headers = CaseInsensitiveDict(aio_response.headers)
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = str(aio_response.url)
+    response._content = content
+    response.request = requests.Request(method, str(aio_response.request_info.url)).prepare()
+    return response
+
+
+async def _send(session, method, request_kwargs):
+    """Send an HTTP request, and return a ``requests.Response``."""
+    kwargs = _to_aiohttp_kwargs(request_kwargs)
+    url = kwargs.pop("url")
+    async with session.request(method, url, **kwargs) as aio_response:
+        content = await aio_response.read()
+    return _to_requests_response(method, aio_response, content)
+
+
+async def _walk_pages(cfg, page, pulp_host):
+    """Walk through pages, yielding the "results" in each page."""
+    client = AsyncClient(cfg, json_handler, pulp_host=pulp_host)
+    while True:
+        yield page["results"]
+        if page["next"]:
+            page = await client.get(page["next"])
+        else:
+            break
+
+
+async def _handle_202(cfg, response, pulp_host):
+    """Like :func:`pulp_smash.api._handle_202`, but poll tasks asynchronously."""
+    if response.status_code != 202:  # "Accepted"
+        return ()
+    try:
+        return vars(response)["_pulp_smash_tasks"]
+    except KeyError:
+        pass
+    api._check_http_202_content_type(response)
+    call_report = api._decode_json(response)
+    tasks = vars(response)["_pulp_smash_tasks"] = tuple(
+        [task async for task in poll_spawned_tasks(cfg, call_report, pulp_host)]
+    )
+    api._check_spawned_tasks(cfg, call_report, tasks)
+    return tasks
+
+
+async def echo_handler(client, response):
+    """Like :func:`pulp_smash.api.echo_handler`."""
+    return api.echo_handler(client, response)
+
+
+async def code_handler(client, response):
+    """Like :func:`pulp_smash.api.code_handler`."""
+    return api.code_handler(client, response)
+
+
+async def safe_handler(client, response):
+    """Like :func:`pulp_smash.api.safe_handler`."""
+    response.raise_for_status()
+    logger.debug("response status: %s", response.status_code)
+    await _handle_202(client._cfg, response, client.pulp_host)
+    return response
+
+
+async def json_handler(client, response):
+    """Like :func:`pulp_smash.api.json_handler`."""
+    response.raise_for_status()
+    logger.debug("response status: %s", response.status_code)
+    if response.status_code == 204:
+        return response
+    await _handle_202(client._cfg, response, client.pulp_host)
+    return api._decode_json(response)
+
+
+async def page_handler(client, response):
+    """Like :func:`pulp_smash.api.page_handler`."""
+    api.check_pulp3_restriction(client)
+    maybe_page = await json_handler(client, response)
+    if not isinstance(maybe_page, dict):
+        return maybe_page  # HTTP 204 No Content
+    if "results" not in maybe_page:
+        return maybe_page  # Content isn't a page.
+
+    collected_results = []
+    async for result in _walk_pages(client._cfg, maybe_page, client.pulp_host):
+        collected_results.extend(result)
+    logger.debug("paginated %s result pages", len(collected_results))
+    return collected_results
+
+
+async def task_handler(client, response):
+    """Like :func:`pulp_smash.api.task_handler`.
+
+    When a task creates several resources, they are fetched concurrently.
+    """
+    api.check_pulp3_restriction(client)
+    response_dict = await json_handler(client, response)
+    if "task" not in response_dict:
+        raise exceptions.CallReportError(
+            "Response does not contains a task call_report: {}".format(response_dict)
+        )
+
+    for done_task in await _handle_202(client._cfg, response, client.pulp_host):
+        if done_task.get("pulp_href") == response_dict["task"]:
+            break
+    else:
+        done_task = await client.using_handler(json_handler).get(response_dict["task"])
+
+    if response.request.method == "POST":
+        if "created_resources" in done_task:
+            created = done_task["created_resources"]
+            logger.debug("Task created resources: %s", created)
+            json_client = client.using_handler(json_handler)
+            if len(created) == 1:
+                return await json_client.get(created[0])
+            if len(created) > 1:
+                return list(await asyncio.gather(*(json_client.get(href) for href in created)))
+        else:
+            return []
+
+    if response.request.method in ["PUT", "PATCH"]:
+        logger.debug("Task updated resource: %s", response.request.url)
+        return await client.using_handler(json_handler).get(response.request.url)
+
+    logger.debug("Task finished: %s", done_task)
+    return done_task
+
+
+async def smart_handler(client, response):
+    """Like :func:`pulp_smash.api.smart_handler`."""
+    response = await safe_handler(client, response)
+
+    try:
+        api.check_pulp3_restriction(client)
+    except ValueError:
+        return response
+
+    if response.headers.get("Content-Type") != "application/json":
+        logger.debug("Response is not JSON")
+        return response
+
+    if response.status_code == 202 and "task" in api._decode_json(response):
+        logger.debug("Response is a task")
+        return await task_handler(client, response)
+
+    logger.debug("Response is a JSON")
+    return await page_handler(client, response)
+
+
+class AsyncClient(api.Client):
+    """Like :class:`pulp_smash.api.Client`, but for use with asyncio.
+
+    The request methods, such as :meth:`get` and :meth:`post`, return
+    coroutines. Response handlers must be coroutine functions too. They
+    default to :func:`smart_handler`.
+
+    Requests are sent through an ``aiohttp.ClientSession``, available as the
+    ``session`` attribute. Every client running in the same event loop and
+    targeting the same host shares the same session. See
+    :func:`close_sessions`.
+
+    Requests-style keyword arguments, like ``auth`` and ``verify``, are
+    translated to their aiohttp equivalents.
+    """
+
+    def __init__(self, cfg, response_handler=None, request_kwargs=None, pulp_host=None):
+        """Initialize this object with needed instance attributes."""
+        self._cfg = cfg
+        self.response_handler = response_handler or smart_handler
+        self.pulp_host = pulp_host or self._cfg.get_hosts("api")[0]
+        self._context = self._cfg.get_request_context(self.pulp_host)
+        self.request_kwargs = dict(self._context.requests_kwargs, url=self._context.base_url)
+        if request_kwargs:
+            self.request_kwargs.update(request_kwargs)
+        self._using_handler_cache = {}
+        logger.debug("New %s", self)
+
+    def __str__(self):
+        """Client str representation."""
+        client_spec = {
+            "response_handler": self.response_handler,
+            "host": self.pulp_host,
+            "cfg": repr(self._cfg),
+        }
+        return "<async_api.AsyncClient(%s)>" % client_spec
+
+    @property
+    def session(self):
+        """Return the session used by the running event loop."""
+        return _get_session(self._cfg, self.pulp_host)
+
+    async def request(self, method, url, **kwargs):
+        """Send an HTTP request.
+
+        Arguments passed directly in to this method override (but do not
+        overwrite!) arguments specified in ``self.request_kwargs``.
+        """
+        request_kwargs = self._merge_request_kwargs(url, kwargs)
+        logger.debug("Making a %s request with %s", method, request_kwargs)
+        response = await self.response_handler(
+            self, await _send(self.session, method, request_kwargs)
+        )
+        logger.debug("Finished %s request with response: %s", method, response)
+        return response
+
+
+async def poll_spawned_tasks(cfg, call_report, pulp_host=None):
+    """Like :func:`pulp_smash.api.poll_spawned_tasks`, but asynchronous.
+
+    :returns: An asynchronous generator yielding task bodies.
+    """
+    if cfg.pulp_version < Version("3"):
+        hrefs = [task["_href"] for task in call_report["spawned_tasks"]]
+    else:
+        hrefs = [call_report["task"]]
+    for href in hrefs:
+        async for final_task_state in poll_task(cfg, href, pulp_host):
+            yield final_task_state
+
+
+async def poll_task(cfg, href, pulp_host=None):
+    """Like :func:`pulp_smash.api.poll_task`, but asynchronous.
+
+    Sleeping between polls doesn't block the event loop.
+
+    :returns: An asynchronous generator yielding response bodies.
+    :raises pulp_smash.exceptions.TaskTimedOutError: If a task is ongoing
+        after ``cfg.timeout`` seconds.
+    """
+    if cfg.pulp_version < Version("3"):
+        task_end_states = api._TASK_END_STATES
+    else:
+        task_end_states = api._P3_TASK_END_STATES
+    json_client = AsyncClient(cfg, json_handler, pulp_host=pulp_host)
+    logger.debug("Polling task %s with timeout %ss", href, cfg.timeout)
+    task = await polling.async_poll_until(
+        lambda: json_client.get(href),
+        lambda task: task["state"] in task_end_states,
+        cfg.timeout,
+        polling.get_strategy(cfg),
+        "Task {}".format(href),
+    )
+    yield task
+    if "spawned_tasks" in task:
+        for spawned_task in task["spawned_tasks"]:
+            key = "_href" if cfg.pulp_version < Version("3") else "pulp_href"
+            async for descendant_tsk in poll_task(cfg, spawned_task[key], pulp_host):
+                yield descendant_tsk
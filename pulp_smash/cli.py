@@ -1,30 +1,263 @@
 # coding=utf-8
 """A client for working with Pulp hosts via their CLI."""
+import atexit
 import collections
 import contextlib
 import json
 import os
+import shlex
 import socket
+import threading
+import time
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from functools import partialmethod
 from urllib.parse import urlsplit, urlunsplit
 
 import plumbum
 from packaging.version import Version
+from plumbum.machines.session import ShellSession
+from xdg import BaseDirectory
 
 from pulp_smash import exceptions
 from pulp_smash.log import logger
 
 
-# A dict mapping hostnames to *nix service managers.
-#
-# For example: {'old.example.com': 'sysv', 'new.example.com', 'systemd'}
-_SERVICE_MANAGERS = {}
+# A dict mapping host keys to the facts returned by get_host_facts(). See
+# Client.host_key.
+_HOST_FACTS = {}
+
+# A shell script printing facts about a host, as "name=value" lines. A fact
+# which can't be determined isn't printed.
+_HOST_FACTS_SCRIPT = """
+echo "uid=$(id -u)"
+(. /etc/os-release && echo "os_release_id=$ID" && echo "os_release_version_id=$VERSION_ID")
+if command -v s6-rc >/dev/null || test -x /bin/s6-rc; then echo service_manager=s6
+elif command -v systemctl >/dev/null; then echo service_manager=systemd
+elif command -v service >/dev/null || test -x /sbin/service; then echo service_manager=sysv
+fi
+if command -v dnf >/dev/null; then echo package_manager=dnf
+elif command -v yum >/dev/null; then echo package_manager=yum
+fi
+if command -v podman >/dev/null; then echo registry_client=podman
+elif command -v docker >/dev/null; then echo registry_client=docker
+fi
+fips=$(sysctl --values crypto.fips_enabled 2>/dev/null) && echo "fips_enabled=$fips"
+squid=$(squid -v 2>/dev/null | head -n 1) && test -n "$squid" && echo "squid=$squid"
+true
+"""
+
+HOST_FACTS = (
+    "uid",
+    "os_release_id",
+    "os_release_version_id",
+    "service_manager",
+    "package_manager",
+    "registry_client",
+    "fips_enabled",
+    "squid",
+)
+"""The facts returned by :func:`get_host_facts`."""
+
+
+def get_host_facts(cfg, pulp_host=None):
+    """Return facts about a host, gathered with a single command.
+
+    The facts are gathered the first time a host is asked about, and then
+    reused for the rest of the process. A host reached in different ways, such
+    as locally and through a container, is asked about once per way. See
+    :attr:`Client.host_key`. The facts are:
+
+    ``uid``
+        The ID of the user commands run as, such as "0".
+    ``os_release_id`` and ``os_release_version_id``
+        ``ID`` and ``VERSION_ID`` from ``/etc/os-release``, such as "fedora"
+        and "27".
+    ``service_manager``
+        One of "s6", "systemd" or "sysv".
+    ``package_manager``
+        One of "dnf" or "yum".
+    ``registry_client``
+        One of "podman" or "docker".
+    ``fips_enabled``
+        The value of the ``crypto.fips_enabled`` kernel parameter, such as "1".
+    ``squid``
+        The first line printed by ``squid -v``.
 
-# A dict mapping hostnames to *nix package managers.
-#
-# For example: {'old.example.com': 'yum', 'new.example.com', 'yum'}
-_PACKAGE_MANAGERS = {}
+    :param pulp_smash.config.PulpSmashConfig cfg: Information about a Pulp
+        application.
+    :param pulp_smash.config.PulpHost pulp_host: A specific host to target,
+        instead of the default chosen by :class:`pulp_smash.cli.Client`.
+    :returns: A dict mapping each of :data:`HOST_FACTS` to a string, or to
+        ``None`` if the fact couldn't be determined.
+    """
+    client = Client(cfg, echo_handler, pulp_host=pulp_host)
+    key = client.host_key
+    if key not in _HOST_FACTS:
+        facts = dict.fromkeys(HOST_FACTS)
+        for line in client.run(("sh", "-c", _HOST_FACTS_SCRIPT)).stdout.splitlines():
+            name, sep, value = line.partition("=")
+            if sep and name in facts:
+                facts[name] = value.strip()
+        logger.debug("Facts about %s: %s", key, facts)
+        _HOST_FACTS[key] = facts
+    return _HOST_FACTS[key]
+
+
+# A dict mapping hostnames to plumbum SSH machines. Used by get_ssh_machine().
+_SSH_MACHINES = {}
+_SSH_MACHINES_LOCK = threading.Lock()
+
+
+def _get_ssh_options():
+    """Return options which make SSH multiplex commands over one connection.
+
+    The first ``ssh`` process started for a host becomes the master, and later
+    ones reuse its connection, which skips the SSH handshake. The master
+    outlives the process that started it for a minute, so that consecutive
+    test runs also benefit.
+    """
+    control_path = os.path.join(BaseDirectory.save_cache_path("pulp_smash"), "ssh-%C")
+    return (
+        "-o",
+        "ControlMaster=auto",
+        "-o",
+        "ControlPath={}".format(control_path),
+        "-o",
+        "ControlPersist=60",
+    )
+
+
+def _ssh_machine_is_alive(machine):
+    """Tell whether the persistent shell session of ``machine`` is alive."""
+    # A closed machine's session has no alive() method.
+    alive = getattr(machine._session, "alive", None)  # pylint:disable=protected-access
+    return bool(alive and alive())
+
+
+def get_ssh_machine(hostname):
+    """Return a plumbum SSH machine targeting ``hostname``.
+
+    Machines are shared process-wide, one per host, so that clients don't
+    each open their own SSH sessions. A machine whose session has died is
+    replaced with a new one. See :func:`close_ssh_machines`.
+
+    :param hostname: The host to connect to. ``~/.ssh/config`` applies.
+    :returns: A ``plumbum.machines.SshMachine``.
+    """
+    with _SSH_MACHINES_LOCK:
+        machine = _SSH_MACHINES.get(hostname)
+        if machine is not None and not _ssh_machine_is_alive(machine):
+            logger.debug("SSH session to %s died, reconnecting", hostname)
+            with contextlib.suppress(Exception):
+                machine.close()
+            machine = None
+        if machine is None:
+            # The SshMachine is a wrapper around the host's "ssh" binary.
+            # Thus, it uses ~/.ssh/config, ~/.ssh/known_hosts, etc.
+            machine = plumbum.machines.SshMachine(hostname, ssh_opts=_get_ssh_options())
+            _SSH_MACHINES[hostname] = machine
+        return machine
+
+
+# The number of seconds for which a discovered kubectl pod name is used, before
+# it is discovered again.
+_POD_NAME_TTL = 5 * 60
+
+# A dict mapping hostnames to (pod name, discovery time) tuples. Used by
+# _get_kubectl_podname().
+_POD_NAMES = {}
+
+# A dict mapping (transport, container or pod name) tuples to plumbum shell
+# sessions. Used by get_exec_session().
+_EXEC_SESSIONS = {}
+_EXEC_SESSIONS_LOCK = threading.Lock()
+
+# The transports which execute commands inside a container or pod.
+_CONTAINER_TRANSPORTS = ("kubectl", "docker", "podman")
+
+
+def _get_kubectl_podname(machine, hostname):
+    """Return the name of the pod running the Pulp API on ``hostname``.
+
+    The name is discovered with ``kubectl get pods``, and then reused for
+    :data:`_POD_NAME_TTL` seconds.
+    """
+    entry = _POD_NAMES.get(hostname)
+    if entry is None or time.monotonic() - entry[1] >= _POD_NAME_TTL:
+        chain = (
+            machine["sudo"]["kubectl", "get", "pods"]
+            | machine["grep"]["-E", "-o", r"pulp-api-(\w+)-(\w+)"]
+        )
+        entry = (chain().replace("\n", ""), time.monotonic())
+        _POD_NAMES[hostname] = entry
+    return entry[0]
+
+
+def get_exec_session(machine, transport, podname):
+    """Return a shell session running inside a container or pod.
+
+    Sessions are shared process-wide, one per container or pod. Commands run
+    through a session are written to the standard input of one long-lived
+    ``docker exec``, ``podman exec`` or ``kubectl exec`` process. plumbum
+    frames each command's output with markers, so that its stdout, stderr and
+    exit code can be told apart. A session which has died is replaced with a
+    new one. See :func:`close_exec_sessions`.
+
+    :param machine: The plumbum machine on which the container runtime or
+        ``kubectl`` runs.
+    :param transport: One of "docker", "podman" or "kubectl".
+    :param podname: The name of the container or pod.
+    :returns: A ``plumbum.machines.session.ShellSession``.
+    """
+    key = (transport, podname)
+    with _EXEC_SESSIONS_LOCK:
+        session = _EXEC_SESSIONS.get(key)
+        if session is not None and not session.alive():
+            logger.debug("Shell session in %s died, restarting", key)
+            with contextlib.suppress(Exception):
+                session.close()
+            session = None
+        if session is None:
+            if transport == "kubectl":
+                args = ("sudo", "kubectl", "exec", "-i", podname, "--", "sh")
+            elif transport == "docker":
+                args = ("sudo", "docker", "exec", "-i", podname, "sh")
+            else:
+                args = ("podman", "exec", "-i", podname, "sh")
+            session = ShellSession(machine[args[0]][args[1:]].popen())
+            _EXEC_SESSIONS[key] = session
+        return session
+
+
+@atexit.register
+def close_exec_sessions():
+    """Close the shell sessions returned by :func:`get_exec_session`.
+
+    This is done automatically when the interpreter exits.
+
+    :returns: Nothing.
+    """
+    with _EXEC_SESSIONS_LOCK:
+        while _EXEC_SESSIONS:
+            _, session = _EXEC_SESSIONS.popitem()
+            with contextlib.suppress(Exception):
+                session.close()
+
+
+@atexit.register
+def close_ssh_machines():
+    """Close the SSH machines returned by :func:`get_ssh_machine`.
+
+    This is done automatically when the interpreter exits.
+
+    :returns: Nothing.
+    """
+    with _SSH_MACHINES_LOCK:
+        while _SSH_MACHINES:
+            _, machine = _SSH_MACHINES.popitem()
+            with contextlib.suppress(Exception):
+                machine.close()
 
 
 def is_root(cfg, pulp_host=None):
@@ -36,7 +269,7 @@ def is_root(cfg, pulp_host=None):
         instead of the first host with the ``pulp cli`` role.
     :returns: Either ``True`` or ``False``.
     """
-    return (Client(cfg, pulp_host=pulp_host).run(("id", "-u")).stdout.strip()) == "0"
+    return get_host_facts(cfg, pulp_host)["uid"] == "0"
 
 
 def echo_handler(completed_proc):
@@ -229,27 +462,39 @@ class Client:  # pylint:disable=too-few-public-methods
                 self._transport = "local" if hostname == socket.getfqdn() else "ssh"
         return self._transport
 
+    @property
+    def host_key(self):
+        """Return a hashable key identifying where commands run.
+
+        Hosts sharing a hostname may be reached in different ways, such as
+        locally and through a container. The key tells them apart, and is
+        used by the caches of per-host information.
+        """
+        container = None
+        if self.transport in ["docker", "podman"]:
+            container = self.pulp_host.roles.get("shell", {}).get("container", "pulp")
+        return (self.pulp_host.hostname, self.transport, container)
+
     @property
     def machine(self):
-        """Initialize the plumbum machine lazily."""
+        """Initialize the plumbum machine lazily.
+
+        SSH machines are shared between clients. See :func:`get_ssh_machine`.
+        """
+        if self._machine is not None and self.transport == "ssh":
+            if not _ssh_machine_is_alive(self._machine):
+                self._machine = None
         if self._machine is None:
             if self.transport == "local":
                 self._machine = plumbum.machines.local
             elif self.transport == "kubectl":
                 self._machine = plumbum.machines.local
-                chain = (
-                    self._machine["sudo"]["kubectl", "get", "pods"]
-                    | self._machine["grep"]["-E", "-o", r"pulp-api-(\w+)-(\w+)"]
-                )
-                self._podname = chain().replace("\n", "")
+                self._podname = _get_kubectl_podname(self._machine, self.pulp_host.hostname)
             elif self.transport in ["docker", "podman"]:
                 self._machine = plumbum.machines.local
                 self._podname = self.pulp_host.roles.get("shell", {}).get("container", "pulp")
             elif self.transport == "ssh":
-                # The SshMachine is a wrapper around the host's "ssh" binary.
-                # Thus, it uses ~/.ssh/config, ~/.ssh/known_hosts, etc.
-                hostname = self.pulp_host.hostname
-                self._machine = plumbum.machines.SshMachine(hostname)
+                self._machine = get_ssh_machine(self.pulp_host.hostname)
             else:
                 raise NotImplementedError(
                     "Transport ({}) is not implemented.".format(self.transport)
@@ -257,6 +502,17 @@ class Client:  # pylint:disable=too-few-public-methods
             logger.debug("Initialized plumbum machine %s", self._machine)
         return self._machine
 
+    @property
+    def _uses_exec_session(self):
+        """Tell whether commands are run through a persistent shell session.
+
+        This is opted into with the "persistent session" key of the shell role,
+        and only applies to the transports which run commands in a container.
+        """
+        return self.transport in _CONTAINER_TRANSPORTS and bool(
+            self.pulp_host.roles.get("shell", {}).get("persistent session")
+        )
+
     @property
     def is_superuser(self):
         """Check if the current client is root.
@@ -301,22 +557,29 @@ class Client:  # pylint:disable=too-few-public-methods
             self.machine
 
         # sudo is not needed inside a container. It might not even be available.
-        if self.transport in ["kubectl", "docker", "podman"] and args[0] == "sudo":
+        if self.transport in _CONTAINER_TRANSPORTS and args[0] == "sudo":
             args = args[1:]
 
-        if self.transport == "kubectl":
-            args = ("sudo", "kubectl", "exec", self._podname, "--") + tuple(args)
-        elif self.transport == "docker":
-            args = ("docker", "exec", "-i", self._podname) + tuple(args)
-        elif self.transport == "podman":
-            args = ("podman", "exec", "-i", self._podname) + tuple(args)
-
-        # docker still requires some commands to be executed as sudo; running docker without
-        # sudo in a rootless mode is supported as of 19.03.14
-        if sudo and args[0] != "sudo" and not self.is_superuser or self.transport == "docker":
-            args = ("sudo",) + tuple(args)
-
-        code, stdout, stderr = self.machine[args[0]].run(args[1:], **kwargs)
+        # Only the exit code may be checked by a session. Other plumbum
+        # options, such as timeouts, require a process of their own.
+        if self._uses_exec_session and set(kwargs) == {"retcode"}:
+            session = get_exec_session(self.machine, self.transport, self._podname)
+            command = " ".join(shlex.quote(str(arg)) for arg in args)
+            code, stdout, stderr = session.run(command, retcode=kwargs["retcode"])
+        else:
+            if self.transport == "kubectl":
+                args = ("sudo", "kubectl", "exec", self._podname, "--") + tuple(args)
+            elif self.transport == "docker":
+                args = ("docker", "exec", "-i", self._podname) + tuple(args)
+            elif self.transport == "podman":
+                args = ("podman", "exec", "-i", self._podname) + tuple(args)
+
+            # docker still requires some commands to be executed as sudo; running docker without
+            # sudo in a rootless mode is supported as of 19.03.14
+            if sudo and args[0] != "sudo" and not self.is_superuser or self.transport == "docker":
+                args = ("sudo",) + tuple(args)
+
+            code, stdout, stderr = self.machine[args[0]].run(args[1:], **kwargs)
         completed_process = CompletedProcess(args, code, stdout, stderr)
         logger.debug("Finished %s command: %s", args, (code, stdout, stderr))
         return self.response_handler(completed_process)
@@ -351,30 +614,13 @@ class BaseServiceManager(metaclass=ABCMeta):
         Return "systemd" or "sysv" if the service manager appears to be one of
         those. Raise an exception otherwise.
         """
-        try:
-            return _SERVICE_MANAGERS[pulp_host.hostname]
-        except KeyError:
-            pass
-
-        client = Client(cfg, echo_handler, pulp_host=pulp_host)
-        commands_managers = (
-            ("which s6-rc", "s6"),
-            ("test -x /bin/s6-rc", "s6"),
-            ("which systemctl", "systemd"),
-            ("which service", "sysv"),
-            ("test -x /sbin/service", "sysv"),
-        )
-        for command, service_manager in commands_managers:
-            if client.run(command.split()).returncode == 0:
-                _SERVICE_MANAGERS[pulp_host.hostname] = service_manager
-                return service_manager
-        raise exceptions.NoKnownServiceManagerError(
-            "Unable to determine the service manager used by {}. It does not "
-            "appear to be any of {}.".format(
-                pulp_host.hostname,
-                {manager for _, manager in commands_managers},
+        service_manager = get_host_facts(cfg, pulp_host)["service_manager"]
+        if service_manager is None:
+            raise exceptions.NoKnownServiceManagerError(
+                "Unable to determine the service manager used by {}. It does not "
+                "appear to be any of {}.".format(pulp_host.hostname, {"s6", "systemd", "sysv"})
             )
-        )
+        return service_manager
 
     @contextlib.contextmanager
     def _disable_selinux(self, client):
@@ -527,24 +773,103 @@ class GlobalServiceManager(BaseServiceManager):
     :class:`pulp_smash.cli.GlobalServiceManager` are necessary, see
     :class:`pulp_smash.config.PulpSmashConfig`.
 
+    Hosts are acted upon concurrently, by at most ``max_workers`` threads. To
+    act upon some hosts before others, pass ``waves``: an ordered list of sets
+    of roles. Each host is acted upon in the first wave naming one of its
+    roles, and hosts named by no wave are acted upon last. Each wave starts
+    after the previous one finishes. For example, to restart services on
+    brokers first:
+
+    >>> svc_mgr = cli.GlobalServiceManager(cfg, waves=[{'amqp broker', 'redis'}])
+    >>> svc_mgr.restart(['qpidd', 'httpd', 'pulp_workers'])
+
     :param pulp_smash.config.PulpSmashConfig cfg: Information about the Pulp
         deployment.
+    :param max_workers: The maximum number of hosts to act upon at once.
+        Defaults to ``cfg.pool_size``.
+    :param waves: An ordered list of sets of roles, as described above.
+    :param return_exceptions: If true, an exception raised while acting upon a
+        host is returned in place of that host's results. If false, the first
+        such exception is raised after all hosts of the wave are done, and
+        later waves are skipped.
     :raises pulp_smash.exceptions.NoKnownServiceManagerError: If unable to find
         any service manager on one of the target hosts.
     """
 
-    def __init__(self, cfg):
+    def __init__(self, cfg, *, max_workers=None, waves=(), return_exceptions=False):
         """Initialize a GlobalServiceManager object."""
         super().__init__()
         self._cfg = cfg
         self._client_cache = {}
+        self._max_workers = max_workers or cfg.pool_size
+        self._waves = [set(roles) for roles in waves]
+        self._return_exceptions = return_exceptions
 
     def get_client(self, pulp_host, **kwargs):
         """Get an already instantiated client from cache."""
-        return self._client_cache.setdefault(
-            pulp_host.hostname,
-            Client(self._cfg, pulp_host=pulp_host, **kwargs),
-        )
+        if pulp_host.hostname not in self._client_cache:
+            client = Client(self._cfg, pulp_host=pulp_host, **kwargs)
+            self._client_cache.setdefault(pulp_host.hostname, client)
+        return self._client_cache[pulp_host.hostname]
+
+    def _get_waves(self, hosts):
+        """Split ``hosts`` into lists of hosts to act upon one after another."""
+        waves = [[] for _ in range(len(self._waves) + 1)]
+        for host in hosts:
+            index = next(
+                (i for i, roles in enumerate(self._waves) if roles.intersection(host.roles)),
+                len(self._waves),
+            )
+            waves[index].append(host)
+        return [wave for wave in waves if wave]
+
+    def _act_on_host(self, action, host, services):
+        """Execute ``action`` upon ``services`` on ``host``.
+
+        :param action: One of "start", "stop", "restart" or "is_active".
+        """
+        client = self.get_client(pulp_host=host)
+        svc_mgr = self._get_service_manager(self._cfg, host)
+        if svc_mgr not in ("sysv", "systemd", "s6"):
+            raise NotImplementedError(
+                'Service manager "{}" not supported on "{}"'.format(svc_mgr, host.hostname)
+            )
+        method = getattr(self, "_{}_{}".format(action, svc_mgr))
+        if svc_mgr == "sysv":
+            with self._disable_selinux(client):
+                return method(client, services)
+        return method(client, services)
+
+    def _act(self, action, services):
+        """Execute ``action`` upon ``services`` on every host that has them.
+
+        :return: A dict mapping the affected hosts' hostnames with the results
+            of ``action``, or with exceptions if ``return_exceptions`` is set.
+        """
+        services = set(services)
+        hosts = [
+            host
+            for host in self._cfg.hosts
+            if services.intersection(self._cfg.get_services(host.roles))
+        ]
+        result = {}
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            for wave in self._get_waves(hosts):
+                futures = {
+                    host.hostname: executor.submit(self._act_on_host, action, host, services)
+                    for host in wave
+                }
+                errors = []
+                for hostname, future in futures.items():
+                    try:
+                        result[hostname] = future.result()
+                    except Exception as err:  # pylint:disable=broad-except
+                        if not self._return_exceptions:
+                            errors.append(err)
+                        result[hostname] = err
+                if errors:
+                    raise errors[0]
+        return result
 
     def start(self, services):
         """Start the services on every host that has the services.
@@ -553,25 +878,7 @@ class GlobalServiceManager(BaseServiceManager):
         :return: A dict mapping the affected hosts' hostnames with a list of
             :class:`pulp_smash.cli.CompletedProcess` objects.
         """
-        services = set(services)
-        result = {}
-        for host in self._cfg.hosts:
-            intersection = services.intersection(self._cfg.get_services(host.roles))
-            if intersection:
-                client = self.get_client(pulp_host=host)
-                svc_mgr = self._get_service_manager(self._cfg, host)
-                if svc_mgr == "sysv":
-                    with self._disable_selinux(client):
-                        result[host.hostname] = self._start_sysv(client, services)
-                elif svc_mgr == "systemd":
-                    result[host.hostname] = self._start_systemd(client, services)
-                elif svc_mgr == "s6":
-                    result[host.hostname] = self._start_s6(client, services)
-                else:
-                    raise NotImplementedError(
-                        'Service manager "{}" not supported on "{}"'.format(svc_mgr, host.hostname)
-                    )
-        return result
+        return self._act("start", services)
 
     def stop(self, services):
         """Stop the services on every host that has the services.
@@ -580,23 +887,7 @@ class GlobalServiceManager(BaseServiceManager):
         :return: A dict mapping the affected hosts' hostnames with a list of
             :class:`pulp_smash.cli.CompletedProcess` objects.
         """
-        services = set(services)
-        result = {}
-        for host in self._cfg.hosts:
-            intersection = services.intersection(self._cfg.get_services(host.roles))
-            if intersection:
-                client = self.get_client(pulp_host=host)
-                svc_mgr = self._get_service_manager(self._cfg, host)
-                if svc_mgr == "sysv":
-                    with self._disable_selinux(client):
-                        result[host.hostname] = self._stop_sysv(client, services)
-                elif svc_mgr == "systemd":
-                    result[host.hostname] = self._stop_systemd(client, services)
-                elif svc_mgr == "s6":
-                    result[host.hostname] = self._stop_s6(client, services)
-                else:
-                    raise NotImplementedError("Service manager not supported: {}".format(svc_mgr))
-        return result
+        return self._act("stop", services)
 
     def restart(self, services):
         """Restart the services on every host that has the services.
@@ -605,23 +896,7 @@ class GlobalServiceManager(BaseServiceManager):
         :return: A dict mapping the affected hosts' hostnames with a list of
             :class:`pulp_smash.cli.CompletedProcess` objects.
         """
-        services = set(services)
-        result = {}
-        for host in self._cfg.hosts:
-            intersection = services.intersection(self._cfg.get_services(host.roles))
-            if intersection:
-                client = self.get_client(pulp_host=host)
-                svc_mgr = self._get_service_manager(self._cfg, host)
-                if svc_mgr == "sysv":
-                    with self._disable_selinux(client):
-                        result[host.hostname] = self._restart_sysv(client, services)
-                elif svc_mgr == "systemd":
-                    result[host.hostname] = self._restart_systemd(client, services)
-                elif svc_mgr == "s6":
-                    result[host.hostname] = self._restart_s6(client, services)
-                else:
-                    raise NotImplementedError("Service manager not supported: {}".format(svc_mgr))
-        return result
+        return self._act("restart", services)
 
     def is_active(self, services):
         """Check whether given services are active.
@@ -629,23 +904,7 @@ class GlobalServiceManager(BaseServiceManager):
         :param services: A list or tuple of services to check.
         :return: boolean
         """
-        services = set(services)
-        result = {}
-        for host in self._cfg.hosts:
-            intersection = services.intersection(self._cfg.get_services(host.roles))
-            if intersection:
-                client = self.get_client(pulp_host=host)
-                svc_mgr = self._get_service_manager(self._cfg, host)
-                if svc_mgr == "sysv":
-                    with self._disable_selinux(client):
-                        result[host.hostname] = self._is_active_sysv(client, services)
-                elif svc_mgr == "systemd":
-                    result[host.hostname] = self._is_active_systemd(client, services)
-                elif svc_mgr == "s6":
-                    result[host.hostname] = self._is_active_s6(client, services)
-                else:
-                    raise NotImplementedError("Service manager not supported: {}".format(svc_mgr))
-        return result
+        return self._act("is_active", services)
 
 
 class ServiceManager(BaseServiceManager):
@@ -837,25 +1096,15 @@ class PackageManager:
         :raises pulp_smash.exceptions.NoKnownPackageManagerError: If unable to
         find any valid package manager on the target host.
         """
-        hostname = urlsplit(cfg.get_base_url()).hostname
-        with contextlib.suppress(KeyError):
-            return _PACKAGE_MANAGERS[hostname]
-
-        client = Client(cfg, echo_handler)
-        commands_managers = (
-            (("which", "dnf"), "dnf"),
-            (("which", "yum"), "yum"),
-        )
-        for cmd, pkg_mgr in commands_managers:
-            if client.run(cmd, sudo=True).returncode == 0:
-                _PACKAGE_MANAGERS[hostname] = pkg_mgr
-                return pkg_mgr
-        raise exceptions.NoKnownPackageManagerError(
-            "Unable to determine the package manager used by {}. It does not "
-            "appear to be any of {}.".format(
-                hostname, {pkg_mgr for _, pkg_mgr in commands_managers}
+        pkg_mgr = get_host_facts(cfg)["package_manager"]
+        if pkg_mgr is None:
+            raise exceptions.NoKnownPackageManagerError(
+                "Unable to determine the package manager used by {}. It does not "
+                "appear to be any of {}.".format(
+                    urlsplit(cfg.get_base_url()).hostname, {"dnf", "yum"}
+                )
             )
-        )
+        return pkg_mgr
 
     def install(self, *args):
         """Install the named packages.
@@ -1010,20 +1259,13 @@ class RegistryClient:
         :raises pulp_smash.exceptions.NoRegistryClientError: If unable to
         find any valid registry client on host.
         """
-        client = Client(self._cfg, echo_handler, pulp_host=self._pulp_host)
-        registry_clients = (
-            (("which", "podman"), "podman"),
-            (("which", "docker"), "docker"),
-        )
-        for cmd, registry_client in registry_clients:
-            if client.run(cmd).returncode == 0:
-                return registry_client
-        raise exceptions.NoRegistryClientError(
-            "Unable to determine the registry client used by {}. It does not "
-            "appear to be any of {}.".format(
-                self._pulp_host.hostname, {rc for _, rc in registry_clients}
+        registry_client = get_host_facts(self._cfg, self._pulp_host)["registry_client"]
+        if registry_client is None:
+            raise exceptions.NoRegistryClientError(
+                "Unable to determine the registry client used by {}. It does not "
+                "appear to be any of {}.".format(self._pulp_host.hostname, {"podman", "docker"})
             )
-        )
+        return registry_client
 
     def _dispatch_command(self, command, *args):
         """Dispatch a command to the registry client."""
@@ -8,11 +8,12 @@ might need to know which host is hosting the squid service, if any. This module
 eases the task of managing that information.
 """
 import collections
+import inspect
 import json
 import os
 import warnings
 from copy import deepcopy
-from urllib.parse import urlunsplit
+from urllib.parse import urlsplit, urlunsplit
 
 import jsonschema
 from packaging.version import Version
@@ -58,6 +59,10 @@ def _get_pulp_3_content_role():
 # avoid a config file by fetching values from the UI.
 _CONFIG = None
 
+# `validate_config` builds this validator the first time it's called, and then
+# reuses it. See `_get_validator`.
+_VALIDATOR = None
+
 P2_REQUIRED_ROLES = {
     "amqp broker",
     "api",
@@ -143,7 +148,23 @@ JSON_CONFIG_SCHEMA = {
             "additionalProperties": False,
             "required": ["timeout"],
             "type": "object",
-            "properties": {"timeout": {"type": "number", "mininum": 1, "maximum": 1800}},
+            "properties": {
+                "timeout": {"type": "number", "mininum": 1, "maximum": 1800},
+                "pool size": {"type": "integer", "minimum": 1},
+                "polling": {"$ref": "#/definitions/polling"},
+            },
+        },
+        "polling": {
+            "additionalProperties": False,
+            "type": "object",
+            "properties": {
+                "strategy": {"enum": ["backoff", "fixed"]},
+                "interval": {"type": "number", "minimum": 0},
+                "initial interval": {"type": "number", "minimum": 0},
+                "max interval": {"type": "number", "minimum": 0},
+                "multiplier": {"type": "number", "minimum": 1},
+                "jitter": {"type": "number", "minimum": 0, "maximum": 1},
+            },
         },
         "pulp 2 host": {
             "additionalProperties": False,
@@ -214,7 +235,10 @@ JSON_CONFIG_SCHEMA = {
         "redis role": {"type": "object"},
         "shell role": {
             "type": "object",
-            "properties": {"transport": {"enum": ["local", "ssh"], "type": "string"}},
+            "properties": {
+                "transport": {"enum": ["local", "ssh"], "type": "string"},
+                "persistent session": {"type": "boolean"},
+            },
         },
         "squid role": {"type": "object"},
     },
@@ -227,20 +251,107 @@ def _public_attrs(obj):
     return {key: val for key, val in vars(obj).copy().items() if not key.startswith("_")}
 
 
+class _FrozenDict(dict):
+    """An immutable and hashable dict.
+
+    Being immutable, it may be shared instead of copied. Copying it returns
+    the same object.
+    """
+
+    def _immutable(self, *args, **kwargs):
+        """Refuse to modify this object."""
+        raise TypeError("{} objects are immutable".format(type(self).__name__))
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __hash__(self):
+        """Hash the items of this object."""
+        return hash(frozenset(self.items()))
+
+    def __copy__(self):
+        """Return this object, which needn't be copied."""
+        return self
+
+    def __deepcopy__(self, memo):
+        """Return this object, which needn't be copied."""
+        return self
+
+    def __reduce__(self):
+        """Pickle this object without calling any of the disabled methods."""
+        return (type(self), (dict(self),))
+
+
+def _freeze(value):
+    """Return an immutable and hashable equivalent of ``value``.
+
+    Dicts, lists and sets are converted to :class:`_FrozenDict`, tuples and
+    frozensets, recursively. Named tuples keep their type.
+    """
+    if isinstance(value, _FrozenDict):
+        return value
+    if isinstance(value, dict):
+        return _FrozenDict((key, _freeze(val)) for key, val in value.items())
+    if isinstance(value, tuple) and hasattr(value, "_fields"):
+        return type(value)(*(_freeze(val) for val in value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(val) for val in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(val) for val in value)
+    return value
+
+
 def get_config():
-    """Return a copy of the global ``PulpSmashConfig`` object.
+    """Return the global ``PulpSmashConfig`` object.
 
     This method makes use of a cache. If the cache is empty, the configuration
-    file is parsed and the cache is populated. Otherwise, a copy of the cached
+    file is parsed and the cache is populated. Otherwise, the cached
     configuration object is returned.
 
-    :returns: A copy of the global server configuration object.
+    The returned object is frozen, and shared by all callers. To get a
+    modified configuration object, call
+    :meth:`pulp_smash.config.PulpSmashConfig.evolve`.
+
+    :returns: The global server configuration object.
     :rtype: pulp_smash.config.PulpSmashConfig
     """
     global _CONFIG  # pylint:disable=global-statement
     if _CONFIG is None:
-        _CONFIG = PulpSmashConfig.load()
-    return deepcopy(_CONFIG)
+        _CONFIG = PulpSmashConfig.load().freeze()
+    return _CONFIG
+
+
+def _get_validator():
+    """Return a validator for :data:`pulp_smash.config.JSON_CONFIG_SCHEMA`.
+
+    The schema is checked, and the validator built, only the first time this
+    function is called.
+    """
+    global _VALIDATOR  # pylint:disable=global-statement
+    if _VALIDATOR is None:
+        validator_cls = jsonschema.validators.validator_for(JSON_CONFIG_SCHEMA)
+        validator_cls.check_schema(JSON_CONFIG_SCHEMA)
+        _VALIDATOR = validator_cls(JSON_CONFIG_SCHEMA)
+    return _VALIDATOR
+
+
+def _get_validation_errors(config_dict):
+    """Return a list of all schema validation errors in ``config_dict``.
+
+    The schema is an ``anyOf`` with one branch per major version of Pulp, so a
+    config that matches neither produces a single, opaque error. Report the
+    errors of the branch that the config came closest to matching instead.
+    """
+    errors = []
+    for err in _get_validator().iter_errors(config_dict):
+        if err.validator != "anyOf" or err.absolute_path:
+            errors.append(err)
+            continue
+        branches = {}
+        for sub_err in err.context:
+            branches.setdefault(sub_err.schema_path[0], []).append(sub_err)
+        errors.extend(min(branches.values(), key=len) if branches else [err])
+    return errors
 
 
 def validate_config(config_dict):
@@ -249,13 +360,19 @@ def validate_config(config_dict):
     :param config_dict: A dict, such as one returned by calling ``json.load``
         on a configuration file, or one generated by the user-facing CLI.
     :returns: Nothing.
-    :raises pulp_smash.exceptions.ConfigValidationError: If the any validation
-        error is found.
+    :raises pulp_smash.exceptions.ConfigValidationError: If any validation
+        error is found. All errors found in the schema are reported at once.
     """
-    try:
-        jsonschema.validate(config_dict, JSON_CONFIG_SCHEMA)
-    except jsonschema.exceptions.ValidationError as err:
-        raise exceptions.ConfigValidationError(err.message) from err
+    errors = sorted(
+        _get_validation_errors(config_dict),
+        key=lambda err: [(isinstance(elem, int), elem) for elem in err.absolute_path],
+    )
+    if errors:
+        messages = []
+        for err in errors:
+            path = "/".join(str(elem) for elem in err.absolute_path)
+            messages.append("{}: {}".format(path, err.message) if path else err.message)
+        raise exceptions.ConfigValidationError("; ".join(messages), errors=messages)
 
     # The schema is capable of defining what roles must be fulfilled by *every*
     # host in a Pulp deployment. But it's not capable of defining which roles
@@ -279,6 +396,12 @@ def validate_config(config_dict):
 # Representation of a host and its roles."""
 PulpHost = collections.namedtuple("PulpHost", "hostname roles")
 
+# What is needed to talk to the API of a host. See
+# PulpSmashConfig.get_request_context.
+RequestContext = collections.namedtuple(
+    "RequestContext", "base_url hostname netloc auth verify cert requests_kwargs"
+)
+
 
 class PulpSmashConfig:
     """Information about a Pulp application.
@@ -368,6 +491,16 @@ class PulpSmashConfig:
     :param hosts: A list of the hosts comprising a Pulp application. Each
         element of the list should be a :class:`pulp_smash.config.PulpHost`
         object.
+    :param pool_size: An integer. The maximum number of connections that
+        :class:`pulp_smash.api.Client` keeps open to each Pulp host.
+    :param polling: A dict, or ``None``. Determines how Pulp Smash waits for
+        tasks to complete. See :func:`pulp_smash.polling.get_strategy`.
+
+    A frozen copy of this object, as returned by :meth:`freeze` and
+    :func:`pulp_smash.config.get_config`, can't be modified, is hashable, and
+    may be shared instead of copied. Use :meth:`evolve` to get a modified copy:
+
+    >>> cfg = config.get_config().evolve(timeout=60)
 
     .. _packaging: https://packaging.pypa.io/en/latest/
     .. _XDG Base Directory Specification:
@@ -380,10 +513,12 @@ class PulpSmashConfig:
         pulp_version,
         pulp_selinux_enabled,
         timeout,
-        aiohttp_fixtures_origin,
+        aiohttp_fixtures_origin="127.0.0.1",
         *,
         hosts,
-        custom=None
+        custom=None,
+        pool_size=10,
+        polling=None
     ):
         """Initialize this object with needed instance attributes."""
         self.pulp_auth = pulp_auth
@@ -393,11 +528,111 @@ class PulpSmashConfig:
         self.aiohttp_fixtures_origin = aiohttp_fixtures_origin
         self.hosts = hosts
         self.custom = custom
+        self.pool_size = pool_size
+        self.polling = polling
+
+    def __setattr__(self, name, value):
+        """Refuse to modify frozen objects."""
+        if vars(self).get("_frozen"):
+            raise AttributeError(
+                "{} object is frozen. Call evolve() instead.".format(type(self).__name__)
+            )
+        super().__setattr__(name, value)
+
+    __delattr__ = __setattr__
+
+    def __eq__(self, other):
+        """Compare the public attributes of both objects."""
+        if type(self) is not type(other):
+            return NotImplemented
+        return _public_attrs(self) == _public_attrs(other)
+
+    def __hash__(self):
+        """Hash frozen objects. Other objects are mutable, and unhashable."""
+        if not vars(self).get("_frozen"):
+            raise TypeError(
+                "unhashable {} object. Call freeze() first.".format(type(self).__name__)
+            )
+        return hash(tuple(sorted(_public_attrs(self).items())))
+
+    def __copy__(self):
+        """Share frozen objects, and copy other objects."""
+        if vars(self).get("_frozen"):
+            return self
+        return type(self)(**self._get_init_kwargs())
+
+    def __deepcopy__(self, memo):
+        """Share frozen objects, and copy other objects."""
+        if vars(self).get("_frozen"):
+            return self
+        return type(self)(**deepcopy(self._get_init_kwargs(), memo))
+
+    def _memoize(self, name, key, func):
+        """Return ``func()``, memoized as ``key`` in the cache called ``name``.
+
+        Only frozen objects memoize, as other objects may change at any time.
+        Keys that can't be hashed aren't memoized either.
+        """
+        if not vars(self).get("_frozen"):
+            return func()
+        cache = vars(self).setdefault(name, {})
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return func()
+        value = cache[key] = func()
+        return value
+
+    def _get_init_kwargs(self):
+        """Return the arguments with which this object can be re-created."""
+        kwargs = _public_attrs(self)
+        kwargs["pulp_version"] = str(kwargs["pulp_version"])
+        return kwargs
+
+    def freeze(self):
+        """Return a frozen copy of this object.
+
+        Its attributes are made immutable too. For example, ``hosts`` becomes a
+        tuple, and the ``roles`` of each host become immutable dicts. If this
+        object is already frozen, it is returned.
+
+        :rtype: pulp_smash.config.PulpSmashConfig
+        """
+        if vars(self).get("_frozen"):
+            return self
+        kwargs = {key: _freeze(value) for key, value in self._get_init_kwargs().items()}
+        frozen = type(self)(**kwargs)
+        vars(frozen)["_frozen"] = True
+        return frozen
+
+    def evolve(self, **changes):
+        """Return a copy of this object, with some attributes changed.
+
+        The copy is frozen if this object is. For example:
+
+        >>> cfg = config.get_config().evolve(timeout=60, pool_size=1)
+
+        :param changes: New values for any of the arguments of this class.
+        :rtype: pulp_smash.config.PulpSmashConfig
+        """
+        kwargs = self._get_init_kwargs()
+        kwargs.update(changes)
+        kwargs["pulp_version"] = str(kwargs["pulp_version"])
+        evolved = type(self)(**kwargs)
+        return evolved.freeze() if vars(self).get("_frozen") else evolved
 
     def __repr__(self):
-        """Create string representation of the object."""
+        """Create string representation of the object.
+
+        Optional arguments that are left at their default values are omitted.
+        """
         attrs = _public_attrs(self)
         attrs["pulp_version"] = str(attrs["pulp_version"])
+        for param in inspect.signature(type(self)).parameters.values():
+            if param.default is not param.empty and attrs.get(param.name) == param.default:
+                del attrs[param.name]
         str_kwargs = ", ".join("{}={}".format(key, repr(value)) for key, value in attrs.items())
         return "{}({})".format(type(self).__name__, str_kwargs)
 
@@ -416,7 +651,15 @@ class PulpSmashConfig:
                 )
             )
 
-        return [host for host in self.hosts if role in host.roles]
+        return list(self._memoize("_role_index", None, self._get_role_index).get(role, ()))
+
+    def _get_role_index(self):
+        """Return a dict mapping each role to the hosts fulfilling it."""
+        index = {}
+        for host in self.hosts:
+            for role in host.roles:
+                index.setdefault(role, []).append(host)
+        return {role: tuple(hosts) for role, hosts in index.items()}
 
     @staticmethod
     def get_services(roles):
@@ -497,13 +740,18 @@ class PulpSmashConfig:
         )
 
     def get_bindings_config(self):
-        """Return bindings settings."""
+        """Return bindings settings.
+
+        Each ``ApiClient`` built from these settings holds at most
+        ``self.pool_size`` connections.
+        """
         configuration = Configuration(
             host=self.get_base_url(),
             username=self.pulp_auth[0],
             password=self.pulp_auth[1],
         )
         configuration.safe_chars_for_path_param = "/"
+        configuration.connection_pool_maxsize = self.pool_size
         return configuration
 
     def get_requests_kwargs(self, pulp_host=None):
@@ -533,12 +781,44 @@ class PulpSmashConfig:
         """
         if not pulp_host:
             pulp_host = self.get_hosts("api")[0]
-        kwargs = deepcopy(pulp_host.roles["api"])
+        # The values of the api role are scalars, so a shallow copy suffices.
+        kwargs = dict(pulp_host.roles["api"])
         kwargs["auth"] = tuple(self.pulp_auth)
         for key in ("port", "scheme", "service"):
             kwargs.pop(key, None)
         return kwargs
 
+    def get_request_context(self, pulp_host=None):
+        """Return what is needed to talk to the API of ``pulp_host``.
+
+        The context of each host is computed once, if this object is frozen,
+        so that :class:`pulp_smash.api.Client` objects are cheap to create.
+
+        :param pulp_smash.config.PulpHost pulp_host: One of the hosts that
+            comprises a Pulp application. Defaults to the first host with the
+            ``api`` role.
+        :rtype: pulp_smash.config.RequestContext
+        """
+        if not pulp_host:
+            pulp_host = self.get_hosts("api")[0]
+        return self._memoize(
+            "_request_contexts", pulp_host, lambda: self._get_request_context(pulp_host)
+        )
+
+    def _get_request_context(self, pulp_host):
+        """Compute the return value of :meth:`get_request_context`."""
+        base_url = self.get_base_url(pulp_host)
+        requests_kwargs = _FrozenDict(self.get_requests_kwargs(pulp_host))
+        return RequestContext(
+            base_url=base_url,
+            hostname=pulp_host.hostname,
+            netloc=urlsplit(base_url).netloc,
+            auth=requests_kwargs["auth"],
+            verify=requests_kwargs.get("verify"),
+            cert=requests_kwargs.get("cert"),
+            requests_kwargs=requests_kwargs,
+        )
+
     @classmethod
     def load(cls, xdg_subdir=None, config_file=None):
         """Load a configuration file from disk.
@@ -572,6 +852,8 @@ class PulpSmashConfig:
             loaded_config["hosts"] = loaded_config.pop("systems")
 
         timeout = loaded_config.get("general", {}).get("timeout", 1800)
+        pool_size = loaded_config.get("general", {}).get("pool size", 10)
+        polling = loaded_config.get("general", {}).get("polling")
 
         hosts = [PulpHost(**host) for host in loaded_config.get("hosts", [])]
 
@@ -586,6 +868,8 @@ class PulpSmashConfig:
             aiohttp_fixtures_origin,
             hosts=hosts,
             custom=custom,
+            pool_size=pool_size,
+            polling=polling,
         )
 
     @classmethod
@@ -66,10 +66,15 @@ class ConfigValidationError(Exception):
         configuration validation is handled.
     """
 
-    def __init__(self, message, *args, **kwargs):
-        """Require that an error message be provided."""
+    def __init__(self, message, *args, errors=None, **kwargs):
+        """Require that an error message be provided.
+
+        :param errors: A list of messages, one for each error found. Defaults
+            to ``[message]``.
+        """
         super().__init__(message, *args, **kwargs)
         self.message = message
+        self.errors = errors if errors is not None else [message]
 
     def __str__(self):
         """Provide a human-friendly string representation of this exception."""
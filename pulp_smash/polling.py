@@ -0,0 +1,249 @@
+# coding=utf-8
+"""Strategies for polling Pulp until some condition is met.
+
+A polling strategy decides how long to sleep between consecutive checks. The
+strategy used by Pulp Smash is chosen in the "polling" sub-section of the
+"general" section of the settings file. For example:
+
+.. code-block:: json
+
+    {
+      "general": {
+        "timeout": 1800,
+        "polling": {"strategy": "backoff", "max interval": 5}
+      }
+    }
+
+See :data:`STRATEGIES` for the available strategies and
+:func:`get_strategy` for the available options.
+"""
+import asyncio
+import random
+import time
+
+from packaging.version import Version
+
+from pulp_smash import exceptions
+from pulp_smash.log import logger
+
+
+class FixedInterval:
+    """Sleep for the same amount of time between each check.
+
+    :param interval: The number of seconds to sleep between checks.
+    """
+
+    def __init__(self, interval):
+        """Initialize this object with needed instance attributes."""
+        self.interval = interval
+
+    def intervals(self):
+        """Yield the number of seconds to sleep before each re-check."""
+        while True:
+            yield self.interval
+
+
+class ExponentialBackoff:
+    """Sleep for exponentially longer amounts of time between each check.
+
+    The first sleep is short, so that quick tasks are noticed quickly. Each
+    following sleep is ``multiplier`` times longer than the previous one, up
+    to ``max_interval`` seconds. Each sleep is randomly lengthened or shortened
+    by up to ``jitter`` times its length, so that concurrent pollers don't
+    query Pulp in lockstep.
+
+    :param initial_interval: The number of seconds to sleep before the first
+        re-check.
+    :param max_interval: The maximum number of seconds to sleep between
+        checks.
+    :param multiplier: The factor by which the sleep grows after each check.
+    :param jitter: A number between 0 and 1.
+    """
+
+    def __init__(self, initial_interval=0.05, max_interval=5, multiplier=1.5, jitter=0.1):
+        """Initialize this object with needed instance attributes."""
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.multiplier = multiplier
+        self.jitter = jitter
+
+    def intervals(self):
+        """Yield the number of seconds to sleep before each re-check."""
+        interval = self.initial_interval
+        while True:
+            spread = interval * self.jitter
+            yield min(max(interval + random.uniform(-spread, spread), 0), self.max_interval)
+            interval = min(interval * self.multiplier, self.max_interval)
+
+
+STRATEGIES = {"backoff": ExponentialBackoff, "fixed": FixedInterval}
+"""The polling strategies which may be named in the settings file."""
+
+
+def get_strategy(cfg):
+    """Return the polling strategy declared by ``cfg``.
+
+    The "polling" setting may contain a "strategy" key, naming one of the
+    :data:`STRATEGIES`. It defaults to "backoff". The remaining keys are
+    passed to the strategy, with spaces in their names replaced by
+    underscores. For example, ``{"strategy": "fixed", "interval": 1}`` yields
+    ``FixedInterval(interval=1)``.
+
+    When the "fixed" strategy is chosen and no interval is given, sleep for 2
+    seconds on Pulp 2 and for 0.3 seconds on Pulp 3.
+
+    :param cfg: A :class:`pulp_smash.config.PulpSmashConfig` object.
+    :returns: An object with an ``intervals()`` method.
+    """
+    options = dict(cfg.polling or {})
+    name = options.pop("strategy", "backoff")
+    kwargs = {key.replace(" ", "_"): value for key, value in options.items()}
+    if name == "fixed":
+        kwargs.setdefault("interval", 2 if cfg.pulp_version < Version("3") else 0.3)
+    return STRATEGIES[name](**kwargs)
+
+
+def poll_until(fetch, is_done, timeout, strategy, description="Polled resource"):
+    """Call ``fetch`` until ``is_done`` accepts its return value.
+
+    The first check is made immediately. Afterwards, sleep between checks as
+    ``strategy`` says, without ever sleeping past the deadline.
+
+    :param fetch: A callable taking no arguments. It should fetch and return
+        the current state of whatever is being polled.
+    :param is_done: A callable accepting a return value of ``fetch``, and
+        returning whether polling may stop.
+    :param timeout: The number of seconds after which to give up.
+    :param strategy: A polling strategy, such as one returned by
+        :func:`get_strategy`.
+    :param description: A string describing what is being polled. It is used
+        in log and error messages.
+    :returns: The last return value of ``fetch``.
+    :raises pulp_smash.exceptions.TaskTimedOutError: If ``is_done`` doesn't
+        accept a return value of ``fetch`` within ``timeout`` seconds.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    polls = 0
+    for interval in strategy.intervals():
+        state = fetch()
+        polls += 1
+        if is_done(state):
+            logger.debug(
+                "%s is done after %s polls in %.2fs", description, polls, time.monotonic() - start
+            )
+            return state
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise exceptions.TaskTimedOutError(
+                "{} is ongoing after {} polls in {}s.".format(description, polls, timeout)
+            )
+        logger.debug("%s is ongoing after %s polls", description, polls)
+        time.sleep(min(interval, remaining))
+    raise AssertionError("The polling strategy stopped yielding intervals.")
+
+
+async def async_poll_until(fetch, is_done, timeout, strategy, description="Polled resource"):
+    """Like :func:`poll_until`, but for use in a coroutine.
+
+    ``fetch`` should return an awaitable, and sleeping doesn't block the event
+    loop.
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+    polls = 0
+    for interval in strategy.intervals():
+        state = await fetch()
+        polls += 1
+        if is_done(state):
+            logger.debug(
+                "%s is done after %s polls in %.2fs", description, polls, time.monotonic() - start
+            )
+            return state
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise exceptions.TaskTimedOutError(
+                "{} is ongoing after {} polls in {}s.".format(description, polls, timeout)
+            )
+        logger.debug("%s is ongoing after %s polls", description, polls)
+        await asyncio.sleep(min(interval, remaining))
+    raise AssertionError("The polling strategy stopped yielding intervals.")
+
+
+def poll_many(
+    fetch,
+    keys,
+    is_done,
+    timeout,
+    strategy,
+    description="Polled resource",
+    batch=50,
+    fetch_one=None,
+):
+    """Poll many resources at once. Yield the state of each as it becomes done.
+
+    Each round of polling calls ``fetch`` once for every ``batch`` pending
+    resources, rather than once for every pending resource. Between rounds,
+    sleep as ``strategy`` says, without ever sleeping past the deadline.
+
+    :param fetch: A callable accepting a list of keys, such as hrefs. It
+        should return a dict mapping those keys to the current states of the
+        identified resources.
+    :param keys: An iterable of keys identifying the resources to poll.
+    :param is_done: A callable accepting a resource's state, and returning
+        whether polling of that resource may stop.
+    :param timeout: The number of seconds after which to give up.
+    :param strategy: A polling strategy, such as one returned by
+        :func:`get_strategy`.
+    :param description: A string describing what is being polled. It is used
+        in log and error messages.
+    :param batch: The maximum number of keys passed to ``fetch`` at once.
+    :param fetch_one: A callable accepting a single key, and returning the
+        current state of the identified resource, or ``None`` if it's gone.
+        If given, it's called for each key missing from the dict returned by
+        ``fetch``. And if ``fetch`` returns keys it wasn't passed, as happens
+        if the server ignores a filter, ``fetch_one`` is used to poll every
+        resource from then on. If not given, a key missing from the dict
+        returned by ``fetch`` is taken to mean that the resource is gone.
+    :returns: A generator yielding each resource's final state, in the order
+        in which they become done.
+    :raises pulp_smash.exceptions.TaskTimedOutError: If some resources aren't
+        done within ``timeout`` seconds.
+    """
+    pending = list(dict.fromkeys(keys))
+    deadline = time.monotonic() + timeout
+    polls = 0
+    batched = True
+    for interval in strategy.intervals():
+        polls += 1
+        finished = set()
+        for i in range(0, len(pending), batch):
+            keys_batch = pending[i : i + batch]  # noqa: E203
+            states = fetch(keys_batch) if batched else {}
+            if fetch_one and not states.keys() <= set(keys_batch):
+                logger.warning(
+                    "Fetching %ss in batches returned unrelated ones. Polling each of them.",
+                    description,
+                )
+                batched = False
+                states = {}
+            for key in keys_batch:
+                state = states.get(key)
+                if key not in states and fetch_one:
+                    state = fetch_one(key)
+                if state is None:
+                    logger.debug("%s %s is gone", description, key)
+                    finished.add(key)
+                elif is_done(state):
+                    finished.add(key)
+                    yield state
+        pending = [key for key in pending if key not in finished]
+        if not pending:
+            return
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise exceptions.TaskTimedOutError(
+                "{} {} ongoing after {} polls in {}s.".format(description, pending, polls, timeout)
+            )
+        logger.debug("%s %s ongoing after %s polls", description, pending, polls)
+        time.sleep(min(interval, remaining))
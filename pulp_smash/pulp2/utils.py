@@ -1,7 +1,6 @@
 # coding=utf-8
 """Utility functions for Pulp 2 tests."""
 import inspect
-import io
 import unittest
 import warnings
 from urllib.parse import urljoin, urlparse
@@ -431,12 +430,13 @@ def reset_squid(cfg):
 
 def _get_squid_version(cfg):
     """Get Squid's version, as a ``packaging.version.Version`` object."""
-    # The --version option was added in Squid 4.
-    resp = cli.Client(cfg).run(("squid", "-v"))
+    # The --version option was added in Squid 4. If squid can't be run, let
+    # cli.Client raise an error describing why.
+    first_line = cli.get_host_facts(cfg)["squid"] or cli.Client(cfg).run(("squid", "-v")).stdout
     # The first line of output is 'Squid Cache: Version ...' for at least Squid
     # 3 and 4, and at least Fedora 24, Fedora 25, RHEL 6.8 and RHEL 7.3.
     phrase = "squid cache: version "
-    return Version(resp.stdout.splitlines()[0].lower()[len(phrase) :].strip())  # noqa: E203
+    return Version(first_line.splitlines()[0].lower()[len(phrase) :].strip())  # noqa: E203
 
 
 def search_units(cfg, repo, criteria=None, response_handler=None):
@@ -501,7 +501,9 @@ def upload_import_erratum(cfg, erratum, repo):
     return call_report
 
 
-def upload_import_unit(cfg, unit, import_params, repo):
+def upload_import_unit(
+    cfg, unit, import_params, repo, *, chunk_size=200000, max_workers=None, progress=None
+):
     """Upload a content unit to a Pulp server and import it into a repository.
 
     This procedure only works for some unit types, such as ``rpm`` or
@@ -509,7 +511,8 @@ def upload_import_unit(cfg, unit, import_params, repo):
     procedure. The procedure encapsulated by this function is as follows:
 
     1. Create an upload request.
-    2. Upload the content unit to Pulp, in small chunks.
+    2. Upload the content unit to Pulp, in chunks. Several chunks are uploaded
+       at once, as Pulp writes each of them at its own offset.
     3. Import the uploaded content unit into a repository.
     4. Delete the upload request.
 
@@ -534,26 +537,33 @@ def upload_import_unit(cfg, unit, import_params, repo):
 
     :param pulp_smash.config.PulpSmashConfig cfg: Information about a Pulp
         host.
-    :param unit: The unit to be uploaded and imported, as a binary blob.
+    :param unit: The unit to be uploaded and imported. Either a binary blob,
+        the path to a file, a binary file object, or an iterable of binary
+        blobs. See :func:`pulp_smash.utils.iter_chunks`.
     :param import_params: A dict of parameters to be merged into the default
         set of import parameters during step 3.
     :param repo: A dict of information about the target repository.
+    :param chunk_size: The number of bytes uploaded per request. Defaults to
+        200,000 bytes, or about 200 kB.
+    :param max_workers: The number of chunks uploaded at once. Defaults to
+        ``cfg.pool_size``.
+    :param progress: A callable accepting a
+        :class:`pulp_smash.utils.UploadProgress`, called each time a chunk is
+        uploaded.
     :returns: The call report returned when importing the unit.
     """
     client = api.Client(cfg, api.json_handler)
     malloc = client.post(CONTENT_UPLOAD_PATH)
 
-    # 200,000 bytes ~= 200 kB
-    chunk_size = 200000
-    offset = 0
-    with io.BytesIO(unit) as handle:
-        while True:
-            chunk = handle.read(chunk_size)
-            if not chunk:  # if chunk == b'':
-                break  # we've reached EOF
-            path = urljoin(malloc["_href"], "{}/".format(offset))
-            client.put(path, data=chunk)
-            offset += chunk_size
+    def put(offset, chunk):
+        client.put(urljoin(malloc["_href"], "{}/".format(offset)), data=chunk)
+
+    utils.upload_chunks(
+        put,
+        utils.iter_chunks(unit, chunk_size),
+        max_workers=max_workers or cfg.pool_size,
+        progress=progress,
+    )
 
     path = urljoin(repo["_href"], "actions/import_upload/")
     body = {"unit_key": {}, "upload_id": malloc["upload_id"]}
@@ -1,39 +1,148 @@
+"""Helpers for tests which use the Pulp 3 bindings.
+
+Nothing is done when this module is imported. The settings file is loaded,
+and the bindings clients are built, the first time they are needed. Each
+thread, and each process, gets its own :class:`ApiClient`. The size of its
+connection pool is ``cfg.pool_size``.
+
+For backwards compatibility, the module attributes ``cfg``, ``SLEEP_TIME``,
+``configuration``, ``pulpcore_client``, ``tasks`` and ``task_groups`` are
+still available. The last three are specific to the calling thread.
+"""
+import functools
+import os
+import threading
+import time
 from unittest import TestCase
-from time import sleep
 
 from pulpcore.client.pulpcore import ApiClient, OrphansApi, TaskGroupsApi, TasksApi, TaskGroupsApi
+from pulpcore.client.pulpcore import ApiException
 
 try:
     from pulpcore.client.pulpcore import OrphansCleanupApi
 except ImportError:  # This is only available in pulpcore 3.14+
     OrphansCleanupApi = None
 
+from pulp_smash import polling
 from pulp_smash.api import _get_sleep_time
 from pulp_smash.config import get_config
+from pulp_smash.log import logger
 
+TIMING_HOOKS = []
+"""Callables which are told how long expensive steps take.
 
-cfg = get_config()
-SLEEP_TIME = _get_sleep_time(cfg)
-configuration = cfg.get_bindings_config()
-pulpcore_client = ApiClient(configuration)
-tasks = TasksApi(pulpcore_client)
-task_groups = TaskGroupsApi(pulpcore_client)
+Each callable is called with an event name and a number of seconds. The
+events are:
+
+``"startup"``
+    Building the bindings clients for a thread.
+``"first monitor"``
+    The first call to :func:`monitor_task` in a thread, including startup.
+"""
+
+_local = threading.local()
+
+
+def _report_timing(event, seconds):
+    """Log how long ``event`` took, and tell each of the :data:`TIMING_HOOKS`."""
+    logger.debug("Bindings %s took %.3fs", event, seconds)
+    for hook in TIMING_HOOKS:
+        hook(event, seconds)
+
+
+def _get_local():
+    """Return the bindings state of the current thread in this process.
+
+    The state is rebuilt after a fork, so that processes never share
+    connections.
+    """
+    if getattr(_local, "pid", None) != os.getpid():
+        start = time.perf_counter()
+        _local.__dict__.clear()
+        _local.pulpcore_client = ApiClient(_get("configuration"))
+        _local.tasks = TasksApi(_local.pulpcore_client)
+        _local.task_groups = TaskGroupsApi(_local.pulpcore_client)
+        _local.pid = os.getpid()
+        _report_timing("startup", time.perf_counter() - start)
+    return _local
+
+
+def get_pulpcore_client():
+    """Return the :class:`ApiClient` of the current thread."""
+    return _get_local().pulpcore_client
+
+
+def get_tasks_api():
+    """Return the :class:`TasksApi` of the current thread."""
+    return _get_local().tasks
+
+
+def get_task_groups_api():
+    """Return the :class:`TaskGroupsApi` of the current thread."""
+    return _get_local().task_groups
+
+
+def __getattr__(name):
+    """Build the module attributes which used to be built at import time."""
+    if name == "cfg":
+        value = get_config()
+    elif name == "SLEEP_TIME":
+        value = _get_sleep_time(_get("cfg"))
+    elif name == "configuration":
+        value = _get("cfg").get_bindings_config()
+    elif name in ("pulpcore_client", "tasks", "task_groups"):
+        # Specific to the calling thread, and so never stored as a global.
+        return getattr(_get_local(), name)
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    globals()[name] = value
+    return value
+
+
+def _get(name):
+    """Return the module attribute ``name``, building it if needed."""
+    return globals()[name] if name in globals() else __getattr__(name)
 
 
 class PulpTestCase(TestCase):
-    """Pulp customized test case."""
+    """Pulp customized test case.
+
+    The tasks spawned by cleanup functions, such as ``repo_api.delete``, are
+    waited for once all cleanup functions have run. Other tests' tasks aren't.
+    """
+
+    def addCleanup(self, function, *args, **kwargs):  # pylint:disable=invalid-name
+        """Add a cleanup function, and remember the task it spawns, if any."""
+
+        @functools.wraps(function)
+        def cleanup(*args, **kwargs):
+            result = function(*args, **kwargs)
+            task_href = getattr(result, "task", None)
+            if isinstance(task_href, str):
+                vars(self).setdefault("_cleanup_task_hrefs", []).append(task_href)
+            return result
+
+        super().addCleanup(cleanup, *args, **kwargs)
 
     def doCleanups(self):
         """
-        Execute all cleanup functions and waits the deletion tasks.
+        Execute all cleanup functions and waits the tasks they spawned.
 
         Normally called for you after tearDown.
         """
+        start = time.perf_counter()
         output = super().doCleanups()
-        running_tasks = tasks.list(state="running", name__contains="delete")
-        while running_tasks.count:
-            sleep(SLEEP_TIME)
-            running_tasks = tasks.list(state="running", name__contains="delete")
+        cleaned_up = time.perf_counter()
+        task_hrefs = vars(self).pop("_cleanup_task_hrefs", [])
+        for _ in wait_for_tasks(task_hrefs, raise_on_failure=False):
+            pass
+        logger.debug(
+            "%s ran cleanups in %.2fs, then waited %.2fs for %s tasks",
+            self.id(),
+            cleaned_up - start,
+            time.perf_counter() - cleaned_up,
+            len(task_hrefs),
+        )
         return output
 
 
@@ -67,12 +176,26 @@ def monitor_task(task_href):
     Returns:
         list[str]: List of hrefs that identify resource created by the task
 
+    Raises:
+        pulp_smash.exceptions.TaskTimedOutError: If the task is ongoing after
+            ``cfg.timeout`` seconds.
+
     """
+    first = not getattr(_local, "monitored", False)
+    start = time.perf_counter()
+    cfg = _get("cfg")
+    tasks = get_tasks_api()
     completed = ["completed", "failed", "canceled"]
-    task = tasks.read(task_href)
-    while task.state not in completed:
-        sleep(SLEEP_TIME)
-        task = tasks.read(task_href)
+    task = polling.poll_until(
+        lambda: tasks.read(task_href),
+        lambda task: task.state in completed,
+        cfg.timeout,
+        polling.get_strategy(cfg),
+        "Task {}".format(task_href),
+    )
+    if first:
+        _local.monitored = True
+        _report_timing("first monitor", time.perf_counter() - start)
 
     if task.state != "completed":
         raise PulpTaskError(task=task)
@@ -80,6 +203,58 @@ def monitor_task(task_href):
     return task
 
 
+def wait_for_tasks(task_hrefs, raise_on_failure=True):
+    """Polls the Task API until each of the given tasks is in a completed state.
+
+    All unfinished tasks are listed with one request per round of polling,
+    instead of one request per task. Tasks missing from a listing are read by
+    href, and dropped if they no longer exist.
+
+    Args:
+        task_hrefs(iterable): The hrefs of the tasks to monitor
+        raise_on_failure(bool): Whether to raise if a task fails or is
+            canceled. If false, such tasks are yielded like the others.
+
+    Returns:
+        generator: The bindings Task objects, in the order in which they finish
+
+    Raises:
+        PulpTaskError: As soon as a task is found to have failed or been
+            canceled, if ``raise_on_failure`` is true.
+        pulp_smash.exceptions.TaskTimedOutError: If some tasks are ongoing
+            after ``cfg.timeout`` seconds.
+
+    """
+    cfg = _get("cfg")
+    tasks = get_tasks_api()
+    completed = ["completed", "failed", "canceled"]
+
+    def fetch(hrefs):
+        response = tasks.list(pulp_href__in=hrefs, limit=len(hrefs))
+        return {task.pulp_href: task for task in response.results}
+
+    def fetch_one(href):
+        try:
+            return tasks.read(href)
+        except ApiException as exc:
+            if exc.status == 404:
+                return None
+            raise
+
+    for task in polling.poll_many(
+        fetch,
+        task_hrefs,
+        lambda task: task.state in completed,
+        cfg.timeout,
+        polling.get_strategy(cfg),
+        "Task",
+        fetch_one=fetch_one,
+    ):
+        if raise_on_failure and task.state != "completed":
+            raise PulpTaskError(task=task)
+        yield task
+
+
 def monitor_task_group(tg_href):
     """Polls the task group tasks until the tasks are in a completed state.
 
@@ -89,11 +264,15 @@ def monitor_task_group(tg_href):
     Returns:
         pulpcore.client.pulpcore.TaskGroup: the bindings TaskGroup object
     """
-    tg = task_groups.read(tg_href)
-
-    while not tg.all_tasks_dispatched or (tg.waiting + tg.running) > 0:
-        sleep(SLEEP_TIME)
-        tg = task_groups.read(tg_href)
+    cfg = _get("cfg")
+    task_groups = get_task_groups_api()
+    tg = polling.poll_until(
+        lambda: task_groups.read(tg_href),
+        lambda tg: tg.all_tasks_dispatched and (tg.waiting + tg.running) == 0,
+        cfg.timeout,
+        polling.get_strategy(cfg),
+        "Task group {}".format(tg_href),
+    )
 
     if (tg.failed + tg.skipped + tg.canceled) > 0:
         raise PulpTaskGroupError(task_group=tg)
@@ -103,6 +282,7 @@ def monitor_task_group(tg_href):
 
 def delete_orphans(orphan_protection_time=0):
     """Delete orphans through bindings."""
+    pulpcore_client = get_pulpcore_client()
     if OrphansCleanupApi:
         response = OrphansCleanupApi(pulpcore_client).cleanup(
             {"orphan_protection_time": orphan_protection_time}
@@ -1,37 +1,51 @@
 # coding=utf-8
-"""Constants for Pulp 3 tests."""
+"""Constants for Pulp 3 tests.
+
+``BASE_PATH`` and the paths derived from it depend on the ``V3_API_ROOT``
+setting of the Pulp application under test. They are resolved on first
+access, rather than when this module is imported, and ``BASE_PATH`` is cached
+on disk per API host. See :func:`get_base_path`.
+"""
+import time
+import warnings
 from urllib.parse import urljoin
 
+import requests
+
 from pulp_smash.api import (  # noqa: F401
     _P3_TASK_END_STATES as P3_TASK_END_STATES,
 )
-from pulp_smash.utils import get_pulp_setting
-from pulp_smash import cli, config
-
-cfg = config.get_config()
-cli_client = cli.Client(cfg)
-BASE_PATH = get_pulp_setting(cli_client, "V3_API_ROOT")
-
-if BASE_PATH is None:
-    BASE_PATH = "/pulp/api/v3/"  # The version of Pulp must not yet have this setting
-
-API_DOCS_PATH = urljoin(BASE_PATH, "docs/")
-
-ARTIFACTS_PATH = urljoin(BASE_PATH, "artifacts/")
-
-BASE_CONTENT_PATH = urljoin(BASE_PATH, "content/")
-
-BASE_CONTENT_GUARDS_PATH = urljoin(BASE_PATH, "contentguards/")
-
-BASE_DISTRIBUTION_PATH = urljoin(BASE_PATH, "distributions/")
-
-BASE_PUBLISHER_PATH = urljoin(BASE_PATH, "publishers/")
-
-BASE_PUBLICATION_PATH = urljoin(BASE_PATH, "publications/")
-
-BASE_REMOTE_PATH = urljoin(BASE_PATH, "remotes/")
-
-BASE_REPO_PATH = urljoin(BASE_PATH, "repositories/")
+from pulp_smash import cli, config, utils
+from pulp_smash.log import logger
+
+_DEFAULT_BASE_PATH = "/pulp/api/v3/"
+
+# The number of seconds for which a cached BASE_PATH is used, before it is
+# resolved again.
+_BASE_PATH_CACHE_TTL = 24 * 60 * 60
+
+# The number of seconds after which an HTTP probe for BASE_PATH gives up, if
+# the API role sets no timeout.
+_PROBE_TIMEOUT = 10
+
+# A mapping between the names of paths that are derived from BASE_PATH, and
+# their paths relative to BASE_PATH.
+_RELATIVE_PATHS = {
+    "API_DOCS_PATH": "docs/",
+    "ARTIFACTS_PATH": "artifacts/",
+    "BASE_CONTENT_PATH": "content/",
+    "BASE_CONTENT_GUARDS_PATH": "contentguards/",
+    "BASE_DISTRIBUTION_PATH": "distributions/",
+    "BASE_PUBLISHER_PATH": "publishers/",
+    "BASE_PUBLICATION_PATH": "publications/",
+    "BASE_REMOTE_PATH": "remotes/",
+    "BASE_REPO_PATH": "repositories/",
+    "ORPHANS_PATH": "orphans/",
+    "STATUS_PATH": "status/",
+    "TASKS_PATH": "tasks/",
+    "UPLOAD_PATH": "uploads/",
+    "WORKER_PATH": "workers/",
+}
 
 IMMEDIATE_DOWNLOAD_POLICIES = ("immediate",)
 
@@ -39,12 +53,98 @@ ON_DEMAND_DOWNLOAD_POLICIES = ("on_demand", "streamed")
 
 MEDIA_PATH = "/var/lib/pulp"
 
-ORPHANS_PATH = urljoin(BASE_PATH, "orphans/")
-
-STATUS_PATH = urljoin(BASE_PATH, "status/")
-
-TASKS_PATH = urljoin(BASE_PATH, "tasks/")
-
-UPLOAD_PATH = urljoin(BASE_PATH, "uploads/")
 
-WORKER_PATH = urljoin(BASE_PATH, "workers/")
+def _probe_base_path(cfg):
+    """Discover the API root over HTTP, by looking for the status endpoint.
+
+    Each probe gives up after the ``timeout`` of the API role, or after
+    ``_PROBE_TIMEOUT`` seconds.
+
+    :returns: The API root, or ``None`` if it can't be discovered.
+    """
+    kwargs = cfg.get_requests_kwargs()
+    kwargs.setdefault("timeout", _PROBE_TIMEOUT)
+    for base_path in (_DEFAULT_BASE_PATH, "/pulp/default/api/v3/"):
+        url = urljoin(cfg.get_base_url(), urljoin(base_path, "status/"))
+        try:
+            response = requests.get(url, **kwargs)
+        except requests.exceptions.RequestException:
+            continue
+        if response.ok:
+            return base_path
+    return None
+
+
+def _resolve_base_path(cfg):
+    """Ask the Pulp application under test for its API root.
+
+    Read the ``V3_API_ROOT`` setting through ``pulpcore-manager``. If that
+    fails, for example because no host can be accessed through a shell, fall
+    back to discovering the API root over HTTP.
+
+    :returns: The API root, or ``None`` if it can't be resolved.
+    """
+    try:
+        # The version of Pulp may not yet have this setting.
+        return utils.get_pulp_setting(cli.Client(cfg), "V3_API_ROOT") or _DEFAULT_BASE_PATH
+    except Exception as err:  # pylint:disable=broad-except
+        logger.debug("Cannot read V3_API_ROOT, probing over HTTP instead: %s", err)
+        return _probe_base_path(cfg)
+
+
+def get_base_path(cfg=None):
+    """Return the API root of the Pulp application under test.
+
+    The API root is cached in ``$XDG_CACHE_HOME/pulp_smash/base_paths.json``,
+    per API host, for a day. See :func:`pulp_smash.utils.get_cache_path`. If
+    it can't be resolved, for example because Pulp can't be reached, a warning
+    is issued, and the default API root is returned, but not cached.
+
+    :param pulp_smash.config.PulpSmashConfig cfg: Information about the Pulp
+        application under test. Defaults to :func:`pulp_smash.config.get_config`.
+    :returns: A path such as "/pulp/api/v3/".
+    """
+    if cfg is None:
+        cfg = config.get_config()
+    cache_path = utils.get_cache_path("base_paths.json")
+    key = cfg.get_base_url()
+    entry = utils.read_json_cache(cache_path).get(key)
+    if entry is None or time.time() - entry["fetched"] >= _BASE_PATH_CACHE_TTL:
+        base_path = _resolve_base_path(cfg)
+        if base_path is None:
+            warnings.warn(
+                "Cannot find the API root of {}. Pulp Smash will use {}.".format(
+                    key, _DEFAULT_BASE_PATH
+                ),
+                RuntimeWarning,
+            )
+            return _DEFAULT_BASE_PATH
+        entry = {"base_path": base_path, "fetched": time.time()}
+        utils.update_json_cache(cache_path, {key: entry})
+    return entry["base_path"]
+
+
+def __getattr__(name):
+    """Resolve ``BASE_PATH`` and the paths derived from it on first access.
+
+    Resolved values are stored as module globals, so that they are resolved
+    only once per process.
+    """
+    if name == "cfg":
+        value = config.get_config()
+    elif name == "cli_client":
+        value = cli.Client(config.get_config())
+    elif name == "BASE_PATH":
+        value = get_base_path()
+    elif name in _RELATIVE_PATHS:
+        base_path = globals().get("BASE_PATH") or __getattr__("BASE_PATH")
+        value = urljoin(base_path, _RELATIVE_PATHS[name])
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """List the lazily resolved constants alongside the others."""
+    return sorted(set(globals()) | {"cfg", "cli_client", "BASE_PATH"} | set(_RELATIVE_PATHS))
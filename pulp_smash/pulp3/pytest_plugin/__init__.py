@@ -1,26 +1,26 @@
 import asyncio
+import pathlib
+import re
 import threading
 import socket
 import ssl
-import time
 import uuid
-import urllib3
+from concurrent.futures import ThreadPoolExecutor
 
 import trustme
 import proxy
 import pytest
 
 from aiohttp import web
-from contextlib import suppress
 from yarl import URL
 
-from pulp_smash import cli
+from pulp_smash import cli, selectors
 from pulp_smash.api import _get_sleep_time
 from pulp_smash.config import get_config
-from pulp_smash.pulp3.bindings import monitor_task
+from pulp_smash.exceptions import TaskTimedOutError
+from pulp_smash.pulp3.bindings import monitor_task, wait_for_tasks
 from pulp_smash.pulp3.fixture_utils import add_recording_route
-
-from pulpcore.client.pulpcore.exceptions import ApiException
+from pulp_smash.pulp3.utils import wait_for_status
 
 
 PULP_SERVICES = ("pulpcore-content", "pulpcore-api", "pulpcore-worker@1", "pulpcore-worker@2")
@@ -41,6 +41,13 @@ def pytest_addoption(parser):
         default=False,
         help="Enable to run nightly test.",
     )
+    group.addoption(
+        "--pulp-no-bug-prefetch",
+        action="store_true",
+        dest="pulp_no_bug_prefetch",
+        default=False,
+        help="Disable fetching the statuses of bugs referenced by tests before the run starts.",
+    )
 
 
 def pytest_addhooks(pluginmanager):
@@ -58,7 +65,58 @@ def pytest_runtest_teardown(item):
         item.config.hook.pytest_check_for_leftover_pulp_objects(config=item.config)
 
 
+# Matches bug IDs passed literally to bug_is_fixed, e.g. `bug_is_fixed(1234, ...)`.
+_BUG_ID_PATTERN = re.compile(r"bug_is_fixed\(\s*(\d+)")
+
+
+def _get_referenced_bug_ids(items):
+    """Return the IDs of the bugs referenced by ``items``.
+
+    Bugs are referenced in two ways:
+
+    * Declared with the ``pulp_bugs`` marker, e.g.
+      ``@pytest.mark.pulp_bugs(1234, 5678)``. This is reliable.
+    * Passed as literal integers to ``bug_is_fixed``, e.g.
+      ``bug_is_fixed(1234, ...)``, in the module of an item, or in a
+      ``conftest.py`` next to it or in a parent directory. This is a best-effort
+      heuristic. Bug IDs held in constants or variables, or passed through
+      helper functions, aren't found this way. Declare them with the marker
+      instead, or they are fetched one at a time when the tests run.
+    """
+    bug_ids = set()
+    paths = set()
+    for item in items:
+        for marker in item.iter_markers("pulp_bugs"):
+            bug_ids.update(int(bug_id) for bug_id in marker.args)
+        path = pathlib.Path(str(item.fspath))
+        paths.add(path)
+        paths.update(parent / "conftest.py" for parent in path.parents)
+    for path in paths:
+        try:
+            with open(path) as handle:
+                bug_ids.update(int(bug_id) for bug_id in _BUG_ID_PATTERN.findall(handle.read()))
+        except OSError:
+            continue
+    return bug_ids
+
+
+def _prefetch_referenced_bugs(items):
+    """Fetch the statuses of all bugs referenced by ``items``.
+
+    Bug tracker latency is then paid once, concurrently, before the run starts,
+    instead of in the middle of individual tests. See
+    :func:`_get_referenced_bug_ids` for which bugs are found.
+    """
+    bug_ids = _get_referenced_bug_ids(items)
+    if bug_ids:
+        selectors.prefetch_bugs(bug_ids)
+
+
 def pytest_collection_modifyitems(config, items):
+    # Listing tests shouldn't wait for the bug tracker.
+    if not (config.getoption("--pulp-no-bug-prefetch") or config.getoption("--collect-only")):
+        _prefetch_referenced_bugs(items)
+
     # Skip nightly tests by default
     # https://docs.pytest.org/en/7.1.x/example/simple.html#control-skipping-of-tests-according-to-command-line-option
     if config.getoption("--nightly"):
@@ -93,6 +151,10 @@ def pytest_configure(config):
         "markers",
         "nightly: marks tests as intended to run during the nightly CI run",
     )
+    config.addinivalue_line(
+        "markers",
+        "pulp_bugs(*bug_ids): declares the bugs a test checks, so that they are fetched up front",
+    )
 
 
 ## Threaded local fixture servers
@@ -323,47 +385,31 @@ def svc_mgr(pulp_cfg):
 
 
 @pytest.fixture
-def stop_and_check_services(status_api_client, svc_mgr):
+def stop_and_check_services(pulp_cfg, svc_mgr):
     """Stop services and wait up to 30 seconds to check if services have stopped."""
 
     def _stop_and_check_services(pulp_services=None):
         svc_mgr.stop(pulp_services or PULP_SERVICES)
-        for i in range(10):
-            time.sleep(3)
-            try:
-                status_api_client.status_read()
-            except (urllib3.exceptions.MaxRetryError, ApiException):
-                return True
-        return False
+        try:
+            wait_for_status(pulp_cfg, ready=False)
+        except TaskTimedOutError:
+            return False
+        return True
 
     yield _stop_and_check_services
 
 
 @pytest.fixture
-def start_and_check_services(status_api_client, svc_mgr):
+def start_and_check_services(pulp_cfg, svc_mgr):
     """Start services and wait up to 30 seconds to check if services have started."""
 
     def _start_and_check_services(pulp_services=None):
         svc_mgr.start(pulp_services or PULP_SERVICES)
-        for i in range(10):
-            time.sleep(3)
-            try:
-                status, http_code, _ = status_api_client.status_read_with_http_info()
-            except (urllib3.exceptions.MaxRetryError, ApiException):
-                # API is not responding
-                continue
-            else:
-                if (
-                    http_code == 200
-                    and len(status.online_workers) > 0
-                    and len(status.online_content_apps) > 0
-                    and status.database_connection.connected
-                ):
-                    return True
-                else:
-                    # sometimes it takes longer for the content app to start
-                    continue
-        return False
+        try:
+            wait_for_status(pulp_cfg)
+        except TaskTimedOutError:
+            return False
+        return True
 
     yield _start_and_check_services
 
@@ -465,9 +511,40 @@ def ssl_ctx_req_client_auth(
 ## Object Cleanup fixtures
 
 
+def _get_cleanup_waves(obj_refs):
+    """Split objects to clean up into waves, newest first.
+
+    Each wave holds consecutive objects, in reverse creation order, that are
+    handled by the same type of API client.
+    """
+    waves = []
+    for api_client, pulp_href in reversed(obj_refs):
+        if waves and type(waves[-1][0][0]) is type(api_client):
+            waves[-1].append((api_client, pulp_href))
+        else:
+            waves.append([(api_client, pulp_href)])
+    return waves
+
+
+def _delete_for_cleanup(obj_ref):
+    """Delete an object, and return the href of the deletion task or ``None``."""
+    api_client, pulp_href = obj_ref
+    try:
+        return api_client.delete(pulp_href).task
+    except Exception:
+        # There was no delete task for this unit or the unit may already have been deleted.
+        # Also we can never be sure which one is the right ApiException to catch.
+        return None
+
+
 @pytest.fixture(scope="class")
-def add_to_cleanup():
-    """Fixture to allow pulp objects to be deleted in reverse order after the test."""
+def add_to_cleanup(pulp_cfg):
+    """Fixture to allow pulp objects to be deleted in reverse order after the test.
+
+    Objects of the same type are deleted concurrently. A wave of objects of some
+    type is only deleted once the newer objects of other types have been. The
+    deletion tasks are waited for all at once.
+    """
     obj_refs = []
 
     def _add_to_cleanup(api_client, pulp_href):
@@ -477,19 +554,14 @@ def add_to_cleanup():
 
     delete_task_hrefs = []
     # Delete newest items first to avoid dependency lockups
-    for api_client, pulp_href in reversed(obj_refs):
-        try:
-            task_url = api_client.delete(pulp_href).task
-            delete_task_hrefs.append(task_url)
-        except Exception:
-            # There was no delete task for this unit or the unit may already have been deleted.
-            # Also we can never be sure which one is the right ApiException to catch.
-            pass
-
-    for deleted_task_href in delete_task_hrefs:
-        with suppress(ApiException):
-            # The task itself may be gone at this point (e.g. by being part of a deleted domain).
-            monitor_task(deleted_task_href)
+    with ThreadPoolExecutor(max_workers=pulp_cfg.pool_size) as executor:
+        for wave in _get_cleanup_waves(obj_refs):
+            task_hrefs = executor.map(_delete_for_cleanup, wave)
+            delete_task_hrefs.extend(href for href in task_hrefs if href)
+
+    # Tasks that are gone at this point (e.g. by being part of a deleted domain) are dropped.
+    for _ in wait_for_tasks(delete_task_hrefs):
+        pass
 
 
 @pytest.fixture(scope="class")
@@ -1,6 +1,11 @@
 # coding=utf-8
 """Utility functions for Pulp 3 tests."""
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import hashlib
+import os
+import time
 import unittest
 import warnings
 from urllib.parse import urljoin, urlsplit
@@ -10,9 +15,9 @@ import requests
 
 from packaging.version import Version
 
-from pulp_smash import api, cli, config, utils
+from pulp_smash import api, cli, config, polling, utils
 from pulp_smash.log import logger
-from pulp_smash.pulp3.constants import ORPHANS_PATH, STATUS_PATH
+from pulp_smash.pulp3 import constants
 
 
 def require_pulp_3(exc):
@@ -62,7 +67,7 @@ def get_plugins(cfg=None):
     if not cfg:
         cfg = config.get_config()
     client = api.Client(cfg, api.json_handler)
-    status = client.get(STATUS_PATH)
+    status = client.get(constants.STATUS_PATH)
     return {version["component"] for version in status["versions"]}
 
 
@@ -232,6 +237,10 @@ def _build_content_fetcher(content_field):
     def inner(repo, version_href=None):
         """Read the content units of a given repository.
 
+        Each content type is fetched concurrently. At most ``cfg.pool_size``
+        requests are in flight at once, split between the content types and
+        the pages of each content type.
+
         :param repo: A dict of information about the repository.
         :param version_href: The repository version to read. If none, read the
             latest repository version.
@@ -244,13 +253,20 @@ def _build_content_fetcher(content_field):
             # Repository has no latest version, and therefore no content.
             return defaultdict(list)
 
-        client = api.Client(config.get_config(), api.page_handler)
-        repo_version = client.get(version_href)
+        cfg = config.get_config()
+        client = api.Client(cfg, api.page_handler)
+        summary = client.get(version_href)["content_summary"][content_field]
 
         content = defaultdict(list)
-        for content_type, content_dict in repo_version["content_summary"][content_field].items():
-            typed_content = client.get(content_dict["href"])
-            content[content_type] = typed_content
+        if not summary:
+            return content
+        type_workers = min(len(summary), cfg.pool_size)
+        page_workers = max(cfg.pool_size // type_workers, 1)
+        client = client.using_handler(functools.partial(api.page_handler, workers=page_workers))
+        hrefs = [content_dict["href"] for content_dict in summary.values()]
+        with ThreadPoolExecutor(max_workers=type_workers) as executor:
+            for content_type, typed_content in zip(summary, executor.map(client.get, hrefs)):
+                content[content_type] = typed_content
         return content
 
     return inner
@@ -313,7 +329,208 @@ def delete_orphans(cfg=None):
     """
     if cfg is None:
         cfg = config.get_config()
-    api.Client(cfg, api.task_handler).delete(ORPHANS_PATH)
+    api.Client(cfg, api.task_handler).delete(constants.ORPHANS_PATH)
+
+
+def upload_artifact(
+    source, cfg=None, chunk_size=utils.UPLOAD_CHUNK_SIZE, max_workers=None, progress=None
+):
+    """Upload a file to Pulp in chunks, and create an artifact from it.
+
+    Do the following:
+
+    1. Create an upload.
+    2. Send the file in chunks, each with a ``Content-Range`` header. Several
+       chunks are sent at once, over the pooled connections of
+       :class:`pulp_smash.api.Client`. The sha256 checksum of the file is
+       computed as it is read.
+    3. Commit the upload, and wait for the artifact to be created.
+
+    An empty file can't be sent as a ranged chunk, so it's posted to
+    ``ARTIFACTS_PATH`` instead.
+
+    :param source: The path to a file, which is memory-mapped, a seekable file
+        object opened in binary mode, which is read from its current position,
+        or a bytes-like object.
+    :param pulp_smash.config.PulpSmashConfig cfg: Information about the Pulp
+        host.
+    :param chunk_size: The number of bytes sent per request.
+    :param max_workers: The number of chunks sent at once. Defaults to
+        ``cfg.pool_size``.
+    :param progress: A callable accepting a
+        :class:`pulp_smash.utils.UploadProgress`, called each time a chunk is
+        sent.
+    :returns: The href of the artifact.
+    :raises TypeError: If ``source`` is of none of the types above.
+    """
+    if cfg is None:
+        cfg = config.get_config()
+    size = _get_upload_size(source)
+    client = api.Client(cfg, api.json_handler)
+    if size == 0:
+        return client.post(constants.ARTIFACTS_PATH, files={"file": b""})["pulp_href"]
+    upload_href = client.post(constants.UPLOAD_PATH, {"size": size})["pulp_href"]
+    sha256 = hashlib.sha256()
+
+    def read():
+        # Chunks are read, and hashed, in order, even though they're sent
+        # concurrently.
+        for offset, chunk in utils.iter_chunks(source, chunk_size):
+            sha256.update(chunk)
+            yield offset, chunk
+
+    def put(offset, chunk):
+        content_range = "bytes {}-{}/{}".format(offset, offset + len(chunk) - 1, size)
+        client.put(upload_href, files={"file": chunk}, headers={"Content-Range": content_range})
+
+    utils.upload_chunks(put, read(), max_workers=max_workers or cfg.pool_size, progress=progress)
+    artifact = client.using_handler(api.task_handler).post(
+        urljoin(upload_href, "commit/"), {"sha256": sha256.hexdigest()}
+    )
+    return artifact["pulp_href"]
+
+
+def _get_upload_size(source):
+    """Return the number of bytes :func:`upload_artifact` will send from ``source``."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return memoryview(source).nbytes
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if hasattr(source, "read") and hasattr(source, "seek"):
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END) - position
+        source.seek(position)
+        return size
+    raise TypeError(
+        "Expected a path, a seekable file object or a bytes-like object, not {!r}.".format(
+            type(source)
+        )
+    )
+
+
+def wait_for_tasks(task_hrefs, cfg=None):
+    """Wait for many tasks at once. Yield each task as it finishes.
+
+    Rather than polling each task individually, as
+    :func:`pulp_smash.api.poll_task` does, list the unfinished tasks with
+    ``pulp_href__in`` queries against ``TASKS_PATH``. Each round of polling
+    therefore costs one request per 50 unfinished tasks. Tasks missing from a
+    listing are read by href, and dropped if they no longer exist. If Pulp
+    ignores the filter, each task is read by href from then on.
+
+    Unlike :func:`pulp_smash.api.poll_task`, failed tasks don't raise, and
+    child tasks aren't waited for.
+
+    :param task_hrefs: An iterable of task hrefs.
+    :param pulp_smash.config.PulpSmashConfig cfg: Information about the Pulp
+        host.
+    :returns: A generator yielding the final state of each task, in the order
+        in which the tasks finish.
+    :raises pulp_smash.exceptions.TaskTimedOutError: If some tasks are ongoing
+        after ``cfg.timeout`` seconds.
+    """
+    if cfg is None:
+        cfg = config.get_config()
+    client = api.Client(cfg, api.page_handler)
+
+    def fetch(hrefs):
+        params = {"pulp_href__in": ",".join(hrefs), "limit": len(hrefs)}
+        return {task["pulp_href"]: task for task in client.get(constants.TASKS_PATH, params=params)}
+
+    def fetch_one(href):
+        try:
+            return client.using_handler(api.json_handler).get(href)
+        except requests.exceptions.HTTPError as exc:
+            if exc.response is not None and exc.response.status_code == 404:
+                return None
+            raise
+
+    return polling.poll_many(
+        fetch,
+        task_hrefs,
+        lambda task: task["state"] in api._P3_TASK_END_STATES,  # pylint:disable=protected-access
+        cfg.timeout,
+        polling.get_strategy(cfg),
+        "Task",
+        fetch_one=fetch_one,
+    )
+
+
+STATUS_PHASES = ("api", "database", "workers", "content apps")
+"""The phases through which Pulp goes while starting up.
+
+See :func:`wait_for_status`.
+"""
+
+
+def wait_for_status(cfg=None, ready=True, timeout=30, strategy=None):
+    """Poll the status API until Pulp is ready, or until it is down.
+
+    Pulp goes through each of :data:`STATUS_PHASES` while starting up. It
+    reaches them when its status API answers, its database is connected, at
+    least one worker is online and at least one content app is online,
+    respectively. Pulp is ready once it has reached all phases.
+
+    This is useful after starting or stopping services, e.g. with a
+    :class:`pulp_smash.cli.GlobalServiceManager`. For example:
+
+    >>> svc_mgr.restart(['pulpcore-api', 'pulpcore-worker@1'])
+    >>> wait_for_status(cfg)
+    {'api': 0.51, 'database': 0.51, 'workers': 1.42, 'content apps': 1.42}
+
+    :param pulp_smash.config.PulpSmashConfig cfg: Information about the Pulp
+        host.
+    :param ready: Whether to wait for Pulp to be ready. If false, wait for the
+        status API to stop answering instead.
+    :param timeout: The number of seconds after which to give up.
+    :param strategy: A polling strategy, as described in
+        :mod:`pulp_smash.polling`. Defaults to checking after 0.1 seconds,
+        and then backing off to one check every 2 seconds.
+    :returns: A dict mapping each phase reached to the number of seconds it
+        took to reach it. If ``ready`` is false, the only phase is "down".
+    :raises pulp_smash.exceptions.TaskTimedOutError: If Pulp isn't ready, or
+        isn't down, after ``timeout`` seconds.
+    """
+    if cfg is None:
+        cfg = config.get_config()
+    if strategy is None:
+        strategy = polling.ExponentialBackoff(initial_interval=0.1, max_interval=2)
+    client = api.Client(cfg, api.json_handler)
+    start = time.monotonic()
+    timings = {}
+
+    def fetch():
+        try:
+            status = client.get(constants.STATUS_PATH, timeout=min(timeout, 5))
+        except (requests.exceptions.RequestException, ValueError):
+            # While Pulp restarts, a proxy in front of it may answer with an
+            # error page, which isn't JSON.
+            status = None
+        if not ready:
+            reached = {"down": status is None}
+        elif status is None:
+            reached = dict.fromkeys(STATUS_PHASES, False)
+        else:
+            reached = {
+                "api": True,
+                "database": status["database_connection"]["connected"],
+                "workers": bool(status["online_workers"]),
+                "content apps": bool(status["online_content_apps"]),
+            }
+        for phase, is_reached in reached.items():
+            if is_reached:
+                timings.setdefault(phase, time.monotonic() - start)
+        return reached
+
+    polling.poll_until(
+        fetch,
+        lambda reached: all(reached.values()),
+        timeout,
+        strategy,
+        "Pulp status" if ready else "Pulp shutdown",
+    )
+    logger.debug("Pulp status phases reached after: %s", timings)
+    return timings
 
 
 def get_versions(repo, params=None):
@@ -324,7 +541,7 @@ def get_versions(repo, params=None):
         filter which versions are returned.
     :returns: A sorted list of dicts of information about repository versions.
     """
-    client = api.Client(config.get_config(), api.page_handler)
+    client = api.Client(config.get_config(), api.parallel_page_handler)
     versions = client.get(repo["versions_href"], params=params)
     versions.sort(key=lambda version: int(urlsplit(version["pulp_href"]).path.split("/")[-2]))
     return versions
@@ -1,13 +1,16 @@
 # coding=utf-8
 """Tools for selecting and deselecting tests."""
+import os
+import time
 import warnings
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 
 import requests
 from packaging.version import Version
 
-from pulp_smash import exceptions
+from pulp_smash import exceptions, utils
 
 # These are all possible values for a bug's "status" field.
 #
@@ -45,6 +48,14 @@ _TESTABLE_BUGS = frozenset(
 #
 _BUG_STATUS_CACHE = {}
 
+# The number of seconds for which a bug fetched from the bug tracker is
+# considered fresh by `_get_bug`. Can be overridden with the
+# PULP_SMASH_BUG_CACHE_TTL environment variable.
+_BUG_CACHE_TTL = 24 * 60 * 60
+
+# The number of seconds to wait for the bug tracker when fetching a bug.
+_BUG_FETCH_TIMEOUT = 10
+
 
 # Information about a Pulp bug. (See: https://pulp.plan.io)
 #
@@ -97,10 +108,58 @@ def _convert_tpr(version_string):
     return Version(version_string)
 
 
+def _get_bug_cache_path():
+    """Return the path to the on-disk bug cache.
+
+    See :func:`pulp_smash.utils.get_cache_path`.
+    """
+    return utils.get_cache_path("bugs.json")
+
+
+def _is_fresh(entry):
+    """Tell whether a bug cache entry may be used without fetching it again."""
+    if os.environ.get("PULP_SMASH_OFFLINE"):
+        return True
+    ttl = float(os.environ.get("PULP_SMASH_BUG_CACHE_TTL", _BUG_CACHE_TTL))
+    return time.time() - entry["fetched"] < ttl
+
+
+def _fetch_bug(bug_id):
+    """Fetch bug ``bug_id`` from https://pulp.plan.io.
+
+    :returns: A dict with "status", "target_platform_release" and "fetched"
+        keys. The latter is the time at which the bug was fetched, in seconds
+        since the epoch. This is the format of the on-disk bug cache entries.
+    """
+    response = requests.get(
+        "https://pulp.plan.io/issues/{}.json".format(bug_id), timeout=_BUG_FETCH_TIMEOUT
+    )
+    response.raise_for_status()
+    bug_json = response.json()
+    tpr = _get_tpr(bug_json)
+    _convert_tpr(tpr)  # Don't cache invalid versions.
+    return {
+        "status": bug_json["issue"]["status"]["name"],
+        "target_platform_release": tpr,
+        "fetched": time.time(),
+    }
+
+
 def _get_bug(bug_id):
     """Fetch information about bug ``bug_id`` from https://pulp.plan.io.
 
     Return a ``_Bug`` instance.
+
+    Bugs are cached in memory, and on disk at :func:`_get_bug_cache_path`, so
+    that concurrent and later test runs needn't fetch them again. A bug cached
+    on disk is fetched again once it is older than ``_BUG_CACHE_TTL`` seconds.
+    If the bug tracker can't be reached, or answers with an error, a stale bug
+    is used instead, and a warning is issued. If the ``PULP_SMASH_OFFLINE`` environment variable is
+    set, the bug tracker is never contacted, and cached bugs are used no matter
+    their age.
+
+    :raises: ``requests.exceptions.RequestException`` if the bug can neither be
+        fetched nor found in the cache.
     """
     # It's rarely a good idea to do type checking in a duck-typed language.
     # However, efficiency dictates we do so here. Without this type check, the
@@ -124,16 +183,80 @@ def _get_bug(bug_id):
     except KeyError:
         pass
 
-    # The bug is not cached. Let's fetch, cache and return it.
-    response = requests.get("https://pulp.plan.io/issues/{}.json".format(bug_id))
-    response.raise_for_status()
-    bug_json = response.json()
+    # The bug is not cached in memory. Let's try the on-disk cache.
+    entry = utils.read_json_cache(_get_bug_cache_path()).get(str(bug_id))
+    if entry is None and os.environ.get("PULP_SMASH_OFFLINE"):
+        raise requests.exceptions.ConnectionError(
+            "Bug {} isn't cached, and PULP_SMASH_OFFLINE is set.".format(bug_id)
+        )
+    if entry is None or not _is_fresh(entry):
+        # The bug is missing or stale. Let's fetch and cache it.
+        try:
+            fresh_entry = _fetch_bug(bug_id)
+        except requests.exceptions.RequestException as err:
+            if entry is None:
+                raise
+            warnings.warn(
+                "Cannot contact the bug tracker. Pulp Smash will use a stale "
+                "copy of bug {}. Error: {}".format(bug_id, err),
+                RuntimeWarning,
+            )
+        else:
+            utils.update_json_cache(_get_bug_cache_path(), {str(bug_id): fresh_entry})
+            entry = fresh_entry
+
     _BUG_STATUS_CACHE[bug_id] = _Bug(
-        bug_json["issue"]["status"]["name"], _convert_tpr(_get_tpr(bug_json))
+        entry["status"], _convert_tpr(entry["target_platform_release"])
     )
     return _BUG_STATUS_CACHE[bug_id]
 
 
+def prefetch_bugs(bug_ids, workers=8):
+    """Fetch many bugs concurrently, and cache them.
+
+    Fetching bugs up front, before any test runs, keeps bug tracker latency
+    out of individual tests. Bugs that are cached and fresh aren't fetched.
+    The on-disk bug cache isn't locked while bugs are being fetched, so that
+    concurrent callers, such as pytest-xdist workers, never wait on one
+    another's connections to the bug tracker. Fetched bugs are merged into
+    the cache afterwards.
+
+    Bugs that can't be fetched are skipped. They are dealt with as usual when
+    :func:`bug_is_fixed` is called.
+
+    :param bug_ids: An iterable of integer bug IDs.
+    :param workers: The maximum number of bugs fetched at once.
+    :returns: The set of the given bug IDs that are now cached in memory.
+    """
+    requested = set(bug_ids)
+    bug_ids = {bug_id for bug_id in requested if bug_id not in _BUG_STATUS_CACHE}
+    path = _get_bug_cache_path()
+    cache = utils.read_json_cache(path)
+    usable = {
+        bug_id: cache[str(bug_id)]
+        for bug_id in bug_ids
+        if str(bug_id) in cache and _is_fresh(cache[str(bug_id)])
+    }
+    missing = [] if os.environ.get("PULP_SMASH_OFFLINE") else bug_ids - set(usable)
+    if missing:
+        fetched = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {bug_id: executor.submit(_fetch_bug, bug_id) for bug_id in missing}
+        for bug_id, future in futures.items():
+            try:
+                fetched[bug_id] = future.result()
+            except Exception:  # pylint:disable=broad-except
+                pass
+        if fetched:
+            utils.update_json_cache(path, {str(bug_id): entry for bug_id, entry in fetched.items()})
+        usable.update(fetched)
+    for bug_id, entry in usable.items():
+        _BUG_STATUS_CACHE[bug_id] = _Bug(
+            entry["status"], _convert_tpr(entry["target_platform_release"])
+        )
+    return requested & set(_BUG_STATUS_CACHE)
+
+
 def bug_is_fixed(bug_id, pulp_version):
     """Tell the caller whether bug ``bug_id`` should be tested.
 
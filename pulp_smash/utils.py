@@ -4,20 +4,47 @@
 This module may make use of :mod:`pulp_smash.api` and :mod:`pulp_smash.cli`,
 but the reverse should not be done.
 """
+import collections
 import contextlib
 import hashlib
 import json
+import mmap
+import os
+import tempfile
+import time
 import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from urllib.parse import urlparse
 
 import requests
+from xdg import BaseDirectory
 
-from pulp_smash import cli, exceptions
+from pulp_smash import cli
 from pulp_smash.log import logger
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
 # A mapping between URLs and SHA 256 checksums. Used by get_sha256_checksum().
 _CHECKSUM_CACHE = {}
 
+# A mapping between hosts and the paths to their pulpcore-manager executables.
+# Used by execute_pulpcore_python().
+_PULPCORE_MANAGER_CACHE = {}
+
+# A mapping between hosts and dicts of the Pulp settings read from them. Used
+# by get_pulp_settings().
+_PULP_SETTINGS_CACHE = {}
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+"""The default number of bytes read by :func:`iter_chunks` at a time."""
+
+# The progress of an upload, as reported by upload_chunks(). The throughput is
+# in bytes per second.
+UploadProgress = collections.namedtuple("UploadProgress", "bytes_sent elapsed throughput")
+
 
 def get_os_release_id(cfg, pulp_host=None):
     """Get ``ID`` from ``/etc/os-release``.
@@ -29,11 +56,7 @@ def get_os_release_id(cfg, pulp_host=None):
     :returns: A string such as "rhel," "fedora," or "arch." (These values come
         from Red Hat Enterprise Linux, Fedora, and Arch Linux respectively.)
     """
-    return (
-        cli.Client(cfg, pulp_host=pulp_host)
-        .run(("bash", "-c", '(source /etc/os-release && echo "$ID")'))
-        .stdout.strip()
-    )
+    return cli.get_host_facts(cfg, pulp_host)["os_release_id"]
 
 
 def get_os_release_version_id(cfg, pulp_host=None):
@@ -48,11 +71,7 @@ def get_os_release_version_id(cfg, pulp_host=None):
         actual version object if doing version number comparisons.
         ``packaging.version.Version`` can be used for this purpose.
     """
-    return (
-        cli.Client(cfg, pulp_host=pulp_host)
-        .run(("bash", "-c", '(source /etc/os-release && echo "$VERSION_ID")'))
-        .stdout.strip()
-    )
+    return cli.get_host_facts(cfg, pulp_host)["os_release_version_id"]
 
 
 def get_sha256_checksum(url):
@@ -99,12 +118,7 @@ def fips_is_supported(cfg, pulp_host=None):
         instead of the default chosen by :class: pulp_smash.cli.Client`.
     :return: True of False
     """
-    try:
-        cli.Client(cfg, pulp_host=pulp_host).run(("sysctl", "crypto.fips_enabled"))
-    except exceptions.CalledProcessError as e:
-        logger.exception(e)
-        return False
-    return True
+    return cli.get_host_facts(cfg, pulp_host)["fips_enabled"] is not None
 
 
 def fips_is_enabled(cfg, pulp_host=None):
@@ -116,12 +130,7 @@ def fips_is_enabled(cfg, pulp_host=None):
         instead of the default chosen by :class: pulp_smash.cli.Client`.
     :return: True of False
     """
-    return (
-        cli.Client(cfg, pulp_host=pulp_host)
-        .run(("sysctl", "--values", "crypto.fips_enabled"))
-        .stdout.strip()
-        == "1"
-    )
+    return cli.get_host_facts(cfg, pulp_host)["fips_enabled"] == "1"
 
 
 def uuid4():
@@ -150,28 +159,266 @@ def ensure_teardownclass(testcase):
         stack.pop_all()
 
 
-def execute_pulpcore_python(cli_client, command):
-    """Execute command in pulpcore-manager on system under test."""
+def get_cache_path(file_name):
+    """Return the path to a file in Pulp Smash's cache directory.
+
+    The directory is named ``pulp_smash``, within ``$XDG_CACHE_HOME``. In
+    practice, this typically means ``~/.cache/pulp_smash/``. It is created if
+    it doesn't exist.
+
+    :param file_name: The name of a file, such as ``bugs.json``.
+    """
+    return os.path.join(BaseDirectory.save_cache_path("pulp_smash"), file_name)
+
+
+@contextlib.contextmanager
+def lock_file(path, exclusive=True):
+    """Hold a lock on the file at ``path`` for the duration of a block.
+
+    Shared locks may be held by many processes at once, and an exclusive lock
+    by one process alone. The lock is taken on a sibling ``.lock`` file, so
+    that the file itself may be atomically replaced. On platforms without
+    ``fcntl``, no lock is taken.
+    """
+    if fcntl is None:  # pragma: no cover
+        yield
+        return
+    with open(path + ".lock", "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+
+def load_json_file(path):
+    """Return the JSON-decoded contents of the file at ``path``, without locking.
+
+    Return an empty dict if the file is missing or corrupt.
+    """
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_json_file(path, data):
+    """Atomically replace the file at ``path`` with ``data``, without locking.
+
+    Readers never see a partially written file.
+    """
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(handle, "w") as tmp:
+            json.dump(data, tmp)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def read_json_cache(path):
+    """Return the entries of the JSON cache file at ``path``.
+
+    See :func:`update_json_cache`.
+    """
+    with lock_file(path, exclusive=False):
+        return load_json_file(path)
+
+
+def update_json_cache(path, entries):
+    """Merge ``entries`` into the JSON cache file at ``path``.
+
+    A JSON cache file holds a JSON object. Concurrent writers, such as
+    pytest-xdist workers, are serialized by a lock, and each write merges into
+    the current contents of the file.
+
+    :param entries: A dict to merge into the cache.
+    """
+    with lock_file(path):
+        cache = load_json_file(path)
+        cache.update(entries)
+        save_json_file(path, cache)
+
+
+def _get_host_key(cli_client):
+    """Return a hashable key identifying the host targeted by ``cli_client``.
+
+    See :attr:`pulp_smash.cli.Client.host_key`.
+    """
+    return cli_client.host_key
+
+
+def _get_pulpcore_manager(cli_client):
+    """Return the path to ``pulpcore-manager`` on the host under test.
+
+    On hosts which aren't containers, the path is found by looking for the
+    Python interpreter running pulpcore. It is found once per host.
+    """
     if cli_client.transport in ["docker", "podman", "kubectl"]:
-        manager = "pulpcore-manager"
-    else:
+        return "pulpcore-manager"
+    key = _get_host_key(cli_client)
+    if key not in _PULPCORE_MANAGER_CACHE:
         ps_output = cli_client.run(("ps", "ax")).stdout.splitlines()
         bin_dir = "/usr/local/bin"
         for line in ps_output:
             if "pulpcore" in line and "bin/python" in line:
                 bin_dir = line.split()[5].rsplit("/", maxsplit=1)[0]
-        manager = "{}/pulpcore-manager".format(bin_dir)
+        _PULPCORE_MANAGER_CACHE[key] = "{}/pulpcore-manager".format(bin_dir)
+    return _PULPCORE_MANAGER_CACHE[key]
+
+
+def execute_pulpcore_python(cli_client, command):
+    """Execute command in pulpcore-manager on system under test."""
+    manager = _get_pulpcore_manager(cli_client)
     return cli_client.run((manager, "shell", "-c", command)).stdout.rstrip("\n")
 
 
+def get_pulp_settings(cli_client, setting_names):
+    """Retrieve the values of several Pulp settings from the system under test.
+
+    All settings not already known are read with a single ``pulpcore-manager``
+    invocation. Values are remembered per host for the lifetime of this
+    process. Call :func:`invalidate_pulp_settings` to forget them, e.g. after
+    changing the settings of the system under test.
+
+    :param pulp_smash.cli.Client cli_client: A client targeting the host on
+        which Pulp runs.
+    :param setting_names: An iterable of setting names.
+    :returns: A dict mapping each setting name to its value. The value of a
+        missing setting is ``None``, and sets are returned as lists.
+    """
+    setting_names = list(setting_names)
+    cache = _PULP_SETTINGS_CACHE.setdefault(_get_host_key(cli_client), {})
+    missing = [name for name in setting_names if name not in cache]
+    if missing:
+        command = (
+            "import json; from django.conf import settings;"
+            "values = {{name: getattr(settings, name, None) for name in {!r}}};"
+            "print(json.dumps({{name: list(value) if isinstance(value, set) else value "
+            "for name, value in values.items()}}))".format(missing)
+        )
+        # Only the last line holds the values. Django may print warnings first.
+        json_values = execute_pulpcore_python(cli_client, command).splitlines()[-1]
+        cache.update(json.loads(json_values))
+    return {name: cache[name] for name in setting_names}
+
+
 def get_pulp_setting(cli_client, setting_name):
-    """Retrieves the value of a Pulp setting from system under test."""
-    command = (
-        "import json; from django.conf import settings;"
-        "cfg_value = getattr(settings,'{}', None);"
-        "value = cfg_value if not isinstance(cfg_value, set) else list(cfg_value);"
-        "print(json.dumps(value))".format(setting_name)
-    )
-    json_value = execute_pulpcore_python(cli_client, command)
-    value = json.loads(json_value)
-    return value
+    """Retrieves the value of a Pulp setting from system under test.
+
+    See :func:`get_pulp_settings`.
+    """
+    return get_pulp_settings(cli_client, (setting_name,))[setting_name]
+
+
+def invalidate_pulp_settings(cli_client=None):
+    """Forget the Pulp settings read by :func:`get_pulp_settings`.
+
+    :param pulp_smash.cli.Client cli_client: A client targeting the host whose
+        settings should be forgotten. If omitted, forget the settings of all
+        hosts.
+    :returns: Nothing.
+    """
+    if cli_client is None:
+        _PULP_SETTINGS_CACHE.clear()
+    else:
+        _PULP_SETTINGS_CACHE.pop(_get_host_key(cli_client), None)
+
+
+def iter_chunks(source, chunk_size=UPLOAD_CHUNK_SIZE):
+    """Read ``source`` in chunks. Yield ``(offset, chunk)`` pairs.
+
+    The whole of ``source`` is never held in memory, unless it's given as a
+    bytes-like object. Each chunk is a ``bytes`` object of ``chunk_size``
+    bytes, except for the last, which may be shorter. An empty ``source``
+    yields nothing.
+
+    :param source: The data to read. Either a bytes-like object, the path to a
+        file, which is memory-mapped, a binary file object, or an iterable of
+        bytes-like objects of any size.
+    :param chunk_size: The number of bytes in each chunk.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive, not {}".format(chunk_size))
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for offset in range(0, len(view), chunk_size):
+            yield offset, bytes(view[offset : offset + chunk_size])  # noqa: E203
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as handle:
+            # Empty files can't be memory-mapped.
+            if os.fstat(handle.fileno()).st_size:
+                with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    yield from iter_chunks(mapped, chunk_size)
+    elif isinstance(source, mmap.mmap):
+        for offset in range(0, len(source), chunk_size):
+            yield offset, source[offset : offset + chunk_size]  # noqa: E203
+    elif hasattr(source, "read"):
+        offset = 0
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            yield offset, chunk
+            offset += len(chunk)
+    else:
+        offset = 0
+        buffer = bytearray()
+        for data in source:
+            buffer += data
+            while len(buffer) >= chunk_size:
+                yield offset, bytes(buffer[:chunk_size])
+                del buffer[:chunk_size]
+                offset += chunk_size
+        if buffer:
+            yield offset, bytes(buffer)
+
+
+def upload_chunks(put, chunks, max_workers=1, progress=None):
+    """Send ``chunks`` concurrently, by passing each of them to ``put``.
+
+    At most ``max_workers`` chunks are sent at once, and at most twice as many
+    are held in memory. ``chunks`` is consumed lazily, so that large sources
+    may be streamed. If a chunk can't be sent, the remaining chunks aren't
+    sent, and the exception is raised.
+
+    :param put: A callable accepting an offset and a chunk, and sending them.
+    :param chunks: An iterable of ``(offset, chunk)`` pairs, such as one
+        returned by :func:`iter_chunks`.
+    :param max_workers: The number of chunks to send at once.
+    :param progress: A callable accepting a
+        :class:`pulp_smash.utils.UploadProgress`. It's called each time a
+        chunk is sent.
+    :returns: The number of bytes sent.
+    """
+    start = time.monotonic()
+    bytes_sent = 0
+    pending = set()
+
+    def reap(futures):
+        nonlocal bytes_sent
+        for future in futures:
+            bytes_sent += future.result()
+            if progress:
+                elapsed = time.monotonic() - start
+                throughput = bytes_sent / elapsed if elapsed else float("inf")
+                progress(UploadProgress(bytes_sent, elapsed, throughput))
+
+    def send(offset, chunk):
+        put(offset, chunk)
+        return len(chunk)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for offset, chunk in chunks:
+                if len(pending) >= 2 * max_workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    reap(done)
+                pending.add(executor.submit(send, offset, chunk))
+            done, pending = wait(pending)
+            reap(done)
+        except BaseException:
+            for future in pending:
+                future.cancel()
+            raise
+    logger.debug("Uploaded %s bytes in %.3fs", bytes_sent, time.monotonic() - start)
+    return bytes_sent
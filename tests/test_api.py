@@ -1,6 +1,9 @@
 # coding=utf-8
 """Unit tests for :mod:`pulp_smash.api`."""
+import http.server
+import threading
 import unittest
+import warnings
 from unittest import mock
 
 from packaging.version import Version
@@ -191,6 +194,142 @@ class PageHandlerTestCase(unittest.TestCase):
         self.assertEqual(return_value, [1, 2, 3, 4])
 
 
+class ParallelPageHandlerTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.api.parallel_page_handler`."""
+
+    def setUp(self):
+        """Create a client that pretends to be a Pulp 3 API client."""
+        self.client = mock.Mock()
+        self.client._cfg.pulp_version = Version("3")  # pylint:disable=protected-access
+        self.client._cfg.pool_size = 3  # pylint:disable=protected-access
+
+    def test_offsets(self):
+        """Assert the remaining pages are fetched by offset, in order."""
+        first_page = {
+            "count": 7,
+            "next": "http://example.com/foo/?limit=2&offset=2&bar=baz",
+            "results": [0, 1],
+        }
+        with mock.patch.object(api, "json_handler", return_value=first_page):
+            with mock.patch.object(api, "Client") as client:
+                client.return_value.get.side_effect = lambda url: {
+                    "results": [url.rsplit("offset=")[1].split("&")[0]]
+                }
+                results = api.parallel_page_handler(self.client, mock.Mock())
+        self.assertEqual(results, [0, 1, "2", "4", "6"])
+        self.assertEqual(
+            sorted(call[0][0] for call in client.return_value.get.call_args_list),
+            [
+                "http://example.com/foo/?limit=2&offset={}&bar=baz".format(offset)
+                for offset in (2, 4, 6)
+            ],
+        )
+
+    def test_query_kept(self):
+        """Assert repeated and blank params of the ``next`` link are kept."""
+        first_page = {
+            "count": 5,
+            "next": "/foo/?fields=a&limit=2&fields=b&q=&offset=2",
+            "results": [0, 1],
+        }
+        with mock.patch.object(api, "json_handler", return_value=first_page):
+            with mock.patch.object(api, "Client") as client:
+                client.return_value.get.return_value = {"results": []}
+                api.parallel_page_handler(self.client, mock.Mock())
+        self.assertEqual(
+            sorted(call[0][0] for call in client.return_value.get.call_args_list),
+            ["/foo/?fields=a&limit=2&fields=b&q=&offset={}".format(offset) for offset in (2, 4)],
+        )
+
+    def test_cursor(self):
+        """Assert ``next`` links are followed if they have no offset."""
+        first_page = {"count": 3, "next": "/foo/?cursor=abc", "results": [0]}
+        with mock.patch.object(api, "json_handler", return_value=first_page):
+            with mock.patch.object(api, "Client") as client:
+                client.return_value.get.side_effect = (
+                    {"next": "/foo/?cursor=def", "results": [1]},
+                    {"next": None, "results": [2]},
+                )
+                results = api.parallel_page_handler(self.client, mock.Mock())
+        self.assertEqual(results, [0, 1, 2])
+
+
+class PageIterHandlerTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.api.page_iter_handler`."""
+
+    def test_not_a_page(self):
+        """Assert non-paginated responses are immediately returned."""
+        kwargs = {key: mock.Mock() for key in _HANDLER_ARGS}
+        kwargs["client"]._cfg.pulp_version = Version("3")  # pylint:disable=protected-access
+        with mock.patch.object(api, "json_handler") as json_handler:
+            json_handler.return_value = {}
+            return_value = api.page_iter_handler(**kwargs)
+        self.assertIs(return_value, json_handler.return_value)
+
+    def test_is_a_page(self):
+        """Assert pages are fetched lazily, and the count is known up front."""
+        kwargs = {key: mock.Mock() for key in _HANDLER_ARGS}
+        kwargs["client"]._cfg.pulp_version = Version("3")  # pylint:disable=protected-access
+        with mock.patch.object(api, "json_handler") as json_handler:
+            json_handler.return_value = {"count": 4, "results": [1, 2]}
+            results = api.page_iter_handler(**kwargs)
+        self.assertEqual(results.count, 4)
+        with mock.patch.object(api, "_walk_pages") as walk_pages:
+            walk_pages.return_value = iter(((1, 2), (3, 4)))
+            iterator = iter(results)
+            self.assertEqual(walk_pages.call_count, 0)
+            self.assertEqual(next(iterator), 1)
+            self.assertEqual(list(iterator), [2, 3, 4])
+
+    def test_iter_pages(self):
+        """Assert :func:`pulp_smash.api.iter_pages` sends the page size."""
+        client = mock.Mock()
+        api.iter_pages(client, "/foo/", limit=10, params={"bar": "baz"})
+        client.using_handler.assert_called_once_with(api.page_iter_handler)
+        client.using_handler.return_value.get.assert_called_once_with(
+            "/foo/", params={"bar": "baz", "limit": 10}
+        )
+
+
+class TaskHandlerTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.api.task_handler`."""
+
+    def setUp(self):
+        """Create a response to a POST request that spawned a task."""
+        self.response = Response()
+        self.response.status_code = 202
+        self.response._content = b'{"task": "/tasks/1/"}'  # pylint:disable=protected-access
+        self.response.headers["Content-Type"] = "application/json"
+        self.response.request = mock.Mock(method="POST")
+        self.client = mock.Mock()
+        self.client._cfg.pulp_version = Version("3")  # pylint:disable=protected-access
+        self.done_task = {
+            "pulp_href": "/tasks/1/",
+            "created_resources": ["/foo/1/"],
+            "error": None,
+        }
+
+    def test_single_poll(self):
+        """Assert the spawned task is polled once and not re-read."""
+        with mock.patch.object(api, "poll_spawned_tasks") as poll_spawned_tasks:
+            poll_spawned_tasks.return_value = iter((self.done_task,))
+            with mock.patch.object(self.response, "json", wraps=self.response.json) as json:
+                api.smart_handler(self.client, self.response)
+        self.assertEqual(poll_spawned_tasks.call_count, 1)
+        self.assertEqual(json.call_count, 1)
+        get = self.client.using_handler.return_value.get
+        self.assertEqual(get.call_args_list, [mock.call("/foo/1/")])
+
+    def test_unpolled_task(self):
+        """Assert the task is re-read if it wasn't among the polled tasks."""
+        with mock.patch.object(api, "poll_spawned_tasks") as poll_spawned_tasks:
+            poll_spawned_tasks.return_value = iter(())
+            get = self.client.using_handler.return_value.get
+            get.return_value = self.done_task
+            api.task_handler(self.client, self.response)
+        self.assertEqual(get.call_args_list, [mock.call("/tasks/1/"), mock.call("/foo/1/")])
+
+
 class ClientTestCase(unittest.TestCase):
     """Tests for :class:`pulp_smash.api.Client`."""
 
@@ -248,6 +387,114 @@ class ClientTestCase2(unittest.TestCase):
                 self.assertIs(request.call_args[1]["json"], json)
 
 
+class SessionTestCase(unittest.TestCase):
+    """Tests for the sessions shared by :class:`pulp_smash.api.Client`."""
+
+    def setUp(self):
+        """Start each test without any pooled sessions."""
+        api.close_sessions()
+        self.addCleanup(api.close_sessions)
+
+    def test_shared_per_host(self):
+        """Assert clients targeting the same host share one session."""
+        cfg = _get_pulp_smash_config()
+        client = api.Client(cfg)
+        self.assertIs(client.session, api.Client(cfg, api.json_handler).session)
+        self.assertIs(client.session, client.using_handler(api.echo_handler).session)
+
+    def test_not_shared_across_hosts(self):
+        """Assert clients targeting different hosts use different sessions."""
+        hosts = [
+            config.PulpHost(hostname=hostname, roles={"api": {"scheme": "http"}})
+            for hostname in ("first.example.com", "second.example.com")
+        ]
+        cfg = _get_pulp_smash_config(hosts=hosts)
+        self.assertIsNot(
+            api.Client(cfg, pulp_host=hosts[0]).session,
+            api.Client(cfg, pulp_host=hosts[1]).session,
+        )
+
+    def test_pool_size(self):
+        """Assert the connection pool is bounded by ``cfg.pool_size``."""
+        session = api.Client(_get_pulp_smash_config(pool_size=3)).session
+        adapter = session.get_adapter("http://example.com")
+        self.assertEqual(adapter._pool_maxsize, 3)  # pylint:disable=protected-access
+        self.assertFalse(adapter._pool_block)  # pylint:disable=protected-access
+
+    def test_pool_exhausted(self):
+        """Assert unread streamed responses don't block later requests."""
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):  # pylint:disable=invalid-name
+                """Send a small body."""
+                self.send_response(200)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, *args):  # pylint:disable=arguments-differ
+                """Log nothing."""
+
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        hosts = [
+            config.PulpHost(
+                hostname="127.0.0.1",
+                roles={"api": {"scheme": "http", "port": server.server_address[1]}},
+            )
+        ]
+        client = api.Client(_get_pulp_smash_config(hosts=hosts, pool_size=2), api.echo_handler)
+        responses = []
+        thread = threading.Thread(
+            target=lambda: responses.extend(client.get("/", stream=True) for _ in range(3)),
+            daemon=True,
+        )
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual([response.status_code for response in responses], [200] * 3)
+        for response in responses:
+            response.close()
+
+    def test_request_uses_session(self):
+        """Assert requests are sent through the pooled session."""
+        client = api.Client(_get_pulp_smash_config(), api.echo_handler)
+        with mock.patch.object(client.session, "request") as request:
+            response = client.get("/foo/")
+        self.assertIs(response, request.return_value)
+        self.assertEqual(request.call_args[1]["url"], "http://example.com/foo/")
+
+    def test_foreign_host(self):
+        """Assert a warning is emitted only if a request targets another host."""
+        client = api.Client(_get_pulp_smash_config(), api.echo_handler)
+        with mock.patch.object(client.session, "request"):
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                client.get("/foo/")
+                client.get("http://example.com:80/foo/")
+            with self.assertWarns(RuntimeWarning):
+                client.get("http://other.example.com/foo/")
+
+    def test_close_sessions(self):
+        """Assert closed sessions are replaced by new ones."""
+        cfg = _get_pulp_smash_config()
+        session = api.Client(cfg).session
+        with mock.patch.object(session, "close") as close:
+            api.close_sessions()
+        self.assertEqual(close.call_count, 1)
+        self.assertIsNot(session, api.Client(cfg).session)
+
+    def test_session_stats(self):
+        """Assert reuse counters are reported for each session."""
+        api.Client(_get_pulp_smash_config())
+        self.assertEqual(
+            api.get_session_stats(),
+            {"http://example.com": {"requests": 0, "connections": 0, "reused": 0}},
+        )
+
+
 def _get_pulp_smash_config(**kwargs):
     """Return a config object with made-up attributes.
 
@@ -0,0 +1,188 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.async_api`."""
+import asyncio
+import json
+import ssl
+import unittest
+from unittest import mock
+
+import aiohttp
+import requests
+from aiohttp import web
+
+from pulp_smash import async_api, config
+
+
+class ToAiohttpKwargsTestCase(unittest.TestCase):
+    """Tests for ``pulp_smash.async_api._to_aiohttp_kwargs``."""
+
+    def test_translated(self):
+        """Assert Requests-style arguments are translated."""
+        kwargs = async_api._to_aiohttp_kwargs(  # pylint:disable=protected-access
+            {"auth": ("admin", "admin"), "verify": False, "timeout": 5, "params": {"a": 1}}
+        )
+        self.assertEqual(kwargs["headers"], {"Authorization": "Basic YWRtaW46YWRtaW4="})
+        self.assertIs(kwargs["ssl"], False)
+        self.assertEqual(kwargs["timeout"].total, 5)
+        self.assertEqual(kwargs["params"], {"a": 1})
+
+    def test_default_verify(self):
+        """Assert default SSL verification is left to aiohttp."""
+        kwargs = async_api._to_aiohttp_kwargs({"verify": True})  # pylint:disable=W0212
+        self.assertNotIn("ssl", kwargs)
+
+    def test_cert(self):
+        """Assert client certificates are loaded into an SSL context."""
+        async_api._get_ssl_context.cache_clear()  # pylint:disable=protected-access
+        self.addCleanup(async_api._get_ssl_context.cache_clear)  # pylint:disable=W0212
+        with mock.patch.object(ssl.SSLContext, "load_cert_chain") as load_cert_chain:
+            kwargs = async_api._to_aiohttp_kwargs(  # pylint:disable=protected-access
+                {"verify": False, "cert": ["client.crt", "client.key"]}
+            )
+        load_cert_chain.assert_called_once_with("client.crt", "client.key")
+        self.assertIsInstance(kwargs["ssl"], ssl.SSLContext)
+        self.assertEqual(kwargs["ssl"].verify_mode, ssl.CERT_NONE)
+        self.assertNotIn("cert", kwargs)
+
+    def test_files(self):
+        """Assert files are translated to form data, and unsupported ones rejected."""
+        kwargs = async_api._to_aiohttp_kwargs(  # pylint:disable=protected-access
+            {"files": {"file": b"abc"}, "data": {"name": "x"}}
+        )
+        self.assertIsInstance(kwargs["data"], aiohttp.FormData)
+        self.assertNotIn("files", kwargs)
+        with self.assertRaises(TypeError):
+            async_api._to_aiohttp_kwargs(  # pylint:disable=protected-access
+                {"files": {"file": ("a.txt", b"abc", "text/plain", {"X-Foo": "bar"})}}
+            )
+
+
+class AsyncClientTestCase(unittest.TestCase):
+    """Tests for :class:`pulp_smash.async_api.AsyncClient`.
+
+    Requests are made against a small aiohttp application which mimics Pulp.
+    """
+
+    def setUp(self):
+        """Create an application that mimics a few Pulp API endpoints."""
+        self.requests = []
+        app = web.Application()
+        app.router.add_get("/pages/", self._pages)
+        app.router.add_post("/things/", self._create)
+        app.router.add_get("/tasks/1/", self._task)
+        app.router.add_get("/things/{id}/", self._thing)
+        app.router.add_get("/missing/", self._missing)
+        app.router.add_post("/upload/", self._upload)
+        self.app = app
+
+    async def _pages(self, request):
+        self.requests.append(request.path_qs)
+        if request.query.get("page") == "2":
+            return _json_response({"next": None, "results": [3]})
+        return _json_response({"next": "/pages/?page=2", "results": [1, 2]})
+
+    async def _create(self, request):
+        self.requests.append(request.path_qs)
+        return _json_response({"task": "/tasks/1/"}, status=202)
+
+    async def _task(self, request):
+        self.requests.append(request.path_qs)
+        state = "completed" if self.requests.count("/tasks/1/") > 1 else "running"
+        created = ["/things/1/", "/things/2/"]
+        body = {"pulp_href": "/tasks/1/", "state": state, "error": None}
+        body["created_resources"] = created
+        return _json_response(body)
+
+    async def _thing(self, request):
+        self.requests.append(request.path_qs)
+        return _json_response({"id": request.match_info["id"]})
+
+    async def _missing(self, request):
+        self.requests.append(request.path_qs)
+        return web.Response(status=404)
+
+    async def _upload(self, request):
+        self.requests.append(request.path_qs)
+        fields = {}
+        async for part in await request.multipart():
+            fields[part.name] = [part.filename, (await part.read()).decode()]
+        return _json_response(fields)
+
+    def _run(self, coroutine_function, handler=None):
+        """Serve the application, and run ``coroutine_function(client)``."""
+
+        async def main():
+            runner = web.AppRunner(self.app)
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", 0)
+            await site.start()
+            port = runner.addresses[0][1]
+            cfg = _get_pulp_smash_config(port)
+            try:
+                return await coroutine_function(async_api.AsyncClient(cfg, handler))
+            finally:
+                await async_api.close_sessions()
+                await runner.cleanup()
+
+        return asyncio.run(main())
+
+    def test_page_handler(self):
+        """Assert paginated responses are collected."""
+        results = self._run(lambda client: client.get("/pages/"), async_api.page_handler)
+        self.assertEqual(results, [1, 2, 3])
+
+    def test_task_handler(self):
+        """Assert a task is polled once, and its created resources fetched."""
+        results = self._run(lambda client: client.post("/things/", {}))
+        self.assertEqual(results, [{"id": "1"}, {"id": "2"}])
+        self.assertEqual(self.requests.count("/tasks/1/"), 2)
+        self.assertEqual(len(self.requests), 5)
+
+    def test_code_handler(self):
+        """Assert errors are raised as ``requests`` errors."""
+        with self.assertRaises(requests.exceptions.HTTPError):
+            self._run(lambda client: client.get("/missing/"), async_api.code_handler)
+
+    def test_files(self):
+        """Assert files are uploaded as multipart form data, like Requests does."""
+        fields = self._run(
+            lambda client: client.post(
+                "/upload/", files={"file": ("a.txt", b"abc")}, data={"name": "x"}
+            ),
+            async_api.json_handler,
+        )
+        self.assertEqual(fields, {"name": [None, "x"], "file": ["a.txt", "abc"]})
+
+    def test_shared_session(self):
+        """Assert clients in the same event loop share a session."""
+
+        async def sessions(client):
+            other = async_api.AsyncClient(client._cfg)  # pylint:disable=protected-access
+            return client.session, other.session
+
+        session, other_session = self._run(sessions)
+        self.assertIs(session, other_session)
+
+
+def _json_response(body, status=200):
+    """Return a response with a JSON body and Pulp's content type."""
+    return web.Response(
+        body=json.dumps(body).encode(), status=status, content_type="application/json"
+    )
+
+
+def _get_pulp_smash_config(port):
+    """Return a config object targeting a local Pulp 3 lookalike.
+
+    :rtype: pulp_smash.config.PulpSmashConfig
+    """
+    return config.PulpSmashConfig(
+        pulp_auth=["admin", "admin"],
+        pulp_version="3.0",
+        pulp_selinux_enabled=True,
+        timeout=1800,
+        hosts=[
+            config.PulpHost(hostname="127.0.0.1", roles={"api": {"scheme": "http", "port": port}})
+        ],
+        polling={"strategy": "fixed", "interval": 0},
+    )
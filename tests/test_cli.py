@@ -141,7 +141,9 @@ class ClientTestCase(unittest.TestCase):
             machine = mock.Mock()
             plumbum.machines.SshMachine.return_value = machine
             self.assertEqual(cli.Client(cfg).machine, machine)
-            plumbum.machines.SshMachine.assert_called_once_with(cfg.hosts[0].hostname)
+            plumbum.machines.SshMachine.assert_called_once_with(
+                cfg.hosts[0].hostname, ssh_opts=mock.ANY
+            )
 
     def test_explicit_pulp_host(self):
         """Assert it is possible to explicitly target a pulp cli PulpHost."""
@@ -155,7 +157,9 @@ class ClientTestCase(unittest.TestCase):
             machine = mock.Mock()
             plumbum.machines.SshMachine.return_value = machine
             self.assertEqual(cli.Client(cfg, pulp_host=cfg.hosts[1]).machine, machine)
-            plumbum.machines.SshMachine.assert_called_once_with(cfg.hosts[1].hostname)
+            plumbum.machines.SshMachine.assert_called_once_with(
+                cfg.hosts[1].hostname, ssh_opts=mock.ANY
+            )
 
     def test_run(self):
         """Test run commands."""
@@ -202,22 +206,216 @@ class ClientTestCase(unittest.TestCase):
             self.assertIsNone(result.stderr)
 
 
+class GetSshMachineTestCase(unittest.TestCase):
+    """Test :func:`pulp_smash.cli.get_ssh_machine`."""
+
+    def setUp(self):
+        """Give each test an empty registry, and fake SSH machines."""
+        for patcher in (
+            mock.patch.dict(cli._SSH_MACHINES),  # pylint:disable=protected-access
+            mock.patch("pulp_smash.cli.plumbum"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        cli.plumbum.machines.SshMachine.side_effect = lambda *args, **kwargs: mock.Mock()
+
+    def test_shared(self):
+        """Assert clients targeting the same host share a machine."""
+        cfg = _get_pulp_smash_config(
+            hosts=[config.PulpHost(hostname=utils.uuid4(), roles={"shell": {"transport": "ssh"}})]
+        )
+        self.assertIs(cli.Client(cfg).machine, cli.Client(cfg).machine)
+        self.assertEqual(cli.plumbum.machines.SshMachine.call_count, 1)
+        ssh_opts = cli.plumbum.machines.SshMachine.call_args[1]["ssh_opts"]
+        self.assertIn("ControlMaster=auto", ssh_opts)
+
+    def test_reconnect(self):
+        """Assert a machine whose session died is replaced."""
+        hostname = utils.uuid4()
+        machine = cli.get_ssh_machine(hostname)
+        machine._session.alive.return_value = False  # pylint:disable=protected-access
+        self.assertIsNot(cli.get_ssh_machine(hostname), machine)
+        machine.close.assert_called_once_with()
+
+    def test_close(self):
+        """Assert machines are closed and forgotten."""
+        hostname = utils.uuid4()
+        machine = cli.get_ssh_machine(hostname)
+        cli.close_ssh_machines()
+        machine.close.assert_called_once_with()
+        self.assertIsNot(cli.get_ssh_machine(hostname), machine)
+
+
+class ExecSessionTestCase(unittest.TestCase):
+    """Test the persistent shell sessions of container transports."""
+
+    def setUp(self):
+        """Give each test empty registries."""
+        for patcher in (
+            mock.patch.dict(cli._EXEC_SESSIONS),  # pylint:disable=protected-access
+            mock.patch.dict(cli._POD_NAMES),  # pylint:disable=protected-access
+            mock.patch.object(cli, "ShellSession"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        cli.ShellSession.return_value.run.return_value = (0, "ok", "")
+
+    def _get_client(self, shell_role):
+        """Return a client whose host has the given shell role."""
+        cfg = _get_pulp_smash_config(
+            hosts=[config.PulpHost(hostname=utils.uuid4(), roles={"shell": shell_role})]
+        )
+        client = cli.Client(cfg)
+        client._machine = mock.MagicMock()  # pylint:disable=protected-access
+        client._podname = "pulp"  # pylint:disable=protected-access
+        return client
+
+    def test_session(self):
+        """Assert commands are sent through one session, when opted into."""
+        client = self._get_client({"transport": "podman", "persistent session": True})
+        client.run(("sudo", "ls", "-la", "a b"))
+        result = client.run(("ls",))
+        self.assertEqual(cli.ShellSession.call_count, 1)
+        run = cli.ShellSession.return_value.run
+        self.assertEqual(run.call_args_list[0], mock.call("ls -la 'a b'", retcode=None))
+        self.assertEqual(result.stdout, "ok")
+        client._machine.__getitem__.assert_called_once_with("podman")  # pylint:disable=W0212
+
+    def test_no_session(self):
+        """Assert commands have their own process, unless opted into."""
+        client = self._get_client({"transport": "podman"})
+        command = client._machine.__getitem__.return_value  # pylint:disable=protected-access
+        command.run.return_value = (0, "ok", "")
+        client.run(("ls",))
+        cli.ShellSession.assert_not_called()
+
+    def test_podname_cached(self):
+        """Assert kubectl pod names are discovered once per TTL."""
+        machine = mock.MagicMock()
+        command = machine.__getitem__.return_value.__getitem__.return_value
+        command.__or__.return_value = lambda: "pulp-api-a-b\n"
+        get_podname = cli._get_kubectl_podname  # pylint:disable=protected-access
+        self.assertEqual(get_podname(machine, "example.com"), "pulp-api-a-b")
+        get_podname(machine, "example.com")
+        calls = machine.__getitem__.call_count
+        with mock.patch.object(cli, "_POD_NAME_TTL", 0):
+            get_podname(machine, "example.com")
+        self.assertEqual(calls, 2)
+        self.assertEqual(machine.__getitem__.call_count, 4)
+
+
+class GetHostFactsTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.cli.get_host_facts`."""
+
+    def test_facts(self):
+        """Assert facts are parsed, gathered with one command, and cached."""
+        cfg = _get_pulp_smash_config(
+            hosts=[
+                config.PulpHost(
+                    hostname=utils.uuid4(), roles={"api": {"scheme": "https"}, "shell": {}}
+                )
+            ]
+        )
+        stdout = "uid=0\nservice_manager=systemd\nsquid=Squid Cache: Version 4.4\nnoise\n"
+        with mock.patch.dict(cli._HOST_FACTS), mock.patch.object(cli.Client, "run") as run:
+            run.return_value.stdout = stdout
+            facts = cli.get_host_facts(cfg)
+            self.assertIs(cli.get_host_facts(cfg, cfg.hosts[0]), facts)
+        self.assertEqual(run.call_count, 1)
+        self.assertEqual(set(facts), set(cli.HOST_FACTS))
+        self.assertEqual(facts["uid"], "0")
+        self.assertEqual(facts["squid"], "Squid Cache: Version 4.4")
+        self.assertIsNone(facts["package_manager"])
+        with mock.patch.object(cli, "get_host_facts", return_value=facts):
+            with self.assertRaises(NoKnownPackageManagerError):
+                cli.PackageManager._get_package_manager(cfg)  # pylint:disable=W0212
+            service_manager = cli.BaseServiceManager._get_service_manager  # pylint:disable=W0212
+            self.assertEqual(service_manager(cfg, cfg.hosts[0]), "systemd")
+
+    def test_per_transport(self):
+        """Assert hosts sharing a hostname, but not a transport, have their own facts."""
+        cfg = _get_pulp_smash_config(
+            hosts=[
+                config.PulpHost(
+                    hostname="localhost",
+                    roles={"api": {"scheme": "https"}, "shell": {"transport": "podman"}},
+                )
+            ]
+        )
+        local_host = config.PulpHost(hostname="localhost", roles={"shell": {"transport": "local"}})
+        with mock.patch.dict(cli._HOST_FACTS, clear=True):
+            with mock.patch.object(cli.Client, "run") as run:
+                run.return_value.stdout = "uid=0\n"
+                container_facts = cli.get_host_facts(cfg)
+                run.return_value.stdout = "uid=1000\n"
+                local_facts = cli.get_host_facts(cfg, local_host)
+                self.assertIs(cli.get_host_facts(cfg), container_facts)
+        self.assertEqual((container_facts["uid"], local_facts["uid"]), ("0", "1000"))
+        self.assertEqual(run.call_count, 2)
+
+
 class IsRootTestCase(unittest.TestCase):
     """Tests for :class:`pulp_smash.cli.is_root`."""
 
     def test_positive(self):
         """Test what happens when we are root on the target host."""
-        with mock.patch.object(cli, "Client") as client:
-            client.return_value.run.return_value.stdout = " 0 "
+        with mock.patch.dict(cli._HOST_FACTS), mock.patch.object(cli, "Client") as client:
+            client.return_value.run.return_value.stdout = "uid=0\n"
             self.assertTrue(cli.is_root(mock.MagicMock()))
 
     def test_negative(self):
         """Test what happens when we aren't root on the target host."""
-        with mock.patch.object(cli, "Client") as client:
-            client.return_value.run.return_value.stdout = " 1 "
+        with mock.patch.dict(cli._HOST_FACTS), mock.patch.object(cli, "Client") as client:
+            client.return_value.run.return_value.stdout = "uid=1000\n"
             self.assertFalse(cli.is_root(mock.MagicMock()))
 
 
+class GlobalServiceManagerTestCase(unittest.TestCase):
+    """Test :class:`pulp_smash.cli.GlobalServiceManager`."""
+
+    def setUp(self):
+        """Declare a broker host and two API hosts, all using systemd."""
+        self.cfg = _get_pulp_smash_config(
+            hosts=[
+                config.PulpHost(hostname="api1", roles={"api": {}, "shell": {}}),
+                config.PulpHost(hostname="broker", roles={"amqp broker": {}, "shell": {}}),
+                config.PulpHost(hostname="api2", roles={"api": {}, "shell": {}}),
+            ]
+        )
+        self.cfg.get_services = lambda roles: {"httpd"} if "api" in roles else {"qpidd"}
+        patcher = mock.patch.object(
+            cli.GlobalServiceManager, "_get_service_manager", return_value="systemd"
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = []
+
+    def _restart(self, client, services):
+        """Record which host is restarted, and fail on "api2"."""
+        self.calls.append(client.pulp_host.hostname)
+        if client.pulp_host.hostname == "api2":
+            raise exceptions.CalledProcessError(("systemctl",), 1, "", "")
+        return client.pulp_host.hostname
+
+    def test_waves(self):
+        """Assert hosts of earlier waves are acted upon first."""
+        svc_mgr = cli.GlobalServiceManager(self.cfg, waves=[{"amqp broker"}])
+        with mock.patch.object(svc_mgr, "_restart_systemd", self._restart):
+            with self.assertRaises(exceptions.CalledProcessError):
+                svc_mgr.restart(("httpd", "qpidd"))
+        self.assertEqual(self.calls[0], "broker")
+        self.assertEqual(set(self.calls), {"broker", "api1", "api2"})
+
+    def test_return_exceptions(self):
+        """Assert errors are returned per host, if asked for."""
+        svc_mgr = cli.GlobalServiceManager(self.cfg, return_exceptions=True)
+        with mock.patch.object(svc_mgr, "_restart_systemd", self._restart):
+            result = svc_mgr.restart(("httpd",))
+        self.assertEqual(set(result), {"api1", "api2"})
+        self.assertEqual(result["api1"], "api1")
+        self.assertIsInstance(result["api2"], exceptions.CalledProcessError)
+
+
 class PackageManagerTestCase(unittest.TestCase):
     """Tests for :class:`pulp_smash.cli.PackageManager`."""
 
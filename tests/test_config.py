@@ -1,6 +1,7 @@
 # coding=utf-8
 """Unit tests for :mod:`pulp_smash.config`."""
 import builtins
+import copy
 import itertools
 import json
 import os
@@ -113,12 +114,37 @@ class ValidateConfigTestCase(unittest.TestCase):
         self.assertIsNone(config.validate_config(json.loads(PULP_SMASH_CONFIG)))
 
     def test_invalid_config(self):
-        """An invalid config raises an exception."""
+        """An invalid config raises an exception, which reports every error."""
         config_dict = json.loads(PULP_SMASH_CONFIG)
         config_dict["pulp"]["auth"] = []
-        config_dict["hosts"][0]["hostname"] = ""
-        with self.assertRaises(exceptions.ConfigValidationError):
+        config_dict["hosts"][1]["roles"]["api"]["scheme"] = "ftp"
+        with self.assertRaises(exceptions.ConfigValidationError) as err:
             config.validate_config(config_dict)
+        self.assertEqual(len(err.exception.errors), 2, err.exception.errors)
+        self.assertTrue(err.exception.errors[0].startswith("hosts/1/roles/api/scheme: "))
+        self.assertTrue(err.exception.errors[1].startswith("pulp/auth: "))
+
+    def test_validator_reused(self):
+        """Assert the schema is compiled once, and then reused."""
+        with mock.patch.object(config, "_VALIDATOR", None):
+            config.validate_config(json.loads(PULP_SMASH_CONFIG))
+            validator = config._VALIDATOR  # pylint:disable=protected-access
+            config.validate_config(json.loads(PULP_SMASH_CONFIG))
+            self.assertIsNotNone(validator)
+            self.assertIs(config._VALIDATOR, validator)  # pylint:disable=protected-access
+
+    def test_many_hosts(self):
+        """Assert every error in a config with many hosts is reported."""
+        config_dict = json.loads(PULP_SMASH_CONFIG)
+        config_dict["hosts"] = [copy.deepcopy(config_dict["hosts"][1]) for _ in range(1000)]
+        for host in config_dict["hosts"][::100]:
+            host["roles"]["api"]["port"] = "80"
+        with self.assertRaises(exceptions.ConfigValidationError) as err:
+            config.validate_config(config_dict)
+        self.assertEqual(
+            [error.split(":")[0] for error in err.exception.errors],
+            ["hosts/{}/roles/api/port".format(i) for i in range(0, 1000, 100)],
+        )
 
     def test_config_missing_roles(self):
         """Missing required roles in config raises an exception."""
@@ -287,6 +313,38 @@ class GetRequestsKwargsTestCase(unittest.TestCase):
         self.assertIsInstance(self.kwargs["auth"], tuple)
 
 
+class GetRequestContextTestCase(unittest.TestCase):
+    """Test :meth:`pulp_smash.config.PulpSmashConfig.get_request_context`."""
+
+    def setUp(self):
+        """Create a config, and a frozen copy of it."""
+        self.attrs = _gen_attrs()
+        self.cfg = config.PulpSmashConfig(**self.attrs)
+        self.frozen = self.cfg.freeze()
+
+    def test_context(self):
+        """Assert the context matches the other helper methods."""
+        context = self.frozen.get_request_context()
+        port = self.attrs["hosts"][0].roles["api"]["port"]
+        self.assertEqual(context.base_url, self.cfg.get_base_url())
+        self.assertEqual(context.netloc, "pulp.example.com:{}".format(port))
+        self.assertEqual(context.requests_kwargs, self.cfg.get_requests_kwargs())
+        self.assertEqual(
+            (context.auth, context.verify, context.cert),
+            (tuple(self.attrs["pulp_auth"]), True, None),
+        )
+
+    def test_memoized(self):
+        """Assert contexts and role lookups are memoized by frozen configs only."""
+        self.assertIs(self.frozen.get_request_context(), self.frozen.get_request_context())
+        self.assertIsNot(self.cfg.get_request_context(), self.cfg.get_request_context())
+        with mock.patch.object(config.PulpSmashConfig, "_get_role_index", return_value={}) as index:
+            self.assertEqual(self.frozen.get_hosts("api"), [self.frozen.hosts[0]])
+            self.assertEqual(self.cfg.get_hosts("api"), [])
+            self.assertEqual(self.cfg.get_hosts("api"), [])
+        self.assertEqual(index.call_count, 2)
+
+
 class ReprTestCase(unittest.TestCase):
     """Test calling ``repr`` on a `pulp_smash.config.PulpSmashConfig`."""
 
@@ -321,6 +379,54 @@ class ReprTestCase(unittest.TestCase):
             self.assertEqual(cfg.hosts, self.cfg.hosts)
 
 
+class FreezeTestCase(unittest.TestCase):
+    """Test :meth:`pulp_smash.config.PulpSmashConfig.freeze` and ``evolve``."""
+
+    def setUp(self):
+        """Create a config, and a frozen copy of it."""
+        self.cfg = config.PulpSmashConfig(**_gen_attrs())
+        self.frozen = self.cfg.freeze()
+
+    def test_immutable(self):
+        """Assert a frozen config and its attributes can't be modified."""
+        with self.assertRaises(AttributeError):
+            self.frozen.timeout = 1
+        with self.assertRaises(TypeError):
+            self.frozen.hosts[0].roles["api"]["scheme"] = "http"
+        self.assertIsInstance(self.frozen.hosts, tuple)
+        self.assertIsInstance(self.frozen.hosts[0], config.PulpHost)
+        self.cfg.timeout = 1
+
+    def test_shared(self):
+        """Assert a frozen config is hashable, equal to its source, and never copied."""
+        self.assertEqual(hash(self.frozen), hash(self.cfg.freeze()))
+        self.assertEqual(self.frozen, self.cfg.evolve(hosts=tuple(self.cfg.hosts)).freeze())
+        self.assertIs(self.frozen.freeze(), self.frozen)
+        self.assertIs(copy.deepcopy(self.frozen), self.frozen)
+        self.assertIs(copy.copy(self.frozen), self.frozen)
+        self.assertIsNot(copy.copy(self.cfg), self.cfg)
+        self.assertEqual(copy.copy(self.cfg), self.cfg)
+        with self.assertRaises(TypeError):
+            hash(self.cfg)
+
+    def test_evolve(self):
+        """Assert evolved configs are changed copies, as frozen as their source."""
+        evolved = self.frozen.evolve(timeout=1, pulp_version="3.1")
+        self.assertEqual((evolved.timeout, evolved.pulp_version), (1, config.Version("3.1")))
+        self.assertEqual(self.frozen.timeout, self.cfg.timeout)
+        self.assertNotEqual(evolved, self.frozen)
+        with self.assertRaises(AttributeError):
+            evolved.timeout = 2
+        self.cfg.evolve(timeout=1).timeout = 2
+
+    def test_get_config(self):
+        """Assert ``get_config`` returns the same frozen config every time."""
+        with mock.patch.object(config, "_CONFIG", None):
+            with mock.patch.object(config.PulpSmashConfig, "load", return_value=self.cfg):
+                self.assertIs(config.get_config(), config.get_config())
+                self.assertEqual(config.get_config(), self.frozen)
+
+
 class GetConfigFileLoadPathTestCase(unittest.TestCase):
     """Test :meth:`pulp_smash.config.PulpSmashConfig.get_load_path`."""
 
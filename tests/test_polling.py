@@ -0,0 +1,143 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.polling`."""
+import itertools
+import unittest
+from unittest import mock
+
+from packaging.version import Version
+
+from pulp_smash import exceptions, polling
+
+
+class ExponentialBackoffTestCase(unittest.TestCase):
+    """Tests for :class:`pulp_smash.polling.ExponentialBackoff`."""
+
+    def test_growth(self):
+        """Assert intervals grow by ``multiplier`` until ``max_interval``."""
+        strategy = polling.ExponentialBackoff(0.1, 0.5, 2, jitter=0)
+        intervals = list(itertools.islice(strategy.intervals(), 5))
+        self.assertEqual(intervals, [0.1, 0.2, 0.4, 0.5, 0.5])
+
+    def test_jitter(self):
+        """Assert jitter stays within bounds and never exceeds the cap."""
+        strategy = polling.ExponentialBackoff(1, 2, 2, jitter=0.5)
+        intervals = list(itertools.islice(strategy.intervals(), 100))
+        self.assertTrue(0.5 <= intervals[0] <= 1.5)
+        self.assertTrue(all(0 <= interval <= 2 for interval in intervals))
+
+
+class GetStrategyTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.polling.get_strategy`."""
+
+    def test_default(self):
+        """Assert exponential backoff is used by default."""
+        cfg = mock.Mock(polling=None)
+        self.assertIsInstance(polling.get_strategy(cfg), polling.ExponentialBackoff)
+
+    def test_options(self):
+        """Assert options are passed to the strategy."""
+        cfg = mock.Mock(polling={"strategy": "backoff", "max interval": 3})
+        self.assertEqual(polling.get_strategy(cfg).max_interval, 3)
+
+    def test_fixed_default_interval(self):
+        """Assert the fixed strategy's interval depends on the Pulp version."""
+        for version, interval in (("2.19", 2), ("3.0", 0.3)):
+            with self.subTest(version=version):
+                cfg = mock.Mock(polling={"strategy": "fixed"}, pulp_version=Version(version))
+                self.assertEqual(polling.get_strategy(cfg).interval, interval)
+
+
+@mock.patch.object(polling.time, "sleep")
+class PollUntilTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.polling.poll_until`."""
+
+    def test_done_immediately(self, sleep):
+        """Assert no sleep happens if the first check succeeds."""
+        state = polling.poll_until(lambda: 1, bool, 10, polling.FixedInterval(1))
+        self.assertEqual(state, 1)
+        self.assertEqual(sleep.call_count, 0)
+
+    def test_done_eventually(self, sleep):
+        """Assert checks continue until ``is_done`` accepts a state."""
+        states = iter((0, 0, 1))
+        state = polling.poll_until(lambda: next(states), bool, 10, polling.FixedInterval(1))
+        self.assertEqual(state, 1)
+        self.assertEqual(sleep.call_args_list, [mock.call(1), mock.call(1)])
+
+    def test_missing_fetched_once(self, sleep):
+        """Assert resources missing from the fetched states are fetched one by one."""
+        fetch_one = mock.Mock(side_effect=lambda key: {1: 1, 2: None}[key])
+        states = polling.poll_many(
+            lambda keys: {}, (1, 2), bool, 10, polling.FixedInterval(1), fetch_one=fetch_one
+        )
+        self.assertEqual(list(states), [1])
+        self.assertEqual(fetch_one.call_args_list, [mock.call(1), mock.call(2)])
+        self.assertEqual(sleep.call_count, 0)
+
+    def test_filter_ignored(self, sleep):
+        """Assert resources are polled one by one if ``fetch`` returns unrelated ones."""
+        fetch = mock.Mock(return_value={3: 1, 4: 1})
+        fetch_one = mock.Mock(side_effect=(0, 0, 1, 1))
+        states = polling.poll_many(
+            fetch, (1, 2), bool, 10, polling.FixedInterval(1), fetch_one=fetch_one
+        )
+        self.assertEqual(list(states), [1, 1])
+        self.assertEqual(fetch.call_count, 1)
+        self.assertEqual(fetch_one.call_count, 4)
+        self.assertEqual(sleep.call_count, 1)
+
+    def test_deadline(self, sleep):
+        """Assert the timeout is measured in seconds, not in polls."""
+        with mock.patch.object(polling.time, "monotonic", side_effect=(0, 5, 11)):
+            with self.assertRaises(exceptions.TaskTimedOutError):
+                polling.poll_until(lambda: 0, bool, 10, polling.FixedInterval(1))
+        self.assertEqual(sleep.call_args_list, [mock.call(1)])
+
+    def test_no_oversleep(self, sleep):
+        """Assert a sleep never goes past the deadline."""
+        with mock.patch.object(polling.time, "monotonic", side_effect=(0, 8, 11)):
+            with self.assertRaises(exceptions.TaskTimedOutError):
+                polling.poll_until(lambda: 0, bool, 10, polling.FixedInterval(5))
+        self.assertEqual(sleep.call_args_list, [mock.call(2)])
+
+
+@mock.patch.object(polling.time, "sleep")
+class PollManyTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.polling.poll_many`."""
+
+    def test_batched(self, sleep):
+        """Assert resources are fetched in batches, and yielded once done."""
+        rounds = iter(({1: 1, 2: 0, 3: 0}, {2: 1, 3: 0}, {3: 1}))
+        fetch = mock.Mock(side_effect=lambda keys: next(rounds))
+        states = polling.poll_many(fetch, (1, 2, 3), bool, 10, polling.FixedInterval(1), batch=3)
+        self.assertEqual(list(states), [1, 1, 1])
+        self.assertEqual(
+            fetch.call_args_list, [mock.call([1, 2, 3]), mock.call([2, 3]), mock.call([3])]
+        )
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_batch_size(self, sleep):
+        """Assert ``fetch`` is passed at most ``batch`` keys at once."""
+        fetch = mock.Mock(side_effect=lambda keys: dict.fromkeys(keys, 1))
+        states = polling.poll_many(fetch, range(5), bool, 10, polling.FixedInterval(1), batch=2)
+        self.assertEqual(len(list(states)), 5)
+        self.assertEqual(
+            fetch.call_args_list, [mock.call([0, 1]), mock.call([2, 3]), mock.call([4])]
+        )
+        self.assertEqual(sleep.call_count, 0)
+
+    def test_gone(self, sleep):
+        """Assert resources missing from the fetched states are dropped."""
+        states = polling.poll_many(lambda keys: {}, (1, 2), bool, 10, polling.FixedInterval(1))
+        self.assertEqual(list(states), [])
+        self.assertEqual(sleep.call_count, 0)
+
+    def test_deadline(self, sleep):
+        """Assert an error is raised if some resources never finish."""
+        fetch = mock.Mock(side_effect=lambda keys: {1: 1, 2: 0})
+        with mock.patch.object(polling.time, "monotonic", side_effect=(0, 5, 11)):
+            states = polling.poll_many(fetch, (1, 2), bool, 10, polling.FixedInterval(1))
+            self.assertEqual(next(states), 1)
+            with self.assertRaises(exceptions.TaskTimedOutError):
+                list(states)
+        self.assertEqual(sleep.call_count, 1)
@@ -172,9 +172,23 @@ class UploadImportUnitTestCase(unittest.TestCase):
                 "upload_id": "bar",
             }
             response = upload_import_unit(
-                mock.Mock(),  # cfg
+                mock.Mock(pool_size=2),  # cfg
                 b"my unit",  # unit
                 {},  # import_params
                 {"_href": "http://example.com"},  # repo
             )
         self.assertIs(response, client.return_value.post.return_value)
+
+    def test_chunks(self):
+        """Assert each chunk is uploaded to its own offset."""
+        with mock.patch.object(api, "Client") as client:
+            client.return_value.post.return_value = {"_href": "/uploads/1/", "upload_id": "1"}
+            upload_import_unit(
+                mock.Mock(pool_size=2),
+                iter([b"my ", b"unit"]),
+                {},
+                {"_href": "/repo/"},
+                chunk_size=3,
+            )
+        calls = sorted(call[0][0] for call in client.return_value.put.call_args_list)
+        self.assertEqual(calls, ["/uploads/1/0/", "/uploads/1/3/", "/uploads/1/6/"])
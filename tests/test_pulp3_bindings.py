@@ -0,0 +1,87 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.pulp3.bindings`."""
+import importlib
+import threading
+import unittest
+from unittest import mock
+
+from pulp_smash import config
+from pulp_smash.pulp3 import bindings
+
+
+class LazyBindingsTestCase(unittest.TestCase):
+    """Tests for the lazily built bindings clients."""
+
+    def setUp(self):
+        """Give each test its own config and thread-local state."""
+        for patcher in (
+            mock.patch.dict(vars(bindings)),
+            mock.patch.object(bindings, "get_config", return_value=_get_pulp_smash_config()),
+            mock.patch.object(bindings, "_local", threading.local()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_import(self):
+        """Assert importing the module doesn't load the settings file."""
+        with mock.patch.object(config, "get_config") as get_config:
+            importlib.reload(bindings)
+        get_config.assert_not_called()
+
+    def test_pool_size(self):
+        """Assert the connection pool size is taken from the config."""
+        self.assertEqual(bindings.configuration.connection_pool_maxsize, 3)
+
+    def test_per_thread(self):
+        """Assert each thread gets its own clients, built once."""
+        clients = []
+        thread = threading.Thread(target=lambda: clients.append(bindings.get_pulpcore_client()))
+        thread.start()
+        thread.join()
+        self.assertIs(bindings.pulpcore_client, bindings.get_pulpcore_client())
+        self.assertIs(bindings.tasks.api_client, bindings.pulpcore_client)
+        self.assertIsNot(clients[0], bindings.pulpcore_client)
+
+    def test_timing_hooks(self):
+        """Assert startup and the first monitored task are reported."""
+        events = []
+        task = mock.Mock(state="completed")
+        with mock.patch.object(bindings, "TIMING_HOOKS", [lambda *args: events.append(args)]):
+            with mock.patch.object(bindings.TasksApi, "read", return_value=task):
+                bindings.monitor_task("/tasks/1/")
+                bindings.monitor_task("/tasks/2/")
+        self.assertEqual([event for event, _ in events], ["startup", "first monitor"])
+
+
+class PulpTestCaseTestCase(unittest.TestCase):
+    """Tests for :class:`pulp_smash.pulp3.bindings.PulpTestCase`."""
+
+    def test_cleanup_tasks(self):
+        """Assert only the tasks spawned by cleanup functions are waited for."""
+
+        class Test(bindings.PulpTestCase):
+            def runTest(self):  # pylint:disable=invalid-name
+                """Do nothing."""
+
+        test = Test()
+        test.addCleanup(mock.Mock(return_value=mock.Mock(task="/tasks/1/")))
+        test.addCleanup(mock.Mock(return_value=None))
+        with mock.patch.object(bindings, "wait_for_tasks", return_value=[]) as wait_for_tasks:
+            test.doCleanups()
+        wait_for_tasks.assert_called_once_with(["/tasks/1/"], raise_on_failure=False)
+
+
+def _get_pulp_smash_config():
+    """Return a config object with made-up attributes.
+
+    :rtype: pulp_smash.config.PulpSmashConfig
+    """
+    return config.PulpSmashConfig(
+        pulp_auth=["admin", "admin"],
+        pulp_version="3.0",
+        pulp_selinux_enabled=True,
+        timeout=1800,
+        hosts=[config.PulpHost(hostname="example.com", roles={"api": {"scheme": "https"}})],
+        pool_size=3,
+        polling={"strategy": "fixed", "interval": 0},
+    )
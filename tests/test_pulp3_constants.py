@@ -0,0 +1,104 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.pulp3.constants`."""
+import importlib
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from pulp_smash import config, utils
+from pulp_smash.pulp3 import constants
+
+
+class GetBasePathTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.pulp3.constants.get_base_path`."""
+
+    def setUp(self):
+        """Point the cache at a temporary directory."""
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        patcher = mock.patch.object(
+            utils, "get_cache_path", lambda name: os.path.join(cache_dir.name, name)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cfg = _get_pulp_smash_config()
+
+    def test_cached(self):
+        """Assert the API root is resolved once, and then read from disk."""
+        with mock.patch.object(
+            utils, "get_pulp_setting", return_value="/custom/api/v3/"
+        ) as get_pulp_setting:
+            self.assertEqual(constants.get_base_path(self.cfg), "/custom/api/v3/")
+            self.assertEqual(constants.get_base_path(self.cfg), "/custom/api/v3/")
+        self.assertEqual(get_pulp_setting.call_count, 1)
+
+    def test_stale(self):
+        """Assert a stale cache entry is resolved again."""
+        with mock.patch.object(utils, "get_pulp_setting", return_value="/a/") as get_pulp_setting:
+            constants.get_base_path(self.cfg)
+            with mock.patch.object(constants, "_BASE_PATH_CACHE_TTL", 0):
+                constants.get_base_path(self.cfg)
+        self.assertEqual(get_pulp_setting.call_count, 2)
+
+    def test_probe(self):
+        """Assert the API root is probed over HTTP if it can't be read."""
+        with mock.patch.object(utils, "get_pulp_setting", side_effect=Exception()):
+            with mock.patch.object(
+                constants, "_probe_base_path", return_value="/pulp/default/api/v3/"
+            ):
+                self.assertEqual(constants.get_base_path(self.cfg), "/pulp/default/api/v3/")
+
+    def test_unreachable(self):
+        """Assert the default API root is used, but not cached, if Pulp can't be reached."""
+        with mock.patch.object(utils, "get_pulp_setting", side_effect=Exception()):
+            with mock.patch.object(constants.requests, "get") as get:
+                get.side_effect = constants.requests.exceptions.ConnectTimeout()
+                with self.assertWarns(RuntimeWarning):
+                    self.assertEqual(constants.get_base_path(self.cfg), "/pulp/api/v3/")
+                with self.assertWarns(RuntimeWarning):
+                    constants.get_base_path(self.cfg)
+        self.assertEqual(get.call_count, 4)
+        self.assertEqual(get.call_args[1]["timeout"], 10)
+
+    def test_default(self):
+        """Assert the default API root is used if nothing else works."""
+        with mock.patch.object(utils, "get_pulp_setting", return_value=None):
+            self.assertEqual(constants.get_base_path(self.cfg), "/pulp/api/v3/")
+
+
+class LazyConstantsTestCase(unittest.TestCase):
+    """Tests for the lazily resolved constants."""
+
+    def test_import(self):
+        """Assert importing the module doesn't talk to Pulp."""
+        with mock.patch.object(utils, "get_pulp_setting") as get_pulp_setting:
+            importlib.reload(constants)
+        get_pulp_setting.assert_not_called()
+
+    def test_derived(self):
+        """Assert derived paths are joined onto ``BASE_PATH``, and memoized."""
+        with mock.patch.dict(vars(constants), BASE_PATH="/custom/api/v3/"):
+            self.assertEqual(constants.TASKS_PATH, "/custom/api/v3/tasks/")
+            self.assertIn("TASKS_PATH", vars(constants))
+
+    def test_unknown(self):
+        """Assert unknown attributes raise an ``AttributeError``."""
+        with self.assertRaises(AttributeError):
+            constants.NO_SUCH_PATH  # pylint:disable=pointless-statement
+
+
+def _get_pulp_smash_config():
+    """Return a config object with made-up attributes.
+
+    :rtype: pulp_smash.config.PulpSmashConfig
+    """
+    return config.PulpSmashConfig(
+        pulp_auth=["admin", "admin"],
+        pulp_version="3.0",
+        pulp_selinux_enabled=True,
+        timeout=1800,
+        hosts=[
+            config.PulpHost(hostname="example.com", roles={"api": {"scheme": "https"}, "shell": {}})
+        ],
+    )
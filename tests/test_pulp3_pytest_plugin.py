@@ -0,0 +1,61 @@
+# coding=utf-8
+"""Unit tests for :mod:`pulp_smash.pulp3.pytest_plugin`."""
+import os
+import tempfile
+import textwrap
+import unittest
+from unittest import mock
+
+from pulp_smash.pulp3 import pytest_plugin
+
+
+class GetReferencedBugIdsTestCase(unittest.TestCase):
+    """Tests for ``pulp_smash.pulp3.pytest_plugin._get_referenced_bug_ids``."""
+
+    def setUp(self):
+        """Write a test module, and a conftest.py next to it."""
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.module = os.path.join(tmp_dir.name, "test_foo.py")
+        _write(
+            self.module,
+            """
+            from pulp_smash.selectors import bug_is_fixed
+
+            BUG_ID = 3
+
+            def test_literal():
+                assert bug_is_fixed(1, None)
+
+            def test_constant():
+                assert bug_is_fixed(BUG_ID, None)
+
+            def test_helper():
+                assert is_fixed(4)
+            """,
+        )
+        _write(
+            os.path.join(tmp_dir.name, "conftest.py"),
+            """
+            def is_fixed(bug_id):
+                return bug_is_fixed(bug_id, None) and bug_is_fixed(2, None)
+            """,
+        )
+
+    def test_found(self):
+        """Assert literal and declared bug IDs are found, but others aren't.
+
+        Bug IDs held in constants, such as 3, or passed through helpers, such
+        as 4, are missed unless they're declared with the ``pulp_bugs`` marker.
+        """
+        item = mock.Mock(fspath=self.module)
+        item.iter_markers.return_value = [mock.Mock(args=(4,))]
+        bug_ids = pytest_plugin._get_referenced_bug_ids([item])  # pylint:disable=W0212
+        self.assertEqual(bug_ids, {1, 2, 4})
+        item.iter_markers.assert_called_once_with("pulp_bugs")
+
+
+def _write(path, text):
+    """Write ``text``, dedented, to the file at ``path``."""
+    with open(path, "w") as handle:
+        handle.write(textwrap.dedent(text))
@@ -1,15 +1,25 @@
 """Unit tests for pulp_smash.pulp3.utils."""
 
+import hashlib
+import tempfile
 import unittest
 from unittest import mock
 
-from pulp_smash import api
+import requests
+
+from pulp_smash import api, config, exceptions, polling
+from pulp_smash.pulp3 import constants
 from pulp_smash.pulp3.utils import (
+    STATUS_PHASES,
     gen_distribution,
     gen_publisher,
     gen_remote,
     gen_repo,
+    get_content,
     sync,
+    upload_artifact,
+    wait_for_status,
+    wait_for_tasks,
 )
 
 
@@ -60,3 +70,196 @@ class GenTestCase(unittest.TestCase):
             sync(None, remote, repo, mirror=True)
         data = {"remote": remote_href, "mirror": True}
         client.return_value.post.assert_called_once_with(repo_href + "sync/", data)
+
+
+class UploadArtifactTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.pulp3.utils.upload_artifact`."""
+
+    def test_upload(self):
+        """Assert a file is sent in ranged chunks, and committed with its checksum."""
+        data = bytes(range(10))
+        with tempfile.NamedTemporaryFile() as handle:
+            handle.write(data)
+            handle.flush()
+            with mock.patch.object(api, "Client") as client:
+                client.return_value.post.return_value = {"pulp_href": "/uploads/1/"}
+                typed_client = client.return_value.using_handler.return_value
+                typed_client.post.return_value = {"pulp_href": "/artifacts/1/"}
+                with mock.patch.dict(vars(constants), UPLOAD_PATH="/uploads/"):
+                    href = upload_artifact(handle.name, mock.Mock(pool_size=2), chunk_size=4)
+        self.assertEqual(href, "/artifacts/1/")
+        client.return_value.post.assert_called_once_with("/uploads/", {"size": 10})
+        ranges = sorted(
+            (call[1]["headers"]["Content-Range"], call[1]["files"]["file"])
+            for call in client.return_value.put.call_args_list
+        )
+        self.assertEqual(
+            ranges,
+            [
+                ("bytes 0-3/10", data[:4]),
+                ("bytes 4-7/10", data[4:8]),
+                ("bytes 8-9/10", data[8:]),
+            ],
+        )
+        typed_client.post.assert_called_once_with(
+            "/uploads/1/commit/", {"sha256": hashlib.sha256(data).hexdigest()}
+        )
+
+    def test_file_object(self):
+        """Assert a file object is sent from its current position."""
+        with tempfile.TemporaryFile() as handle:
+            handle.write(bytes(range(10)))
+            handle.seek(2)
+            with mock.patch.object(api, "Client") as client:
+                client.return_value.post.return_value = {"pulp_href": "/uploads/1/"}
+                with mock.patch.dict(vars(constants), UPLOAD_PATH="/uploads/"):
+                    upload_artifact(handle, mock.Mock(pool_size=1), chunk_size=4)
+        client.return_value.post.assert_called_once_with("/uploads/", {"size": 8})
+        self.assertEqual(
+            [
+                call[1]["headers"]["Content-Range"]
+                for call in client.return_value.put.call_args_list
+            ],
+            ["bytes 0-3/8", "bytes 4-7/8"],
+        )
+
+    def test_empty(self):
+        """Assert an empty file is posted as an artifact, rather than uploaded."""
+        with tempfile.NamedTemporaryFile() as handle:
+            with mock.patch.object(api, "Client") as client:
+                client.return_value.post.return_value = {"pulp_href": "/artifacts/1/"}
+                with mock.patch.dict(vars(constants), ARTIFACTS_PATH="/artifacts/"):
+                    href = upload_artifact(handle.name, mock.Mock(pool_size=2))
+        self.assertEqual(href, "/artifacts/1/")
+        client.return_value.post.assert_called_once_with("/artifacts/", files={"file": b""})
+        client.return_value.put.assert_not_called()
+
+    def test_unsupported(self):
+        """Assert a source of an unsupported type is rejected before anything is sent."""
+        with mock.patch.object(api, "Client") as client:
+            with self.assertRaises(TypeError):
+                upload_artifact(iter([b"abc"]), mock.Mock(pool_size=2))
+        client.assert_not_called()
+
+
+class WaitForTasksTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.pulp3.utils.wait_for_tasks`."""
+
+    def test_one_request_per_poll(self):
+        """Assert unfinished tasks are listed with a single request per poll."""
+        cfg = mock.Mock(polling=None, timeout=10)
+        tasks = [{"pulp_href": "/tasks/{}/".format(i), "state": "running"} for i in range(3)]
+        with mock.patch.object(api, "Client") as client:
+            client.return_value.get.side_effect = (
+                [dict(task, state="completed") for task in tasks[:2]] + tasks[2:],
+                [dict(tasks[2], state="failed")],
+            )
+            with mock.patch.object(polling.time, "sleep"):
+                with mock.patch.dict(vars(constants), TASKS_PATH="/tasks/"):
+                    done = list(wait_for_tasks([task["pulp_href"] for task in tasks], cfg))
+        self.assertEqual([task["state"] for task in done], ["completed", "completed", "failed"])
+        self.assertEqual(client.return_value.get.call_count, 2)
+        params = client.return_value.get.call_args_list[1][1]["params"]
+        self.assertEqual(params["pulp_href__in"], "/tasks/2/")
+
+    def test_filter_ignored(self):
+        """Assert tasks are read by href if Pulp ignores the ``pulp_href__in`` filter."""
+        cfg = mock.Mock(polling=None, timeout=10)
+        unrelated = [{"pulp_href": "/tasks/9/", "state": "completed"}]
+        with mock.patch.object(api, "Client") as client:
+            client.return_value.get.return_value = unrelated
+            typed_client = client.return_value.using_handler.return_value
+            typed_client.get.side_effect = lambda href: {"pulp_href": href, "state": "failed"}
+            with mock.patch.dict(vars(constants), TASKS_PATH="/tasks/"):
+                done = list(wait_for_tasks(["/tasks/1/", "/tasks/2/"], cfg))
+        self.assertEqual(
+            [(task["pulp_href"], task["state"]) for task in done],
+            [("/tasks/1/", "failed"), ("/tasks/2/", "failed")],
+        )
+        self.assertEqual(client.return_value.get.call_count, 1)
+
+
+class WaitForStatusTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.pulp3.utils.wait_for_status`."""
+
+    def setUp(self):
+        """Make statuses be fetched from ``self.statuses``, without sleeping."""
+        self.statuses = []
+        for patcher in (
+            mock.patch.object(api, "Client"),
+            mock.patch.object(polling.time, "sleep"),
+            mock.patch.dict(vars(constants), STATUS_PATH="/status/"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        api.Client.return_value.get.side_effect = self._get
+
+    def _get(self, *_, **__):
+        status = self.statuses.pop(0)
+        if status is None:
+            raise requests.exceptions.ConnectionError()
+        if isinstance(status, Exception):
+            raise status
+        return status
+
+    def test_ready(self):
+        """Assert each phase is waited for, and timed."""
+        self.statuses = [
+            None,
+            _get_status(connected=True),
+            _get_status(connected=True, workers=["w"]),
+            _get_status(connected=True, workers=["w"], content_apps=["c"]),
+        ]
+        timings = wait_for_status(mock.Mock())
+        self.assertEqual(tuple(timings), ("api", "database", "workers", "content apps"))
+        self.assertEqual(sorted(timings.values()), list(timings.values()))
+        self.assertEqual(self.statuses, [])
+
+    def test_not_json(self):
+        """Assert a status body which isn't JSON is taken to mean Pulp isn't ready."""
+        self.statuses = [
+            ValueError("Expecting value: line 1 column 1 (char 0)"),
+            _get_status(connected=True, workers=["w"], content_apps=["c"]),
+        ]
+        self.assertEqual(tuple(wait_for_status(mock.Mock())), STATUS_PHASES)
+        self.assertEqual(self.statuses, [])
+
+    def test_down(self):
+        """Assert Pulp is down once its status API stops answering."""
+        self.statuses = [_get_status(), None]
+        self.assertEqual(tuple(wait_for_status(mock.Mock(), ready=False)), ("down",))
+
+    def test_timeout(self):
+        """Assert an error is raised if Pulp isn't ready in time."""
+        self.statuses = [None]
+        with self.assertRaises(exceptions.TaskTimedOutError):
+            wait_for_status(mock.Mock(), timeout=0)
+
+
+class GetContentTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.pulp3.utils.get_content`."""
+
+    def test_concurrent_types(self):
+        """Assert each content type is fetched, and the pool is split."""
+        summary = {"rpm.package": {"href": "/packages/"}, "rpm.advisory": {"href": "/advisories/"}}
+        with mock.patch.object(config, "get_config") as get_config:
+            get_config.return_value.pool_size = 5
+            with mock.patch.object(api, "Client") as client:
+                client.return_value.get.return_value = {"content_summary": {"present": summary}}
+                typed_client = client.return_value.using_handler.return_value
+                typed_client.get.side_effect = lambda href: [href]
+                content = get_content({"latest_version_href": "/versions/1/"})
+        self.assertEqual(
+            dict(content), {"rpm.package": ["/packages/"], "rpm.advisory": ["/advisories/"]}
+        )
+        handler = client.return_value.using_handler.call_args[0][0]
+        self.assertEqual(handler.keywords, {"workers": 2})
+
+
+def _get_status(connected=False, workers=(), content_apps=()):
+    """Return a body like those of Pulp's status API."""
+    return {
+        "database_connection": {"connected": connected},
+        "online_workers": list(workers),
+        "online_content_apps": list(content_apps),
+    }
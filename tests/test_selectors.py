@@ -1,6 +1,11 @@
 # coding=utf-8
 """Unit tests for :mod:`pulp_smash.selectors`."""
+import contextlib
+import json
+import os
 import random
+import tempfile
+import time
 import unittest
 from unittest import mock
 
@@ -76,6 +81,117 @@ class GetBugTestCase(unittest.TestCase):
             selectors._get_bug("1")
 
 
+class BugCacheTestCase(unittest.TestCase):
+    """Test the on-disk bug cache used by ``_get_bug``."""
+
+    def setUp(self):
+        """Point the bug cache at a temporary directory, and empty memory."""
+        self.path = _use_temporary_bug_cache(self)
+
+    def test_fetch_and_cache(self):
+        """Assert a fetched bug is written to disk."""
+        entry = {"status": "MODIFIED", "target_platform_release": "", "fetched": 0}
+        with mock.patch.object(selectors, "_fetch_bug", return_value=entry):
+            bug = selectors._get_bug(1)
+        self.assertEqual(bug, selectors._Bug("MODIFIED", Version("0")))
+        with open(self.path) as handle:
+            self.assertEqual(json.load(handle), {"1": entry})
+
+    def test_fresh(self):
+        """Assert a fresh bug isn't fetched again."""
+        _cache_bug(time.time())
+        with mock.patch.object(selectors, "_fetch_bug") as fetch_bug:
+            bug = selectors._get_bug(1)
+        self.assertEqual(fetch_bug.call_count, 0)
+        self.assertEqual(bug, selectors._Bug("NEW", Version("2.8")))
+
+    def test_stale(self):
+        """Assert a stale bug is fetched again."""
+        _cache_bug(0)
+        entry = {"status": "MODIFIED", "target_platform_release": "2.8", "fetched": 1}
+        with mock.patch.object(selectors, "_fetch_bug", return_value=entry) as fetch_bug:
+            bug = selectors._get_bug(1)
+        self.assertEqual(fetch_bug.call_count, 1)
+        self.assertEqual(bug.status, "MODIFIED")
+
+    def test_stale_unreachable(self):
+        """Assert a stale bug is used if the bug tracker can't be reached."""
+        _cache_bug(0)
+        with mock.patch.object(selectors, "_fetch_bug") as fetch_bug:
+            fetch_bug.side_effect = requests.exceptions.ConnectionError()
+            with self.assertWarns(RuntimeWarning):
+                bug = selectors._get_bug(1)
+        self.assertEqual(bug.status, "NEW")
+
+    def test_stale_http_error(self):
+        """Assert a stale bug is used if the bug tracker answers with an error."""
+        _cache_bug(0)
+        with mock.patch.object(selectors, "_fetch_bug") as fetch_bug:
+            fetch_bug.side_effect = requests.exceptions.HTTPError("503 Server Error")
+            with self.assertWarns(RuntimeWarning):
+                bug = selectors._get_bug(1)
+        self.assertEqual(bug.status, "NEW")
+
+    def test_offline(self):
+        """Assert the bug tracker isn't contacted in offline mode."""
+        os.environ["PULP_SMASH_OFFLINE"] = "1"
+        _cache_bug(0)
+        with mock.patch.object(selectors, "_fetch_bug") as fetch_bug:
+            self.assertEqual(selectors._get_bug(1).status, "NEW")
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                selectors._get_bug(2)
+        self.assertEqual(fetch_bug.call_count, 0)
+
+
+class PrefetchBugsTestCase(unittest.TestCase):
+    """Test :meth:`pulp_smash.selectors.prefetch_bugs`."""
+
+    def setUp(self):
+        """Point the bug cache at a temporary directory, and empty memory."""
+        self.path = _use_temporary_bug_cache(self)
+
+    def test_prefetch(self):
+        """Assert only missing bugs are fetched, and all are cached."""
+        _cache_bug(time.time())
+        entry = {"status": "MODIFIED", "target_platform_release": "", "fetched": time.time()}
+        with mock.patch.object(selectors, "_fetch_bug", return_value=entry) as fetch_bug:
+            self.assertEqual(selectors.prefetch_bugs([1, 2, 3]), {1, 2, 3})
+        self.assertEqual(sorted(call[0][0] for call in fetch_bug.call_args_list), [2, 3])
+        self.assertEqual(selectors._BUG_STATUS_CACHE[1].status, "NEW")
+        self.assertEqual(selectors._BUG_STATUS_CACHE[3].status, "MODIFIED")
+        with open(self.path) as handle:
+            self.assertEqual(set(json.load(handle)), {"1", "2", "3"})
+
+    def test_fetched_unlocked(self):
+        """Assert bugs are fetched without holding the cache lock, and with a timeout."""
+        locked = []
+
+        @contextlib.contextmanager
+        def lock_file(*_, **__):
+            locked.append(True)
+            yield
+            locked.pop()
+
+        def get(*_, **kwargs):
+            self.assertEqual(locked, [])
+            self.assertEqual(kwargs["timeout"], selectors._BUG_FETCH_TIMEOUT)
+            return mock.Mock(json=lambda: {"issue": {"status": {"name": "NEW"}}})
+
+        with mock.patch.object(utils, "lock_file", lock_file):
+            with mock.patch.object(selectors.requests, "get", get):
+                with mock.patch.object(selectors, "_get_tpr", return_value=""):
+                    self.assertEqual(selectors.prefetch_bugs([1, 2]), {1, 2})
+        with open(self.path) as handle:
+            self.assertEqual(set(json.load(handle)), {"1", "2"})
+
+    def test_failures_skipped(self):
+        """Assert bugs that can't be fetched are left uncached."""
+        with mock.patch.object(selectors, "_fetch_bug") as fetch_bug:
+            fetch_bug.side_effect = requests.exceptions.ConnectionError()
+            self.assertEqual(selectors.prefetch_bugs([1]), set())
+        self.assertEqual(selectors._BUG_STATUS_CACHE, {})
+
+
 class BugIsFixedTestCase(unittest.TestCase):
     """Test :meth:`pulp_smash.selectors.bug_is_fixed`."""
 
@@ -157,3 +273,32 @@ class SkipIfConditionTestCase(unittest.TestCase):
     def test_skip_false(self):
         """Make ``@skip_if`` continue without raising an exception."""
         self.assertIsNone(self.DummyTestClass().test_should_run())
+
+
+def _use_temporary_bug_cache(test_case):
+    """Point the bug cache at a temporary directory, and empty memory.
+
+    Also clear the environment variables that affect the bug cache. Undo all
+    of this when ``test_case`` is cleaned up.
+
+    :returns: The path to the bug cache.
+    """
+    tmp_dir = tempfile.TemporaryDirectory()
+    test_case.addCleanup(tmp_dir.cleanup)
+    path = os.path.join(tmp_dir.name, "bugs.json")
+    for patcher in (
+        mock.patch.object(selectors, "_get_bug_cache_path", return_value=path),
+        mock.patch.object(selectors, "_BUG_STATUS_CACHE", {}),
+        mock.patch.dict(os.environ),
+    ):
+        patcher.start()
+        test_case.addCleanup(patcher.stop)
+    os.environ.pop("PULP_SMASH_OFFLINE", None)
+    os.environ.pop("PULP_SMASH_BUG_CACHE_TTL", None)
+    return path
+
+
+def _cache_bug(fetched):
+    """Write bug 1 to the bug cache, as fetched at time ``fetched``."""
+    entry = {"status": "NEW", "target_platform_release": "2.8", "fetched": fetched}
+    utils.update_json_cache(selectors._get_bug_cache_path(), {"1": entry})
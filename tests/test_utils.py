@@ -1,9 +1,14 @@
 # coding=utf-8
 """Unit tests for :mod:`pulp_smash.utils`."""
+import contextlib
+import io
+import tempfile
+import threading
+import time
 import unittest
 from unittest import mock
 
-from pulp_smash import cli, utils, exceptions
+from pulp_smash import cli, utils
 
 
 class UUID4TestCase(unittest.TestCase):
@@ -19,14 +24,12 @@ class IsRootTestCase(unittest.TestCase):
 
     def test_true(self):
         """Assert the method returns ``True`` when root."""
-        with mock.patch.object(cli, "Client") as clien:
-            clien.return_value.run.return_value.stdout.strip.return_value = "0"
+        with _mock_host_facts("uid=0\n"):
             self.assertTrue(cli.is_root(None))
 
     def test_false(self):
         """Assert the method returns ``False`` when non-root."""
-        with mock.patch.object(cli, "Client") as clien:
-            clien.return_value.run.return_value.stdout.strip.return_value = "1"
+        with _mock_host_facts("uid=1000\n"):
             self.assertFalse(cli.is_root(None))
 
 
@@ -61,21 +64,19 @@ class GetSha256ChecksumTestCase(unittest.TestCase):
 class GetOsReleaseTestCase(unittest.TestCase):
     """Test the ``get_os_release_*`` functions.
 
-    These tests are very simple: they just make sure that the string returned
-    by the used :class:`pulp_smash.cli.Client` object is stripped and returned.
+    These tests are very simple: they just make sure that the facts gathered
+    by :func:`pulp_smash.cli.get_host_facts` are stripped and returned.
     """
 
     def test_get_os_release_id(self):
         """Test :func:`pulp_smash.utils.get_os_release_id`."""
-        with mock.patch.object(cli, "Client") as client:
-            client.return_value.run.return_value.stdout = " fedora "
+        with _mock_host_facts("os_release_id= fedora \n"):
             response = utils.get_os_release_id(mock.Mock())
         self.assertEqual(response, "fedora")
 
     def test_get_os_release_version_id(self):
         """Test :func:`pulp_smash.utils.get_os_release_version_id`."""
-        with mock.patch.object(cli, "Client") as client:
-            client.return_value.run.return_value.stdout = " 27 "
+        with _mock_host_facts("os_release_version_id= 27 \n"):
             response = utils.get_os_release_version_id(mock.Mock())
         self.assertEqual(response, "27")
 
@@ -85,17 +86,13 @@ class FipsIsSupportedtestCase(unittest.TestCase):
 
     def test_return_true(self):
         """Assert true if the crypto.fips_enabled is supported by sysctl."""
-        with mock.patch.object(cli, "Client") as client:
-            client.return_value.run.return_value = "some string value"
+        with _mock_host_facts("fips_enabled=0\n"):
             response = utils.fips_is_supported(mock.Mock())
         self.assertTrue(response)
 
     def test_return_false(self):
-        """Assert false if Called process Error Exception is thrown."""
-        with mock.patch.object(cli, "Client") as client:
-            client.side_effect = exceptions.CalledProcessError(
-                ("arg", "arg"), 1, "stdout", "stderr"
-            )
+        """Assert false if crypto.fips_enabled can't be read."""
+        with _mock_host_facts("uid=0\n"):
             response = utils.fips_is_supported(mock.Mock())
         self.assertFalse(response)
 
@@ -105,16 +102,125 @@ class FipsIsEnabledTestCase(unittest.TestCase):
 
     def test_return_true(self):
         """Assert true if the crypto.fips_enabled is enabled in sysctl."""
-        with mock.patch.object(cli, "Client") as client:
-            client.return_value.run.return_value.stdout = "1\n"
+        with _mock_host_facts("fips_enabled=1\n"):
             response = utils.fips_is_enabled(mock.Mock())
         self.assertTrue(response)
 
     def test_return_false(self):
         """Assert false if the crypto.fips_enabled is not enabled in sysctl."""
-        for stdout in ("-1\n", "0\n", "2\n", "10\n"):
-            with self.subTest(stdout=stdout):
-                with mock.patch.object(cli, "Client") as client:
-                    client.return_value.run.return_value.stdout = stdout
+        for value in ("-1", "0", "2", "10"):
+            with self.subTest(value=value):
+                with _mock_host_facts("fips_enabled={}\n".format(value)):
                     response = utils.fips_is_enabled(mock.Mock())
                 self.assertFalse(response)
+
+
+class GetPulpSettingsTestCase(unittest.TestCase):
+    """Test :func:`pulp_smash.utils.get_pulp_settings`."""
+
+    def setUp(self):
+        """Give each test empty caches, and a client targeting a plain host."""
+        for patcher in (
+            mock.patch.dict(utils._PULPCORE_MANAGER_CACHE),  # pylint:disable=protected-access
+            mock.patch.dict(utils._PULP_SETTINGS_CACHE),  # pylint:disable=protected-access
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.cli_client = mock.Mock(transport="ssh")
+        self.cli_client.pulp_host.hostname = "example.com"
+        ps_output = "1 ? S 0:01 /opt/pulp/bin/python /opt/pulp/bin/pulpcore-worker\n"
+        self.cli_client.run.side_effect = lambda args: mock.Mock(
+            stdout=ps_output if args[0] == "ps" else '{"A": 1, "B": [2]}\n'
+        )
+
+    def test_batched(self):
+        """Assert many settings are read with one invocation, and memoized."""
+        self.assertEqual(utils.get_pulp_settings(self.cli_client, ["A", "B"]), {"A": 1, "B": [2]})
+        self.assertEqual(utils.get_pulp_setting(self.cli_client, "B"), [2])
+        calls = [call[0][0] for call in self.cli_client.run.call_args_list]
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(calls[1][:2], ("/opt/pulp/bin/pulpcore-manager", "shell"))
+
+    def test_invalidate(self):
+        """Assert invalidated settings are read again, but not the manager path."""
+        utils.get_pulp_setting(self.cli_client, "A")
+        utils.invalidate_pulp_settings(self.cli_client)
+        utils.get_pulp_setting(self.cli_client, "A")
+        calls = [call[0][0][0] for call in self.cli_client.run.call_args_list]
+        self.assertEqual(calls.count("ps"), 1)
+        self.assertEqual(len(calls), 3)
+
+
+class IterChunksTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.utils.iter_chunks`."""
+
+    def test_sources(self):
+        """Assert every kind of source is split into the same chunks."""
+        data = b"0123456789"
+        with tempfile.NamedTemporaryFile() as handle:
+            handle.write(data)
+            handle.flush()
+            sources = {
+                "bytes": data,
+                "path": handle.name,
+                "file": io.BytesIO(data),
+                "iterable": iter([b"01", b"", b"23456", b"789"]),
+            }
+            for kind, source in sources.items():
+                with self.subTest(kind=kind):
+                    self.assertEqual(
+                        list(utils.iter_chunks(source, 4)),
+                        [(0, b"0123"), (4, b"4567"), (8, b"89")],
+                    )
+
+    def test_empty(self):
+        """Assert empty sources, including empty files, yield nothing."""
+        with tempfile.NamedTemporaryFile() as handle:
+            self.assertEqual(list(utils.iter_chunks(handle.name)), [])
+        self.assertEqual(list(utils.iter_chunks(b"")), [])
+
+
+class UploadChunksTestCase(unittest.TestCase):
+    """Tests for :func:`pulp_smash.utils.upload_chunks`."""
+
+    def test_concurrent(self):
+        """Assert chunks are sent concurrently, but no more than allowed at once."""
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def put(offset, chunk):
+            with lock:
+                active.append(offset)
+                peak.append(len(active))
+            time.sleep(0.01)
+            with lock:
+                active.remove(offset)
+
+        progress = mock.Mock()
+        sent = utils.upload_chunks(
+            put, utils.iter_chunks(bytes(100), 10), max_workers=3, progress=progress
+        )
+        self.assertEqual(sent, 100)
+        self.assertLessEqual(max(peak), 3)
+        self.assertGreater(max(peak), 1)
+        self.assertEqual([call[0][0].bytes_sent for call in progress.call_args_list][-1], 100)
+
+    def test_error(self):
+        """Assert an error sending a chunk is raised, and stops the upload."""
+        put = mock.Mock(side_effect=[None, ValueError()] + [None] * 100)
+        with self.assertRaises(ValueError):
+            utils.upload_chunks(put, utils.iter_chunks(bytes(100), 1), max_workers=1)
+        self.assertLess(put.call_count, 100)
+
+
+def _mock_host_facts(stdout):
+    """Make :func:`pulp_smash.cli.get_host_facts` gather facts from ``stdout``.
+
+    The facts gathered during previous tests are forgotten.
+    """
+    stack = contextlib.ExitStack()
+    stack.enter_context(mock.patch.dict(cli._HOST_FACTS, clear=True))  # pylint:disable=W0212
+    client = stack.enter_context(mock.patch.object(cli, "Client"))
+    client.return_value.run.return_value.stdout = stdout
+    return stack